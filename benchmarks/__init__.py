@@ -0,0 +1 @@
+"""Performance benchmarks and a synthetic Allium stand-in for Pequod."""
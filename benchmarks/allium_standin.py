@@ -0,0 +1,347 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import asdict, dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from pequod.types import WatchAddress
+from tests.synthetic import TOKENS, SyntheticTraffic
+
+LOG = logging.getLogger(__name__)
+
+API_PREFIX = "/api/v1"
+PAGE_SPAN_SECONDS = 900
+SERVER_ERRORS = (HTTPStatus.INTERNAL_SERVER_ERROR, HTTPStatus.BAD_GATEWAY, HTTPStatus.SERVICE_UNAVAILABLE)
+
+
+@dataclass
+class StandinConfig:
+    seed: int = 7
+    txs_per_wallet: int = 4
+    tokens_per_wallet: int = 12
+    pages: int = 1
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    rate_limit_per_second: float = 0.0
+    error_429_rate: float = 0.0
+    error_5xx_rate: float = 0.0
+    explorer_run_seconds: float = 0.5
+    api_key: Optional[str] = None
+
+
+class StandinState:
+    def __init__(self, config: StandinConfig) -> None:
+        self.config = config
+        self._lock = threading.Lock()
+        self._traffic = SyntheticTraffic(seed=config.seed, wallets=0)
+        self._faults = random.Random(config.seed + 1)
+        self._recent_requests: Deque[float] = deque()
+        self._ids = itertools.count(1)
+        self._queries: Dict[str, Dict[str, Any]] = {}
+        self._runs: Dict[str, Tuple[str, float]] = {}
+        self.requests: Counter[str] = Counter()
+        self.responses: Counter[int] = Counter()
+
+    def injected_fault(self) -> Optional[HTTPStatus]:
+        config = self.config
+        with self._lock:
+            now = time.monotonic()
+            if config.rate_limit_per_second > 0:
+                while self._recent_requests and now - self._recent_requests[0] >= 1.0:
+                    self._recent_requests.popleft()
+                if len(self._recent_requests) >= config.rate_limit_per_second:
+                    return HTTPStatus.TOO_MANY_REQUESTS
+                self._recent_requests.append(now)
+            roll = self._faults.random()
+            if roll < config.error_429_rate:
+                return HTTPStatus.TOO_MANY_REQUESTS
+            if roll < config.error_429_rate + config.error_5xx_rate:
+                return self._faults.choice(SERVER_ERRORS)
+        return None
+
+    def latency_seconds(self) -> float:
+        jitter = self.config.latency_jitter_ms
+        with self._lock:
+            extra = self._faults.uniform(-jitter, jitter) if jitter > 0 else 0.0
+        return max(0.0, self.config.latency_ms + extra) / 1000.0
+
+    def record(self, path: str, status: int) -> None:
+        with self._lock:
+            self.requests[path] += 1
+            self.responses[int(status)] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "config": asdict(self.config),
+                "requests": dict(self.requests),
+                "responses": {str(code): count for code, count in sorted(self.responses.items())},
+                "queries": len(self._queries),
+                "runs": len(self._runs),
+            }
+
+    @staticmethod
+    def _watches(addresses: Any) -> List[WatchAddress]:
+        watches: List[WatchAddress] = []
+        for item in addresses if isinstance(addresses, list) else []:
+            if isinstance(item, dict) and isinstance(item.get("address"), str):
+                chain = str(item.get("chain") or "ethereum").lower()
+                watches.append(WatchAddress(chain=chain, address=item["address"], label=item["address"]))
+        return watches
+
+    def wallet_transactions(self, addresses: Any, cursor: Optional[str]) -> Any:
+        page = 1
+        if cursor and cursor.startswith("page-"):
+            try:
+                page = max(1, int(cursor.split("-", 1)[1]))
+            except ValueError:
+                page = 1
+        now_ts = int(time.time()) - (page - 1) * PAGE_SPAN_SECONDS
+        with self._lock:
+            rows = self._traffic.wallet_transactions_payload(
+                self._watches(addresses),
+                txs_per_wallet=self.config.txs_per_wallet,
+                now_ts=now_ts,
+            )
+        if self.config.pages <= 1:
+            return rows
+        response: Dict[str, Any] = {"items": [tx for row in rows for tx in row["items"]]}
+        if page < self.config.pages:
+            response["cursor"] = f"page-{page + 1}"
+        return response
+
+    def wallet_balances(self, addresses: Any) -> Any:
+        with self._lock:
+            return self._traffic.wallet_balances_payload(
+                self._watches(addresses),
+                tokens_per_wallet=self.config.tokens_per_wallet,
+            )
+
+    def prices(self, tokens: Any) -> Dict[str, Any]:
+        known = {token_address: (symbol, price) for symbol, token_address, _, price in TOKENS}
+        items: List[Dict[str, Any]] = []
+        for item in tokens if isinstance(tokens, list) else []:
+            if not isinstance(item, dict):
+                continue
+            token_address = str(item.get("token_address") or item.get("address") or "").lower()
+            symbol, price = known.get(token_address, (None, None))
+            if price is None:
+                price = round(random.Random(token_address).uniform(0.01, 50.0), 6)
+            items.append(
+                {
+                    "chain": item.get("chain"),
+                    "address": token_address,
+                    "price": price,
+                    "info": {"symbol": symbol},
+                    "timestamp": int(time.time()),
+                }
+            )
+        return {"items": items}
+
+    def create_query(self, payload: Any) -> Dict[str, Any]:
+        with self._lock:
+            query_id = f"q{next(self._ids)}"
+            self._queries[query_id] = payload if isinstance(payload, dict) else {}
+        return {"query_id": query_id}
+
+    def run_query(self, query_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if query_id not in self._queries:
+                return None
+            run_id = f"r{next(self._ids)}"
+            self._runs[run_id] = (query_id, time.monotonic())
+        return {"run_id": run_id}
+
+    def run_status(self, run_id: str) -> Optional[str]:
+        with self._lock:
+            run = self._runs.get(run_id)
+        if run is None:
+            return None
+        return "success" if time.monotonic() - run[1] >= self.config.explorer_run_seconds else "running"
+
+    def run_results(self, run_id: str) -> Optional[Dict[str, Any]]:
+        if self.run_status(run_id) != "success":
+            return None
+        with self._lock:
+            query = self._queries.get(self._runs[run_id][0], {})
+        sql = str((query.get("config") or {}).get("sql") or "")
+        addresses = [literal for literal in sql.split("'")[1::2] if literal]
+        countries = ("united states", "singapore", "germany", "japan", "brazil", "south korea")
+        rows = [
+            {
+                "address": address.lower(),
+                "primary_country": countries[index % len(countries)],
+                "primary_region": None,
+                "score": 0.8,
+                "confidence": "medium",
+                "reasoning": "synthetic",
+            }
+            for index, address in enumerate(addresses)
+        ]
+        return {"data": rows, "meta": {"columns": list(rows[0]) if rows else []}}
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    state: StandinState
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        LOG.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, path: str, payload: Any, status: HTTPStatus = HTTPStatus.OK) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if status == HTTPStatus.TOO_MANY_REQUESTS:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+        self.state.record(path, status)
+
+    def _read_json(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            return None
+        try:
+            return json.loads(self.rfile.read(length).decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return None
+
+    def _admit(self, path: str) -> bool:
+        api_key = self.state.config.api_key
+        if api_key and self.headers.get("X-API-KEY") != api_key:
+            self._send_json(path, {"message": "invalid api key"}, status=HTTPStatus.UNAUTHORIZED)
+            return False
+        delay = self.state.latency_seconds()
+        if delay > 0:
+            time.sleep(delay)
+        fault = self.state.injected_fault()
+        if fault is not None:
+            self._send_json(path, {"message": f"injected {fault.phrase.lower()}"}, status=fault)
+            return False
+        return True
+
+    def do_GET(self) -> None:  # noqa: N802
+        parsed = urlparse(self.path)
+        path = parsed.path
+        if path == "/_standin/stats":
+            self._send_json(path, self.state.stats())
+            return
+        parts = path.split("/")
+        if path.startswith(f"{API_PREFIX}/explorer/query-runs/") and len(parts) == 7:
+            if not self._admit(path):
+                return
+            run_id, action = parts[5], parts[6]
+            if action == "status":
+                status = self.state.run_status(run_id)
+                if status is None:
+                    self._send_json(path, {"message": "unknown run"}, status=HTTPStatus.NOT_FOUND)
+                    return
+                self._send_json(path, status)
+                return
+            if action == "results":
+                results = self.state.run_results(run_id)
+                if results is None:
+                    self._send_json(path, {"message": "run not finished"}, status=HTTPStatus.NOT_FOUND)
+                    return
+                self._send_json(path, results)
+                return
+        self._send_json(path, {"message": "not found"}, status=HTTPStatus.NOT_FOUND)
+
+    def do_POST(self) -> None:  # noqa: N802
+        parsed = urlparse(self.path)
+        path = parsed.path
+        payload = self._read_json()
+        if not self._admit(path):
+            return
+        if path == f"{API_PREFIX}/developer/wallet/transactions":
+            cursor = parse_qs(parsed.query).get("cursor", [None])[0]
+            self._send_json(path, self.state.wallet_transactions(payload, cursor))
+            return
+        if path == f"{API_PREFIX}/developer/wallet/balances":
+            self._send_json(path, self.state.wallet_balances(payload))
+            return
+        if path == f"{API_PREFIX}/developer/prices":
+            self._send_json(path, self.state.prices(payload))
+            return
+        if path == f"{API_PREFIX}/explorer/queries":
+            self._send_json(path, self.state.create_query(payload))
+            return
+        parts = path.split("/")
+        if path.startswith(f"{API_PREFIX}/explorer/queries/") and len(parts) == 7 and parts[6] == "run-async":
+            run = self.state.run_query(parts[5])
+            if run is None:
+                self._send_json(path, {"message": "unknown query"}, status=HTTPStatus.NOT_FOUND)
+                return
+            self._send_json(path, run)
+            return
+        self._send_json(path, {"message": "not found"}, status=HTTPStatus.NOT_FOUND)
+
+
+def make_server(host: str, port: int, config: StandinConfig) -> ThreadingHTTPServer:
+    class _Handler(StandinHandler):
+        pass
+
+    _Handler.state = StandinState(config)
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.allium_standin",
+        description="Serve synthetic Allium API responses with injectable latency, 429s and 5xx errors.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--txs-per-wallet", type=int, default=4, help="Average transactions per wallet per call")
+    parser.add_argument("--tokens-per-wallet", type=int, default=12, help="Max balance rows per wallet")
+    parser.add_argument("--pages", type=int, default=1, help="Cursor pages per wallet/transactions batch")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests/s before answering 429 (0 = off)")
+    parser.add_argument("--error-429-rate", type=float, default=0.0, help="Fraction of requests answered 429")
+    parser.add_argument("--error-5xx-rate", type=float, default=0.0, help="Fraction of requests answered 500/502/503")
+    parser.add_argument("--explorer-run-seconds", type=float, default=0.5)
+    parser.add_argument("--api-key", default=None, help="Require this X-API-KEY (default: accept any)")
+    args = parser.parse_args(argv)
+
+    config = StandinConfig(
+        seed=args.seed,
+        txs_per_wallet=args.txs_per_wallet,
+        tokens_per_wallet=args.tokens_per_wallet,
+        pages=args.pages,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        rate_limit_per_second=args.rate_limit,
+        error_429_rate=args.error_429_rate,
+        error_5xx_rate=args.error_5xx_rate,
+        explorer_run_seconds=args.explorer_run_seconds,
+        api_key=args.api_key,
+    )
+    server = make_server(args.host, args.port, config)
+    LOG.info("Allium stand-in on http://%s:%s (set ALLIUM_BASE_URL to this).", args.host, args.port)
+    try:
+        server.serve_forever(poll_interval=0.5)
+    except KeyboardInterrupt:
+        LOG.info("Stand-in shutting down.")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,545 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import replace
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from pequod.alerts import build_alert
+from pequod.balances import extract_wallet_balance_summary
+from pequod.batch import CycleBatch
+from pequod.dashboard_state import DashboardState
+from pequod.dedupe import DedupeStore
+from pequod.event_engine import build_map_event
+from pequod.fingerprint import tx_fingerprint
+from pequod import parsing, utils
+from pequod.poller import WhalePoller
+from pequod.replay import ReplayClient, _watchlist_from_payloads, read_payloads
+from pequod.sinks import MultiSink, NullSink
+from pequod.tx_extractors import normalize_into_batch, normalize_transactions
+from pequod.types import Alert, NormalizedTransaction
+from tests.synthetic import SyntheticTraffic
+
+SCALES: Dict[str, Dict[str, int]] = {
+    "quick": {"wallets": 200, "txs_per_wallet": 2, "repeat": 1, "dedupe_keys": 300},
+    "default": {"wallets": 2000, "txs_per_wallet": 4, "repeat": 3, "dedupe_keys": 3000},
+}
+# Best-of-N for the cycle filter pair; their gap is smaller than three-run noise.
+CYCLE_FILTER_REPEAT = 10
+ALERT_BURST = 1_000
+BENCHMARKS: Dict[str, Callable[["BenchContext"], Dict[str, Any]]] = {}
+
+
+def benchmark(name: str) -> Callable[[Callable[["BenchContext"], Dict[str, Any]]], Callable[["BenchContext"], Dict[str, Any]]]:
+    def register(fn: Callable[["BenchContext"], Dict[str, Any]]) -> Callable[["BenchContext"], Dict[str, Any]]:
+        BENCHMARKS[name] = fn
+        return fn
+
+    return register
+
+
+def measure(fn: Callable[[], Any], ops: int, repeat: int) -> Dict[str, Any]:
+    timings: List[float] = []
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    best = max(1e-9, min(timings))
+    return {
+        "ops": ops,
+        "best_seconds": round(best, 6),
+        "ops_per_second": round(ops / best, 2),
+        "us_per_op": round(best / max(1, ops) * 1_000_000.0, 3),
+    }
+
+
+def measure_memory(fn: Callable[[], Any], ops: int) -> Dict[str, Any]:
+    tracemalloc.start()
+    try:
+        kept = fn()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return {
+        "ops": ops,
+        "retained_bytes": retained,
+        "peak_bytes": peak,
+        "bytes_per_op": round(retained / max(1, ops), 1),
+    }
+
+
+class BenchContext:
+    def __init__(
+        self,
+        seed: int,
+        scale: Dict[str, int],
+        workdir: Path,
+        recorded_payloads: Optional[List[Any]] = None,
+    ) -> None:
+        self.seed = seed
+        self.scale = scale
+        self.repeat = scale["repeat"]
+        self.workdir = workdir
+        self.traffic = SyntheticTraffic(seed=seed, wallets=scale["wallets"])
+        self.now_ts = int(time.time())
+        if recorded_payloads:
+            self.traffic.watchlist = _watchlist_from_payloads(recorded_payloads) or self.traffic.watchlist
+        self.address_to_chain = {item.address.lower(): item.chain for item in self.traffic.watchlist}
+        self.tx_payloads = recorded_payloads or [
+            self.traffic.wallet_transactions_payload(
+                self.traffic.watchlist[start : start + 20],
+                txs_per_wallet=scale["txs_per_wallet"],
+                now_ts=self.now_ts,
+            )
+            for start in range(0, len(self.traffic.watchlist), 20)
+        ]
+        self.balance_payloads = [
+            self.traffic.wallet_balances_payload(self.traffic.watchlist[start : start + 20])
+            for start in range(0, len(self.traffic.watchlist), 20)
+        ]
+        self._transactions: Optional[List[NormalizedTransaction]] = None
+        self._alerts: Optional[List[Alert]] = None
+
+    @property
+    def transactions(self) -> List[NormalizedTransaction]:
+        if self._transactions is None:
+            self._transactions = [
+                tx for payload in self.tx_payloads for tx in normalize_transactions(payload, self.address_to_chain)
+            ]
+        return self._transactions
+
+    @property
+    def timestamp_values(self) -> List[Any]:
+        return [tx.raw.get("block_timestamp") for tx in self.transactions]
+
+    @property
+    def numeric_values(self) -> List[Any]:
+        values: List[Any] = []
+        for tx in self.transactions:
+            transfer = tx.raw.get("asset_transfer")
+            amount = transfer.get("amount") if isinstance(transfer, dict) else tx.raw.get("amount")
+            if isinstance(amount, dict):
+                values.extend(amount.values())
+            else:
+                values.append(amount)
+            values.append(tx.raw.get("usd_value"))
+        return values
+
+    @property
+    def alerts(self) -> List[Alert]:
+        if self._alerts is None:
+            label_by_address = {item.address.lower(): item for item in self.traffic.watchlist}
+            self._alerts = [
+                build_alert(tx, tx.usd_value if tx.usd_value is not None else 50_000.0, label_by_address)
+                for tx in self.transactions
+            ]
+        return self._alerts
+
+    def poller(self, dedupe_store: DedupeStore) -> WhalePoller:
+        return WhalePoller(
+            client=ReplayClient(),  # type: ignore[arg-type]
+            watchlist=list(self.traffic.watchlist),
+            dedupe_store=dedupe_store,
+            sink=MultiSink([NullSink()]),
+            min_alert_usd=10_000.0,
+            max_addresses_per_request=20,
+            poll_interval_seconds=30,
+            lookback_seconds=3600,
+        )
+
+
+@benchmark("normalize_transactions")
+def bench_normalize(ctx: BenchContext) -> Dict[str, Any]:
+    def run() -> None:
+        for payload in ctx.tx_payloads:
+            normalize_transactions(payload, ctx.address_to_chain)
+
+    result = measure(run, ops=len(ctx.transactions), repeat=ctx.repeat)
+    result["unit"] = "transaction"
+    return result
+
+
+@benchmark("normalize_transactions_generic")
+def bench_normalize_generic(ctx: BenchContext) -> Dict[str, Any]:
+    def run() -> None:
+        for payload in ctx.tx_payloads:
+            normalize_transactions(payload, ctx.address_to_chain, compiled=False)
+
+    result = measure(run, ops=len(ctx.transactions), repeat=ctx.repeat)
+    result["unit"] = "transaction"
+    return result
+
+
+def _parse_benchmark(ctx: BenchContext, values: List[Any], fn: Callable[[Any], Any], unit: str) -> Dict[str, Any]:
+    def run() -> None:
+        for value in values:
+            fn(value)
+
+    result = measure(run, ops=len(values), repeat=ctx.repeat)
+    result["unit"] = unit
+    return result
+
+
+@benchmark("parse_timestamp_utils")
+def bench_parse_timestamp_utils(ctx: BenchContext) -> Dict[str, Any]:
+    return _parse_benchmark(ctx, ctx.timestamp_values, utils.parse_timestamp, "value")
+
+
+@benchmark("parse_timestamp_fast")
+def bench_parse_timestamp_fast(ctx: BenchContext) -> Dict[str, Any]:
+    values = ctx.timestamp_values
+
+    def run() -> None:
+        parsing.clear_timestamp_cache()
+        for value in values:
+            parsing.parse_timestamp(value)
+
+    result = measure(run, ops=len(values), repeat=ctx.repeat)
+    result["unit"] = "value"
+    return result
+
+
+@benchmark("to_float_utils")
+def bench_to_float_utils(ctx: BenchContext) -> Dict[str, Any]:
+    return _parse_benchmark(ctx, ctx.numeric_values, utils.to_float, "value")
+
+
+@benchmark("to_float_fast")
+def bench_to_float_fast(ctx: BenchContext) -> Dict[str, Any]:
+    return _parse_benchmark(ctx, ctx.numeric_values, parsing.to_float, "value")
+
+
+@benchmark("tx_id_short_hash")
+def bench_tx_id_short_hash(ctx: BenchContext) -> Dict[str, Any]:
+    txs = [row for payload in ctx.tx_payloads for item in payload if isinstance(item, dict) for row in item.get("items", [])]
+    return _parse_benchmark(ctx, txs, utils.short_hash, "tx")
+
+
+@benchmark("tx_id_fingerprint")
+def bench_tx_id_fingerprint(ctx: BenchContext) -> Dict[str, Any]:
+    txs = [row for payload in ctx.tx_payloads for item in payload if isinstance(item, dict) for row in item.get("items", [])]
+    return _parse_benchmark(ctx, txs, tx_fingerprint, "tx")
+
+
+@benchmark("normalize_memory")
+def bench_normalize_memory(ctx: BenchContext) -> Dict[str, Any]:
+    payloads = ctx.tx_payloads
+
+    def run() -> List[NormalizedTransaction]:
+        return [tx for payload in payloads for tx in normalize_transactions(payload, ctx.address_to_chain)]
+
+    result = measure_memory(run, ops=len(ctx.transactions))
+    result["unit"] = "transaction"
+    return result
+
+
+@benchmark("alert_memory")
+def bench_alert_memory(ctx: BenchContext) -> Dict[str, Any]:
+    transactions = ctx.transactions
+    label_by_address = {item.address.lower(): item for item in ctx.traffic.watchlist}
+
+    def run() -> List[Alert]:
+        return [
+            build_alert(tx, tx.usd_value if tx.usd_value is not None else 50_000.0, label_by_address)
+            for tx in transactions
+        ]
+
+    result = measure_memory(run, ops=len(transactions))
+    result["unit"] = "alert"
+    return result
+
+
+def _cycle_filter_benchmark(ctx: BenchContext, process: Callable[[WhalePoller], Any]) -> Dict[str, Any]:
+    # Threshold above every synthetic transfer, so the run measures normalize plus the
+    # watermark/price/threshold filter without sink or dedupe work. The store is opened
+    # once and watermarks are reset per run, keeping SQLite setup out of the timing.
+    store = DedupeStore(ctx.workdir / f"cycle-{time.perf_counter_ns()}.sqlite3")
+    try:
+        poller = ctx.poller(store)
+        poller._min_alert_usd = float("inf")
+        watermarks = dict(poller._latest_timestamp_by_watch_address)
+
+        def run() -> None:
+            poller._latest_timestamp_by_watch_address = dict(watermarks)
+            process(poller)
+
+        result = measure(run, ops=len(ctx.transactions), repeat=max(ctx.repeat, CYCLE_FILTER_REPEAT))
+    finally:
+        store.close()
+    result["unit"] = "transaction"
+    return result
+
+
+@benchmark("cycle_filter_list")
+def bench_cycle_filter_list(ctx: BenchContext) -> Dict[str, Any]:
+    def process(poller: WhalePoller) -> None:
+        transactions: List[NormalizedTransaction] = []
+        for payload in ctx.tx_payloads:
+            transactions.extend(normalize_transactions(payload, ctx.address_to_chain))
+        poller._process_transactions(transactions)
+
+    return _cycle_filter_benchmark(ctx, process)
+
+
+@benchmark("cycle_filter_batch")
+def bench_cycle_filter_batch(ctx: BenchContext) -> Dict[str, Any]:
+    def process(poller: WhalePoller) -> None:
+        batch = CycleBatch()
+        for payload in ctx.tx_payloads:
+            normalize_into_batch(payload, ctx.address_to_chain, batch)
+        poller._process_batch(batch)
+
+    return _cycle_filter_benchmark(ctx, process)
+
+
+@benchmark("score_alert")
+def bench_score_alert(ctx: BenchContext) -> Dict[str, Any]:
+    transactions = ctx.transactions
+
+    def run() -> None:
+        store = DedupeStore(ctx.workdir / f"score-{time.perf_counter_ns()}.sqlite3")
+        try:
+            poller = ctx.poller(store)
+            for tx in transactions:
+                usd_value = tx.usd_value if tx.usd_value is not None else 50_000.0
+                poller._score_alert(tx, usd_value, entities={}, now_ts=ctx.now_ts)
+                poller._record_alert_history(
+                    poller._watch_key_for_tx(tx),
+                    poller._counterparty_for_tx(tx),
+                    usd_value,
+                    tx.timestamp or ctx.now_ts,
+                )
+        finally:
+            store.close()
+
+    result = measure(run, ops=len(transactions), repeat=ctx.repeat)
+    result["unit"] = "transaction"
+    return result
+
+
+@benchmark("build_map_event")
+def bench_build_map_event(ctx: BenchContext) -> Dict[str, Any]:
+    alerts = ctx.alerts
+    watch_by_address = {item.address.lower(): item for item in ctx.traffic.watchlist}
+
+    def run() -> None:
+        for alert in alerts:
+            build_map_event(alert, ctx.now_ts, {}, watch_by_address)
+
+    result = measure(run, ops=len(alerts), repeat=ctx.repeat)
+    result["unit"] = "alert"
+    return result
+
+
+@benchmark("dashboard_snapshot")
+def bench_dashboard_snapshot(ctx: BenchContext) -> Dict[str, Any]:
+    state = DashboardState(watchlist=list(ctx.traffic.watchlist))
+    for alert in ctx.alerts:
+        state.ingest_alert(alert)
+    calls = 20 * max(1, ctx.repeat)
+
+    def run() -> None:
+        for _ in range(calls):
+            state.snapshot()
+
+    result = measure(run, ops=calls, repeat=ctx.repeat)
+    result["unit"] = "snapshot"
+    return result
+
+
+@benchmark("extract_wallet_balance_summary")
+def bench_balances(ctx: BenchContext) -> Dict[str, Any]:
+    rows = sum(len(row["items"]) for payload in ctx.balance_payloads for row in payload)
+
+    def run() -> None:
+        for payload in ctx.balance_payloads:
+            extract_wallet_balance_summary(payload)
+
+    result = measure(run, ops=rows, repeat=ctx.repeat)
+    result["unit"] = "balance_row"
+    return result
+
+
+@benchmark("dedupe_store")
+def bench_dedupe(ctx: BenchContext) -> Dict[str, Any]:
+    keys = [alert.dedupe_key for alert in ctx.alerts[: ctx.scale["dedupe_keys"]]]
+
+    def run() -> None:
+        store = DedupeStore(ctx.workdir / f"dedupe-{time.perf_counter_ns()}.sqlite3")
+        try:
+            for key in keys:
+                if not store.has_seen(key):
+                    store.mark_seen(key)
+        finally:
+            store.close()
+
+    result = measure(run, ops=len(keys), repeat=ctx.repeat)
+    result["unit"] = "key"
+    return result
+
+
+@benchmark("dedupe_store_batched")
+def bench_dedupe_batched(ctx: BenchContext) -> Dict[str, Any]:
+    keys = [alert.dedupe_key for alert in ctx.alerts[: ctx.scale["dedupe_keys"]]]
+
+    def run() -> None:
+        store = DedupeStore(ctx.workdir / f"dedupe-{time.perf_counter_ns()}.sqlite3")
+        try:
+            store.mark_seen_many(store.filter_unseen(keys))
+        finally:
+            store.close()
+
+    result = measure(run, ops=len(keys), repeat=ctx.repeat)
+    result["unit"] = "key"
+    return result
+
+
+@benchmark("dedupe_filter_unseen")
+def bench_dedupe_filter_unseen(ctx: BenchContext) -> Dict[str, Any]:
+    # Warm store with half of the keys seen, as after a restart mid-window.
+    keys = [alert.dedupe_key for alert in ctx.alerts[: ctx.scale["dedupe_keys"]]]
+    store = DedupeStore(ctx.workdir / f"filter-{time.perf_counter_ns()}.sqlite3", lru_size=len(keys) // 4)
+    store.mark_seen_many(keys[::2])
+    calls = 10
+
+    def run() -> None:
+        for _ in range(calls):
+            store.filter_unseen(keys)
+
+    try:
+        result = measure(run, ops=len(keys) * calls, repeat=ctx.repeat)
+        result["cache"] = store.cache_stats()
+    finally:
+        store.close()
+    result["unit"] = "key"
+    return result
+
+
+@benchmark("alert_burst")
+def bench_alert_burst(ctx: BenchContext) -> Dict[str, Any]:
+    # One cycle in which every transfer clears the threshold: ops/s is alerts/s.
+    source = ctx.transactions
+    burst = [
+        replace(source[index % len(source)], tx_id=f"burst-{index}", usd_value=1_000_000.0, timestamp=ctx.now_ts)
+        for index in range(ALERT_BURST)
+    ]
+
+    def run() -> None:
+        store = DedupeStore(ctx.workdir / f"burst-{time.perf_counter_ns()}.sqlite3")
+        try:
+            cycle = ctx.poller(store)._process_transactions(burst)
+        finally:
+            store.close()
+        if cycle["alerts_sent"] != len(burst):
+            raise RuntimeError(f"alert_burst sent {cycle['alerts_sent']} of {len(burst)} alerts")
+
+    result = measure(run, ops=len(burst), repeat=ctx.repeat)
+    result["unit"] = "alert"
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+            check=False,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    value = completed.stdout.strip()
+    return value or None
+
+
+def run_benchmarks(
+    seed: int = 7,
+    scale_name: str = "default",
+    only: Optional[Sequence[str]] = None,
+    payloads_path: Optional[Path] = None,
+) -> Dict[str, Any]:
+    scale = SCALES[scale_name]
+    selected = [name for name in BENCHMARKS if not only or name in only]
+    recorded = list(read_payloads(payloads_path)) if payloads_path else None
+    results: Dict[str, Any] = {}
+    with TemporaryDirectory(prefix="pequod-bench-") as tmp:
+        ctx = BenchContext(seed=seed, scale=scale, workdir=Path(tmp), recorded_payloads=recorded)
+        for name in selected:
+            results[name] = BENCHMARKS[name](ctx)
+    return {
+        "meta": {
+            "created_at": int(time.time()),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "scale": scale_name,
+            "wallets": len(ctx.traffic.watchlist),
+            "payloads": str(payloads_path) if payloads_path else "synthetic",
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    lines: List[str] = []
+    base_results = baseline.get("results", {})
+    for name, row in current.get("results", {}).items():
+        metric, suffix = ("bytes_per_op", "B/op ") if "bytes_per_op" in row else ("ops_per_second", "ops/s")
+        previous = base_results.get(name)
+        if not isinstance(previous, dict) or not previous.get(metric):
+            lines.append(f"{name:<32} {row[metric]:>14,.0f} {suffix}  (new)")
+            continue
+        change = (row[metric] / previous[metric] - 1.0) * 100.0
+        lines.append(f"{name:<32} {row[metric]:>14,.0f} {suffix}  {change:+7.1f}%")
+    return lines
+
+
+def describe(name: str, row: Dict[str, Any]) -> str:
+    if "bytes_per_op" in row:
+        return f"{name:<32} {row['bytes_per_op']:>14,.0f} B/{row['unit']}  (peak {row['peak_bytes']:,} B)"
+    return f"{name:<32} {row['ops_per_second']:>14,.0f} ops/s  {row['us_per_op']:>10.3f} us/{row['unit']}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Run hot-path micro-benchmarks against seeded synthetic Allium traffic.",
+    )
+    parser.add_argument("--output", default=None, help="Write results JSON to this path")
+    parser.add_argument("--compare", default=None, help="Previous results JSON to compare ops/s against")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="default")
+    parser.add_argument("--payloads", default=None, help="Recorded wallet/transactions JSONL instead of synthetic traffic")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="Run only this benchmark (repeatable)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        seed=args.seed,
+        scale_name=args.scale,
+        only=args.only,
+        payloads_path=Path(args.payloads) if args.payloads else None,
+    )
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print(f"Compared with {baseline.get('meta', {}).get('git_commit') or args.compare}:")
+        print("\n".join(compare(report, baseline)))
+    else:
+        for name, row in report["results"].items():
+            print(describe(name, row))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
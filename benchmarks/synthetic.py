@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import List, Optional
+
+from tests.synthetic import SyntheticTraffic
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.synthetic",
+        description="Write synthetic wallet/transactions payloads as JSONL (input for `python -m pequod replay`).",
+    )
+    parser.add_argument("output", help="JSONL path to write")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--wallets", type=int, default=2000)
+    parser.add_argument("--cycles", type=int, default=5, help="Payload lines to write")
+    parser.add_argument("--batch-size", type=int, default=20, help="Wallets per payload, like one API call")
+    parser.add_argument("--prices-output", default=None, help="Also write a price map for --prices")
+    args = parser.parse_args(argv)
+
+    traffic = SyntheticTraffic(seed=args.seed, wallets=args.wallets)
+    with Path(args.output).open("w", encoding="utf-8") as handle:
+        for _ in range(args.cycles):
+            for start in range(0, len(traffic.watchlist), args.batch_size):
+                batch = traffic.watchlist[start : start + args.batch_size]
+                handle.write(json.dumps(traffic.wallet_transactions_payload(batch)) + "\n")
+    if args.prices_output:
+        Path(args.prices_output).write_text(json.dumps(traffic.prices(), indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -679,6 +679,10 @@ function renderStats(snapshot) {
   ).toLocaleString();
   const missRate = Number(snapshot.price_miss_rate ?? metrics.price_miss_rate ?? 0);
   document.getElementById("stat-price-miss-rate").textContent = `${(missRate * 100).toFixed(1)}%`;
+  const dedupeStore = metrics.dedupe_store || {};
+  document.getElementById("stat-dedupe-rows").textContent = Number(dedupeStore.rows ?? 0).toLocaleString();
+  const dedupeBytes = Number(dedupeStore.db_bytes ?? 0) + Number(dedupeStore.wal_bytes ?? 0);
+  document.getElementById("stat-dedupe-size").textContent = dedupeBytes ? `${(dedupeBytes / 1048576).toFixed(1)} MB` : "-";
 }
 
 function renderSeaState(seaState) {
@@ -1659,6 +1663,7 @@ function mountControls(snapshot) {
   minUsdEl.value = String(filters.min_usd || 0);
   minUsdValueEl.textContent = formatUsd(Number(filters.min_usd || 0));
 
+  windowSecondsEl.max = String(meta.max_window_seconds || 86400);
   windowSecondsEl.value = String(filters.window_seconds || 3600);
   windowSecondsValueEl.textContent = formatDuration(Number(windowSecondsEl.value || 3600));
 
@@ -3,8 +3,13 @@ from __future__ import annotations
 import argparse
 import os
 
+from .backfill import main as run_backfill
 from .dashboard import run_dashboard
 from .main import main as run_poller
+from .replay import main as run_replay
+
+SERVICE_MODES = ("dashboard", "poller")
+TOOL_MODES = ("backfill", "replay")
 
 
 def cli() -> int:
@@ -16,12 +21,23 @@ def cli() -> int:
     parser.add_argument(
         "mode",
         nargs="?",
-        choices=["dashboard", "poller"],
-        default=default_mode if default_mode in {"dashboard", "poller"} else "dashboard",
-        help="dashboard = frontend + API + poller, poller = alert service only",
+        choices=[*SERVICE_MODES, *TOOL_MODES],
+        default=default_mode if default_mode in SERVICE_MODES else "dashboard",
+        help=(
+            "dashboard = frontend + API + poller, poller = alert service only, "
+            "backfill = seed dedupe/history for a past window, "
+            "replay = offline throughput run over recorded payloads (see `<mode> --help`)"
+        ),
     )
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
     args = parser.parse_args()
 
+    if args.mode == "backfill":
+        return run_backfill(args.args)
+    if args.mode == "replay":
+        return run_replay(args.args)
+    if args.args:
+        parser.error(f"unrecognized arguments: {' '.join(args.args)}")
     if args.mode == "dashboard":
         return run_dashboard()
     return run_poller()
@@ -29,4 +45,3 @@ def cli() -> int:
 
 if __name__ == "__main__":
     raise SystemExit(cli())
-
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import hashlib
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 from urllib.parse import urlencode
 
+from .fingerprint import fingerprint
 from .types import Alert, NormalizedTransaction, WatchAddress
 
 
@@ -69,16 +69,11 @@ def _dedupe_suffix(tx: NormalizedTransaction) -> str:
     transfer_index = tx.raw.get("asset_transfer_index")
     if isinstance(transfer_index, int):
         return str(transfer_index)
-    material = "|".join(
-        [
-            tx.from_address or "",
-            tx.to_address or "",
-            tx.token_address or "",
-            str(tx.amount) if tx.amount is not None else "",
-            tx.watch_address or "",
-        ]
-    )
-    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:12]
+    return fingerprint(tx.from_address, tx.to_address, tx.token_address, tx.amount, tx.watch_address)
+
+
+def alert_dedupe_key(tx: NormalizedTransaction) -> str:
+    return f"{tx.chain}:{tx.tx_id}:{tx.tx_type}:{_dedupe_suffix(tx)}"
 
 
 def _dashboard_link(
@@ -109,6 +104,7 @@ def build_alert(
     score_breakdown: Optional[Dict[str, float]] = None,
     entities: Optional[Dict[str, Dict[str, Any]]] = None,
     dashboard_base_url: str = "",
+    dedupe_key: Optional[str] = None,
 ) -> Alert:
     from_label = label_by_address.get((tx.from_address or "").lower())
     to_label = label_by_address.get((tx.to_address or "").lower())
@@ -119,7 +115,7 @@ def build_alert(
     amount_text = _format_amount(tx.amount, tx.token_symbol)
     tx_link_id = _short_addr(tx.tx_id)
 
-    dedupe_key = f"{tx.chain}:{tx.tx_id}:{tx.tx_type}:{_dedupe_suffix(tx)}"
+    dedupe_key = dedupe_key or alert_dedupe_key(tx)
     deep_link = _dashboard_link(
         dashboard_base_url=dashboard_base_url,
         dedupe_key=dedupe_key,
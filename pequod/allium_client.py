@@ -6,8 +6,11 @@ import time
 import urllib.error
 import urllib.request
 from dataclasses import dataclass
+from urllib.parse import urlencode
 from typing import Any, Dict, List, Optional
 
+from .tracing import span
+
 
 class AlliumError(RuntimeError):
     pass
@@ -22,10 +25,17 @@ class PriceQuote:
 
 
 class AlliumClient:
-    def __init__(self, base_url: str, api_key: str, timeout_seconds: int = 20) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        timeout_seconds: int = 20,
+        min_request_interval_seconds: float = 1.0,
+    ) -> None:
         self._base_url = base_url.rstrip("/")
         self._api_key = api_key
         self._timeout_seconds = timeout_seconds
+        self._min_request_interval_seconds = max(0.0, float(min_request_interval_seconds))
         self._lock = threading.Lock()
         self._last_request_at = 0.0
         self._price_cache: Dict[str, tuple[float, float, Optional[str]]] = {}
@@ -33,12 +43,16 @@ class AlliumClient:
     def _rate_limit(self) -> None:
         with self._lock:
             now = time.monotonic()
-            wait_for = 1.0 - (now - self._last_request_at)
+            wait_for = self._min_request_interval_seconds - (now - self._last_request_at)
             if wait_for > 0:
                 time.sleep(wait_for)
             self._last_request_at = time.monotonic()
 
     def _request(self, method: str, path: str, payload: Optional[Any] = None) -> Any:
+        with span("allium.request", method=method, path=path.split("?", 1)[0]):
+            return self._request_once(method, path, payload)
+
+    def _request_once(self, method: str, path: str, payload: Optional[Any] = None) -> Any:
         self._rate_limit()
         url = f"{self._base_url}{path}"
         data = None
@@ -62,8 +76,11 @@ class AlliumClient:
         except urllib.error.URLError as exc:
             raise AlliumError(f"Allium request failed: {exc}") from exc
 
-    def wallet_transactions(self, addresses: List[Dict[str, str]]) -> Any:
-        return self._request("POST", "/api/v1/developer/wallet/transactions", payload=addresses)
+    def wallet_transactions(self, addresses: List[Dict[str, str]], cursor: Optional[str] = None) -> Any:
+        path = "/api/v1/developer/wallet/transactions"
+        if cursor:
+            path = f"{path}?{urlencode({'cursor': cursor})}"
+        return self._request("POST", path, payload=addresses)
 
     def wallet_balances(self, addresses: List[Dict[str, str]]) -> Any:
         return self._request("POST", "/api/v1/developer/wallet/balances", payload=addresses)
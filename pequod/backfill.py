@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from .allium_client import AlliumClient, AlliumError
+from .config import Settings, load_settings
+from .dashboard_state import DashboardSink, DashboardState
+from .dedupe import DedupeStore
+from .history import HistoryStore
+from .poller import WhalePoller
+from .sinks import AlertLogSink, AlertSink, MultiSink
+from .tx_extractors import normalize_transactions
+from .types import NormalizedTransaction, WatchAddress
+from .utils import chunked, parse_timestamp
+from .watchlist import load_watchlist
+
+LOG = logging.getLogger(__name__)
+
+
+def _next_cursor(payload: Any) -> Optional[str]:
+    if not isinstance(payload, dict):
+        return None
+    for key in ("cursor", "next_cursor", "next"):
+        value = payload.get(key)
+        if isinstance(value, str) and value:
+            return value
+    return None
+
+
+def _batch_key(batch: Sequence[Dict[str, str]]) -> str:
+    return ",".join(sorted(f"{item['chain']}:{item['address'].lower()}" for item in batch))
+
+
+class BackfillCheckpoint:
+    def __init__(self, path: Path, since: int, until: int) -> None:
+        self._path = path
+        self._since = since
+        self._until = until
+        self._lock = threading.Lock()
+        self._completed: Set[str] = set()
+        self._load()
+
+    def _load(self) -> None:
+        if not self._path.exists():
+            return
+        try:
+            payload = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            LOG.warning("Ignoring unreadable backfill checkpoint %s: %s", self._path, exc)
+            return
+        if not isinstance(payload, dict):
+            return
+        if payload.get("since") != self._since or payload.get("until") != self._until:
+            LOG.info("Checkpoint %s is for a different window; starting fresh.", self._path)
+            return
+        completed = payload.get("completed_batches")
+        if isinstance(completed, list):
+            self._completed = {str(item) for item in completed}
+
+    def is_done(self, key: str) -> bool:
+        with self._lock:
+            return key in self._completed
+
+    def mark_done(self, key: str) -> None:
+        with self._lock:
+            self._completed.add(key)
+            payload = {
+                "since": self._since,
+                "until": self._until,
+                "completed_batches": sorted(self._completed),
+                "updated_at": int(time.time()),
+            }
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(self._path.suffix + ".tmp")
+            tmp_path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            tmp_path.replace(self._path)
+
+    @property
+    def completed_count(self) -> int:
+        with self._lock:
+            return len(self._completed)
+
+
+class Backfiller:
+    def __init__(
+        self,
+        client: AlliumClient,
+        poller: WhalePoller,
+        watchlist: List[WatchAddress],
+        checkpoint: BackfillCheckpoint,
+        since: int,
+        until: int,
+        batch_size: int,
+        workers: int,
+        max_pages: int,
+    ) -> None:
+        self._client = client
+        self._poller = poller
+        self._watchlist = watchlist
+        self._checkpoint = checkpoint
+        self._since = since
+        self._until = until
+        self._batch_size = max(1, min(20, batch_size))
+        self._workers = max(1, workers)
+        self._max_pages = max(1, max_pages)
+        self._address_to_chain = {item.address.lower(): item.chain for item in watchlist}
+        self._process_lock = threading.Lock()
+        self.totals: Dict[str, int] = {"batches": 0, "pages": 0, "events": 0, "alerts": 0, "failed_batches": 0}
+
+    def _fetch_batch(self, batch: List[Dict[str, str]]) -> List[NormalizedTransaction]:
+        collected: List[NormalizedTransaction] = []
+        cursor: Optional[str] = None
+        for _ in range(self._max_pages):
+            raw = self._client.wallet_transactions(batch, cursor=cursor)
+            page = normalize_transactions(raw, self._address_to_chain)
+            with self._process_lock:
+                self.totals["pages"] += 1
+            collected.extend(tx for tx in page if tx.timestamp is None or self._since <= tx.timestamp <= self._until)
+            oldest = min((tx.timestamp for tx in page if tx.timestamp is not None), default=None)
+            cursor = _next_cursor(raw)
+            if cursor is None or oldest is None or oldest < self._since:
+                break
+        collected.sort(key=lambda tx: tx.timestamp or 0)
+        return collected
+
+    def _run_batch(self, batch: List[Dict[str, str]]) -> None:
+        key = _batch_key(batch)
+        transactions = self._fetch_batch(batch)
+        with self._process_lock:
+            cycle = self._poller._process_transactions(transactions, event_time=True)
+            self.totals["batches"] += 1
+            self.totals["events"] += int(cycle.get("events_ingested", 0))
+            self.totals["alerts"] += int(cycle.get("alerts_sent", 0))
+        self._checkpoint.mark_done(key)
+
+    def run(self) -> Dict[str, int]:
+        payload_addresses = [{"chain": item.chain, "address": item.address} for item in self._watchlist]
+        pending = [
+            batch
+            for batch in chunked(payload_addresses, self._batch_size)
+            if not self._checkpoint.is_done(_batch_key(batch))
+        ]
+        LOG.info(
+            "Backfilling %d address batches (%d already checkpointed) with %d workers.",
+            len(pending),
+            self._checkpoint.completed_count,
+            self._workers,
+        )
+        with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="pequod-backfill") as pool:
+            futures = {pool.submit(self._run_batch, batch): batch for batch in pending}
+            for future in as_completed(futures):
+                # A failed batch is never marked done, so the checkpoint only lists
+                # batches whose alerts were flushed and the next run retries the rest.
+                try:
+                    future.result()
+                except AlliumError as exc:
+                    self.totals["failed_batches"] += 1
+                    LOG.error("Backfill batch of %d addresses failed: %s", len(futures[future]), exc)
+                except Exception:
+                    self.totals["failed_batches"] += 1
+                    LOG.exception("Backfill batch of %d addresses failed unexpectedly.", len(futures[future]))
+        return dict(self.totals)
+
+
+def _parse_bound(value: Optional[str], default: int) -> int:
+    if value is None:
+        return default
+    parsed = parse_timestamp(value)
+    if parsed is None:
+        raise ValueError(f"Unrecognized timestamp: {value!r} (use ISO-8601 or unix seconds)")
+    return parsed
+
+
+def build_backfiller(settings: Settings, args: argparse.Namespace) -> Backfiller:
+    now_ts = int(time.time())
+    since = _parse_bound(args.since, now_ts)
+    until = _parse_bound(args.until, now_ts)
+    if since >= until:
+        raise ValueError("--since must be earlier than --until")
+
+    watchlist = load_watchlist(settings.watchlist_path)
+    if not watchlist:
+        raise ValueError(f"Watchlist is empty: {settings.watchlist_path}")
+    client = AlliumClient(
+        base_url=settings.allium_base_url,
+        api_key=settings.allium_api_key,
+        timeout_seconds=settings.http_timeout_seconds,
+        min_request_interval_seconds=args.min_request_interval,
+    )
+    sinks: List[AlertSink] = [AlertLogSink(Path(args.history_path))]
+    if settings.history_db_path:
+        # Backfilled alerts also land in the dashboard's persisted history, built
+        # into rows the same way the dashboard builds live ones.
+        history = HistoryStore(settings.history_db_path, retention_seconds=settings.history_retention_seconds)
+        state = DashboardState(watchlist, history=history, max_history_seconds=settings.history_retention_seconds)
+        sinks.append(DashboardSink(state))
+    poller = WhalePoller(
+        client=client,
+        watchlist=list(watchlist),
+        dedupe_store=DedupeStore(
+            settings.dedupe_db_path,
+            bloom_capacity=settings.dedupe_bloom_capacity,
+            lru_size=settings.dedupe_lru_size,
+        ),
+        sink=MultiSink(sinks),
+        min_alert_usd=settings.min_alert_usd,
+        max_addresses_per_request=settings.max_addresses_per_request,
+        poll_interval_seconds=settings.poll_interval_seconds,
+        lookback_seconds=now_ts - since + 1,
+        dashboard_base_url=settings.dashboard_base_url,
+    )
+    return Backfiller(
+        client=client,
+        poller=poller,
+        watchlist=watchlist,
+        checkpoint=BackfillCheckpoint(Path(args.checkpoint), since=since, until=until),
+        since=since,
+        until=until,
+        batch_size=settings.max_addresses_per_request,
+        workers=args.workers,
+        max_pages=args.max_pages,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(
+        prog="python -m pequod backfill",
+        description="Seed dedupe and alert history from historical wallet transactions without alerting live sinks.",
+    )
+    parser.add_argument("--since", required=True, help="Window start (ISO-8601 or unix seconds)")
+    parser.add_argument("--until", default=None, help="Window end (ISO-8601 or unix seconds, default now)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent address batches")
+    parser.add_argument("--max-pages", type=int, default=50, help="Page limit per address batch")
+    parser.add_argument(
+        "--min-request-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between Allium requests across all workers (rate budget)",
+    )
+    parser.add_argument("--checkpoint", default="data/backfill_checkpoint.json", help="Resume checkpoint file")
+    parser.add_argument("--history-path", default="data/backfill_alerts.jsonl", help="Where backfilled alerts are written")
+    args = parser.parse_args(argv)
+
+    try:
+        settings = load_settings()
+        backfiller = build_backfiller(settings, args)
+    except Exception as exc:
+        LOG.error("Backfill setup failed: %s", exc)
+        return 1
+    totals = backfiller.run()
+    LOG.info(
+        "Backfill finished: %d batches, %d pages, %d events, %d alerts recorded, %d failed batches.",
+        totals["batches"],
+        totals["pages"],
+        totals["events"],
+        totals["alerts"],
+        totals["failed_batches"],
+    )
+    return 0 if totals["failed_batches"] == 0 else 2
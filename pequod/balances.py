@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from .utils import to_float
+from .parsing import to_float
 
 MAX_REASONABLE_TOKEN_USD = 100_000_000_000.0
 MIN_TRACKED_TOKEN_USD = 0.01
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from .types import NormalizedTransaction
+
+TS_MISSING = -(2**63)
+NO_INDEX = -1
+
+
+# Columnar view of one poll cycle's transfers. Filtering columns live in flat
+# arrays; a row's NormalizedTransaction is only built by materialize(), for rows
+# that survive the watermark, price and threshold masks.
+class CycleBatch:
+    __slots__ = (
+        "usd_values",
+        "has_usd",
+        "amounts",
+        "has_amount",
+        "timestamps",
+        "token_index",
+        "watch_index",
+        "tokens",
+        "watches",
+        "_token_ids",
+        "_watch_ids",
+        "_rows",
+    )
+
+    def __init__(self) -> None:
+        self.usd_values = array("d")
+        self.has_usd = bytearray()
+        self.amounts = array("d")
+        self.has_amount = bytearray()
+        self.timestamps = array("q")
+        self.token_index = array("l")
+        self.watch_index = array("l")
+        self.tokens: List[Tuple[str, str]] = []
+        self.watches: List[str] = []
+        self._token_ids: Dict[Tuple[str, str], int] = {}
+        self._watch_ids: Dict[str, int] = {}
+        self._rows: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def append(
+        self,
+        row: Any,
+        chain: str,
+        usd_value: Optional[float],
+        amount: Optional[float],
+        token_address: Optional[str],
+        timestamp: Optional[int],
+        watch_address: Optional[str],
+    ) -> None:
+        self.usd_values.append(usd_value if usd_value is not None else math.nan)
+        self.has_usd.append(usd_value is not None)
+        self.amounts.append(amount if amount is not None else math.nan)
+        self.has_amount.append(amount is not None)
+        self.timestamps.append(timestamp if timestamp is not None else TS_MISSING)
+
+        token_id = NO_INDEX
+        if token_address is not None:
+            key = (chain.lower(), token_address.lower())
+            token_id = self._token_ids.get(key, NO_INDEX)
+            if token_id == NO_INDEX:
+                token_id = len(self.tokens)
+                self._token_ids[key] = token_id
+                self.tokens.append(key)
+        self.token_index.append(token_id)
+
+        watch_id = NO_INDEX
+        if watch_address:
+            watch_key = watch_address.lower()
+            watch_id = self._watch_ids.get(watch_key, NO_INDEX)
+            if watch_id == NO_INDEX:
+                watch_id = len(self.watches)
+                self._watch_ids[watch_key] = watch_id
+                self.watches.append(watch_key)
+        self.watch_index.append(watch_id)
+        self._rows.append(row)
+
+    def append_transaction(self, tx: NormalizedTransaction) -> None:
+        self.append(tx, tx.chain, tx.usd_value, tx.amount, tx.token_address, tx.timestamp, tx.watch_address)
+
+    @classmethod
+    def from_transactions(cls, transactions: List[NormalizedTransaction]) -> "CycleBatch":
+        batch = cls()
+        for tx in transactions:
+            batch.append_transaction(tx)
+        return batch
+
+    def materialize(self, index: int) -> NormalizedTransaction:
+        row = self._rows[index]
+        if isinstance(row, NormalizedTransaction):
+            return row
+        tx = row.build()
+        self._rows[index] = tx
+        return tx
+
+    def transactions(self) -> List[NormalizedTransaction]:
+        return [self.materialize(index) for index in range(len(self._rows))]
@@ -50,16 +50,29 @@ class Settings:
     allium_api_key: str
     allium_base_url: str
     watchlist_path: Path
+    watchlist_reload: bool
     poll_interval_seconds: int
     min_alert_usd: float
     lookback_seconds: int
     http_timeout_seconds: int
     max_addresses_per_request: int
     dedupe_db_path: Path
+    dedupe_bloom_capacity: int
+    dedupe_lru_size: int
+    dedupe_retention_seconds: int
+    dedupe_compact_interval_seconds: int
     telegram_bot_token: str
     telegram_chat_id: str
+    telegram_rate_per_minute: float
     discord_webhook_url: str
+    discord_rate_per_minute: float
     generic_webhook_url: str
+    sink_queue_size: int
+    sink_overflow: str
+    sink_spill_dir: Path
+    outbox_db_path: Optional[Path]
+    outbox_max_attempts: int
+    outbox_max_backoff_seconds: int
     run_once: bool
     dashboard_host: str
     dashboard_port: int
@@ -73,6 +86,16 @@ class Settings:
     geo_bootstrap_max_addresses: int
     dashboard_max_alerts: int
     dashboard_max_events: int
+    history_db_path: Optional[Path]
+    history_retention_seconds: int
+    profile_cycles: int
+    profile_dir: Path
+    trace_enabled: bool
+    trace_path: Path
+    trace_max_bytes: int
+    raw_retention: str
+    raw_blob_dir: Path
+    raw_blob_max: int
 
 
 def load_settings(dotenv_path: str = ".env") -> Settings:
@@ -97,20 +120,36 @@ def load_settings(dotenv_path: str = ".env") -> Settings:
         f"http://{default_base_host}:{dashboard_port}",
     ).rstrip("/")
 
+    history_db = _to_str(env_values, "PEQUOD_HISTORY_DB_PATH", "data/history.sqlite3").strip()
+    outbox_db = _to_str(env_values, "PEQUOD_OUTBOX_DB_PATH", "data/outbox.sqlite3").strip()
+
     return Settings(
         allium_api_key=api_key,
         allium_base_url=_to_str(env_values, "ALLIUM_BASE_URL", "https://api.allium.so").rstrip("/"),
         watchlist_path=Path(_to_str(env_values, "PEQUOD_WATCHLIST_PATH", "watchlists/default.json")),
+        watchlist_reload=_to_bool(env_values, "PEQUOD_WATCHLIST_RELOAD", True),
         poll_interval_seconds=_to_int(env_values, "PEQUOD_POLL_INTERVAL_SECONDS", 30),
         min_alert_usd=_to_float(env_values, "PEQUOD_MIN_ALERT_USD", 10_000),
         lookback_seconds=_to_int(env_values, "PEQUOD_LOOKBACK_SECONDS", 180),
         http_timeout_seconds=_to_int(env_values, "PEQUOD_HTTP_TIMEOUT_SECONDS", 20),
         max_addresses_per_request=_to_int(env_values, "PEQUOD_MAX_ADDRESSES_PER_REQUEST", 20),
         dedupe_db_path=Path(_to_str(env_values, "PEQUOD_DEDUPE_DB_PATH", "data/alerts.sqlite3")),
+        dedupe_bloom_capacity=_to_int(env_values, "PEQUOD_DEDUPE_BLOOM_CAPACITY", 200_000),
+        dedupe_lru_size=_to_int(env_values, "PEQUOD_DEDUPE_LRU_SIZE", 10_000),
+        dedupe_retention_seconds=_to_int(env_values, "PEQUOD_DEDUPE_RETENTION_SECONDS", 7 * 86_400),
+        dedupe_compact_interval_seconds=_to_int(env_values, "PEQUOD_DEDUPE_COMPACT_INTERVAL_SECONDS", 600),
         telegram_bot_token=_to_str(env_values, "PEQUOD_TELEGRAM_BOT_TOKEN"),
         telegram_chat_id=_to_str(env_values, "PEQUOD_TELEGRAM_CHAT_ID"),
+        telegram_rate_per_minute=_to_float(env_values, "PEQUOD_TELEGRAM_RATE_PER_MINUTE", 20.0),
         discord_webhook_url=_to_str(env_values, "PEQUOD_DISCORD_WEBHOOK_URL"),
+        discord_rate_per_minute=_to_float(env_values, "PEQUOD_DISCORD_RATE_PER_MINUTE", 30.0),
         generic_webhook_url=_to_str(env_values, "PEQUOD_GENERIC_WEBHOOK_URL"),
+        sink_queue_size=_to_int(env_values, "PEQUOD_SINK_QUEUE_SIZE", 1000),
+        sink_overflow=_to_str(env_values, "PEQUOD_SINK_OVERFLOW", "block").strip().lower(),
+        sink_spill_dir=Path(_to_str(env_values, "PEQUOD_SINK_SPILL_DIR", "data/sink_spill")),
+        outbox_db_path=Path(outbox_db) if outbox_db else None,
+        outbox_max_attempts=_to_int(env_values, "PEQUOD_OUTBOX_MAX_ATTEMPTS", 0),
+        outbox_max_backoff_seconds=_to_int(env_values, "PEQUOD_OUTBOX_MAX_BACKOFF_SECONDS", 300),
         run_once=_to_bool(env_values, "PEQUOD_RUN_ONCE", False),
         dashboard_host=dashboard_host,
         dashboard_port=dashboard_port,
@@ -124,4 +163,14 @@ def load_settings(dotenv_path: str = ".env") -> Settings:
         geo_bootstrap_max_addresses=_to_int(env_values, "PEQUOD_GEO_BOOTSTRAP_MAX_ADDRESSES", 300),
         dashboard_max_alerts=_to_int(env_values, "PEQUOD_DASHBOARD_MAX_ALERTS", 300),
         dashboard_max_events=_to_int(env_values, "PEQUOD_DASHBOARD_MAX_EVENTS", 1500),
+        history_db_path=Path(history_db) if history_db else None,
+        history_retention_seconds=_to_int(env_values, "PEQUOD_HISTORY_RETENTION_SECONDS", 7 * 86_400),
+        profile_cycles=_to_int(env_values, "PEQUOD_PROFILE_CYCLES", 0),
+        profile_dir=Path(_to_str(env_values, "PEQUOD_PROFILE_DIR", "data/profiles")),
+        trace_enabled=_to_bool(env_values, "PEQUOD_TRACE_ENABLED", False),
+        trace_path=Path(_to_str(env_values, "PEQUOD_TRACE_PATH", "data/traces.jsonl")),
+        trace_max_bytes=_to_int(env_values, "PEQUOD_TRACE_MAX_BYTES", 10_000_000),
+        raw_retention=_to_str(env_values, "PEQUOD_RAW_RETENTION", "auto").strip().lower(),
+        raw_blob_dir=Path(_to_str(env_values, "PEQUOD_RAW_BLOB_DIR", "data/raw_blobs")),
+        raw_blob_max=_to_int(env_values, "PEQUOD_RAW_BLOB_MAX", 20_000),
     )
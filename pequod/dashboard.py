@@ -9,19 +9,24 @@ from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from typing import Any, Dict, List, Optional
-from urllib.parse import urlparse
+from urllib.parse import parse_qs, urlparse
 
 from .allium_client import AlliumClient, AlliumError
 from .config import Settings, load_settings
 from .dashboard_state import DashboardSink, DashboardState
-from .dedupe import DedupeStore
+from .dedupe import DedupeCompactor, DedupeStore
 from .geo import GeoResolver
+from .history import HistoryStore
+from .metrics import PROMETHEUS_CONTENT_TYPE, PrometheusWriter
 from .poller import WhalePoller
+from .profiler import CycleProfiler
+from .raw_store import build_raw_retention
 from .sinks import MultiSink
+from .tracing import TRACER
 from .types import WatchAddress
 from .balances import extract_wallet_balance_summary
 from .utils import chunked
-from .watchlist import load_watchlist
+from .watchlist import WatchlistWatcher, load_watchlist
 
 LOG = logging.getLogger(__name__)
 
@@ -29,12 +34,27 @@ LOG = logging.getLogger(__name__)
 class DashboardRuntime:
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
+        TRACER.configure(
+            enabled=settings.trace_enabled,
+            output_path=settings.trace_path,
+            max_bytes=settings.trace_max_bytes,
+        )
+        # Built first so a bad PEQUOD_RAW_RETENTION fails before any network or disk setup.
+        raw_retention = build_raw_retention(
+            settings.raw_retention,
+            DashboardSink.requires_raw,
+            settings.raw_blob_dir,
+            max_blobs=settings.raw_blob_max,
+        )
         self.client = AlliumClient(
             base_url=settings.allium_base_url,
             api_key=settings.allium_api_key,
             timeout_seconds=settings.http_timeout_seconds,
         )
         watchlist = load_watchlist(settings.watchlist_path)
+        self.watchlist_watcher: Optional[WatchlistWatcher] = None
+        if settings.watchlist_reload:
+            self.watchlist_watcher = WatchlistWatcher(settings.watchlist_path, watchlist)
         self.geo = GeoResolver(
             client=self.client,
             cache_path=settings.geo_cache_path,
@@ -43,13 +63,32 @@ class DashboardRuntime:
         if settings.geo_bootstrap_max_addresses > 0:
             watchlist = self._merge_geo_bootstrap(watchlist, settings.geo_bootstrap_max_addresses)
         self.watchlist = watchlist
+        self.history = (
+            HistoryStore(settings.history_db_path, retention_seconds=settings.history_retention_seconds)
+            if settings.history_db_path
+            else None
+        )
         self.state = DashboardState(
             watchlist=watchlist,
             max_alerts=settings.dashboard_max_alerts,
             max_events=settings.dashboard_max_events,
+            history=self.history,
+            max_history_seconds=settings.history_retention_seconds,
+        )
+        self.dedupe = DedupeStore(
+            settings.dedupe_db_path,
+            bloom_capacity=settings.dedupe_bloom_capacity,
+            lru_size=settings.dedupe_lru_size,
+        )
+        self.compactor = DedupeCompactor(
+            self.dedupe,
+            retention_seconds=settings.dedupe_retention_seconds,
+            interval_seconds=settings.dedupe_compact_interval_seconds,
         )
-        self.dedupe = DedupeStore(settings.dedupe_db_path)
         self.sink = MultiSink([DashboardSink(self.state)])
+        self.profiler = CycleProfiler(settings.profile_dir)
+        if settings.profile_cycles > 0:
+            self.profiler.arm(settings.profile_cycles)
         self.poller = WhalePoller(
             client=self.client,
             watchlist=self.watchlist,
@@ -64,6 +103,8 @@ class DashboardRuntime:
             discovered_watch_max=settings.discovered_watch_max,
             on_discovered_watch_addresses=self._register_discovered_watch_addresses,
             dashboard_base_url=settings.dashboard_base_url,
+            profiler=self.profiler,
+            raw_retention=raw_retention,
         )
         self._stop_event = threading.Event()
         self._poll_lock = threading.Lock()
@@ -101,10 +142,14 @@ class DashboardRuntime:
         self._poll_thread.start()
         self._geo_thread.start()
         self._balance_thread.start()
+        self.compactor.start()
 
     def stop(self) -> None:
         self._stop_event.set()
+        self.compactor.stop()
         self.dedupe.close()
+        if self.history is not None:
+            self.history.close()
 
     def _poll_loop(self) -> None:
         while not self._stop_event.is_set():
@@ -119,8 +164,27 @@ class DashboardRuntime:
 
     def poll_now(self) -> None:
         with self._poll_lock:
+            self._reload_watchlist()
             self.poller.run_once()
 
+    def _reload_watchlist(self) -> None:
+        if self.watchlist_watcher is None:
+            return
+        diff = self.watchlist_watcher.poll()
+        if diff is None:
+            return
+        self.poller.apply_watchlist_diff(diff)
+        self.state.apply_watchlist_diff(diff)
+        if not diff.added:
+            return
+        try:
+            geo_rows = self.geo.get_geo_for_watchlist(diff.added, force=False)
+        except AlliumError as exc:
+            LOG.warning("Geo lookup for %d reloaded watch addresses failed: %s", len(diff.added), exc)
+            return
+        self.state.update_geo(geo_rows)
+        self._geo_last_refresh_at = int(time.time())
+
     def _geo_loop(self) -> None:
         while not self._stop_event.is_set():
             try:
@@ -186,6 +250,7 @@ class DashboardRuntime:
             "auto_discover_counterparties": self.settings.auto_discover_counterparties,
             "discover_min_usd": self.settings.discover_min_usd,
             "discovered_watch_max": self.settings.discovered_watch_max,
+            "dedupe_retention_seconds": self.settings.dedupe_retention_seconds,
         }
         base["geo_last_refresh_at"] = self._geo_last_refresh_at
         base["balance_last_refresh_at"] = self._balance_last_refresh_at
@@ -196,11 +261,23 @@ class DashboardRuntime:
         base["price_miss_rate"] = metrics.get("price_miss_rate", 0.0)
         base["events_per_min"] = metrics.get("events_per_min", 0)
         base["active_whales_5m"] = metrics.get("active_whales_5m", 0)
+        base["history"] = self.history.stats() if self.history is not None else None
         return base
 
     def set_filters(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         return self.state.set_filters(payload)
 
+    def prometheus_metrics(self) -> str:
+        writer = PrometheusWriter()
+        self.poller.render_prometheus(writer)
+        writer.gauge("pequod_geo_last_refresh_seconds", "Unix time of the last geo refresh.", self._geo_last_refresh_at)
+        writer.gauge(
+            "pequod_balance_last_refresh_seconds",
+            "Unix time of the last wallet balance refresh.",
+            self._balance_last_refresh_at,
+        )
+        return writer.render()
+
 
 class DashboardHandler(BaseHTTPRequestHandler):
     runtime: DashboardRuntime
@@ -217,6 +294,30 @@ class DashboardHandler(BaseHTTPRequestHandler):
         if parsed.path == "/api/health":
             self._json_response({"ok": True, "ts": int(time.time())})
             return
+        if parsed.path == "/api/debug/profiles":
+            profiler = self.runtime.profiler
+            self._json_response({"ok": True, "armed_cycles": profiler.remaining, "profiles": profiler.list_profiles()})
+            return
+        if parsed.path.startswith("/api/debug/profiles/"):
+            target = self.runtime.profiler.profile_path(parsed.path.rsplit("/", 1)[-1])
+            if target is None:
+                self._json_response({"error": "not_found"}, status=HTTPStatus.NOT_FOUND)
+                return
+            self._file_response(target, content_type="application/octet-stream", download_name=target.name)
+            return
+        if parsed.path == "/api/debug/traces":
+            query = parse_qs(parsed.query)
+            try:
+                limit = int(query.get("limit", ["500"])[0])
+                trace_id = int(query["trace_id"][0]) if "trace_id" in query else None
+            except ValueError:
+                self._json_response({"ok": False, "error": "invalid limit or trace_id"}, status=HTTPStatus.BAD_REQUEST)
+                return
+            self._json_response({"ok": True, "enabled": TRACER.enabled, "spans": TRACER.recent(limit=limit, trace_id=trace_id)})
+            return
+        if parsed.path == "/metrics":
+            self._text_response(self.runtime.prometheus_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
+            return
         self._serve_static(parsed.path)
 
     def do_POST(self) -> None:  # noqa: N802
@@ -242,6 +343,14 @@ class DashboardHandler(BaseHTTPRequestHandler):
             except Exception as exc:
                 self._json_response({"ok": False, "error": str(exc)}, status=HTTPStatus.INTERNAL_SERVER_ERROR)
             return
+        if parsed.path == "/api/debug/profile":
+            try:
+                payload = self._read_json_body()
+                armed = self.runtime.profiler.arm(int(payload.get("cycles", 1)))
+                self._json_response({"ok": True, "armed_cycles": armed})
+            except Exception as exc:
+                self._json_response({"ok": False, "error": str(exc)}, status=HTTPStatus.BAD_REQUEST)
+            return
         if parsed.path == "/api/state/filters":
             try:
                 payload = self._read_json_body()
@@ -264,6 +373,15 @@ class DashboardHandler(BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(body)
 
+    def _text_response(self, text: str, content_type: str, status: HTTPStatus = HTTPStatus.OK) -> None:
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def _serve_static(self, raw_path: str) -> None:
         request_path = raw_path or "/"
         if request_path == "/":
@@ -276,10 +394,15 @@ class DashboardHandler(BaseHTTPRequestHandler):
         if not target.exists() or not target.is_file():
             self.send_error(HTTPStatus.NOT_FOUND)
             return
-        data = target.read_bytes()
         ctype, _ = mimetypes.guess_type(str(target))
+        self._file_response(target, content_type=ctype or "application/octet-stream")
+
+    def _file_response(self, target: Path, content_type: str, download_name: Optional[str] = None) -> None:
+        data = target.read_bytes()
         self.send_response(HTTPStatus.OK)
-        self.send_header("Content-Type", ctype or "application/octet-stream")
+        self.send_header("Content-Type", content_type)
+        if download_name:
+            self.send_header("Content-Disposition", f'attachment; filename="{download_name}"')
         self.send_header("Content-Length", str(len(data)))
         self.end_headers()
         self.wfile.write(data)
@@ -304,7 +427,13 @@ class DashboardHandler(BaseHTTPRequestHandler):
 def run_dashboard() -> int:
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     settings = load_settings()
-    runtime = DashboardRuntime(settings)
+    try:
+        runtime = DashboardRuntime(settings)
+    except ValueError as exc:
+        # Same handling as the poller for settings rejected at startup
+        # (e.g. an unknown PEQUOD_RAW_RETENTION).
+        LOG.error("Configuration error: %s", exc)
+        return 1
     runtime.start()
 
     static_root = Path(__file__).resolve().parent.parent / "frontend"
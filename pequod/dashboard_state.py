@@ -3,16 +3,31 @@ from __future__ import annotations
 import threading
 import time
 from collections import deque
-from typing import Any, Deque, Dict, List
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 from .event_engine import build_map_event
+from .history import HistoryStore, row_timestamp
 from .sinks import AlertSink
 from .types import Alert, WatchAddress
+from .watchlist import WatchKey, WatchlistDiff, watch_key
+
+LIVE_HISTORY_SECONDS = 24 * 60 * 60
 
 
 class DashboardState:
-    def __init__(self, watchlist: List[WatchAddress], max_alerts: int = 300, max_events: int = 1500) -> None:
+    def __init__(
+        self,
+        watchlist: List[WatchAddress],
+        max_alerts: int = 300,
+        max_events: int = 1500,
+        history: Optional[HistoryStore] = None,
+        max_history_seconds: int = LIVE_HISTORY_SECONDS,
+    ) -> None:
         self._lock = threading.Lock()
+        self._history = history
+        self._history_pending: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        self._max_history_seconds = max(LIVE_HISTORY_SECONDS, int(max_history_seconds)) if history else LIVE_HISTORY_SECONDS
+        self._watches: Dict[WatchKey, WatchAddress] = {watch_key(w): w for w in watchlist}
         self._watch_by_address: Dict[str, WatchAddress] = {w.address.lower(): w for w in watchlist}
         self._geo_by_address: Dict[str, Dict[str, Any]] = {}
         self._alerts: Deque[Dict[str, Any]] = deque(maxlen=max_alerts)
@@ -31,6 +46,10 @@ class DashboardState:
         }
         self._event_types_seen: set[str] = set()
         self._chains_seen: set[str] = {w.chain.lower() for w in watchlist}
+        if history is not None:
+            event_types, chains = history.distinct_values()
+            self._event_types_seen.update(event_types)
+            self._chains_seen.update(chains)
 
     @staticmethod
     def _default_metric_row() -> Dict[str, Any]:
@@ -57,12 +76,37 @@ class DashboardState:
                 normalized = watch.address.lower()
                 if normalized in self._watch_by_address:
                     continue
+                self._watches[watch_key(watch)] = watch
                 self._watch_by_address[normalized] = watch
                 self._metrics_by_address.setdefault(normalized, self._default_metric_row())
                 self._chains_seen.add(watch.chain.lower())
                 added += 1
         return added
 
+    def apply_watchlist_diff(self, diff: WatchlistDiff) -> None:
+        with self._lock:
+            for watch in diff.removed:
+                self._watches.pop(watch_key(watch), None)
+            remaining_by_address = {address: item for (_, address), item in self._watches.items()}
+            remaining_chains = {chain.lower() for chain, _ in self._watches}
+            for watch in diff.removed:
+                normalized = watch.address.lower()
+                if normalized in remaining_by_address:
+                    self._watch_by_address[normalized] = remaining_by_address[normalized]
+                    continue
+                self._watch_by_address.pop(normalized, None)
+                self._metrics_by_address.pop(normalized, None)
+                self._geo_by_address.pop(normalized, None)
+            for watch in diff.removed:
+                if watch.chain.lower() not in remaining_chains:
+                    self._chains_seen.discard(watch.chain.lower())
+            for watch in [*diff.added, *diff.relabeled]:
+                normalized = watch.address.lower()
+                self._watches[watch_key(watch)] = watch
+                self._watch_by_address[normalized] = watch
+                self._metrics_by_address.setdefault(normalized, self._default_metric_row())
+                self._chains_seen.add(watch.chain.lower())
+
     def set_filters(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         with self._lock:
             if "types" in payload and isinstance(payload["types"], list):
@@ -81,13 +125,13 @@ class DashboardState:
             if "window_seconds" in payload:
                 try:
                     window = int(payload["window_seconds"])
-                    self._filters["window_seconds"] = max(60, min(24 * 60 * 60, window))
+                    self._filters["window_seconds"] = max(60, min(self._max_history_seconds, window))
                 except (TypeError, ValueError):
                     pass
             if "replay_offset_seconds" in payload:
                 try:
                     offset = int(payload["replay_offset_seconds"])
-                    self._filters["replay_offset_seconds"] = max(0, min(24 * 60 * 60, offset))
+                    self._filters["replay_offset_seconds"] = max(0, min(self._max_history_seconds, offset))
                 except (TypeError, ValueError):
                     pass
             return dict(self._filters)
@@ -128,6 +172,7 @@ class DashboardState:
                 geo_by_address=self._geo_by_address,
                 watch_by_address=self._watch_by_address,
             )
+            event["received_at"] = now
             self._event_types_seen.add(str(event.get("event_type", "")).lower())
             self._chains_seen.add(alert.chain.lower())
 
@@ -152,11 +197,21 @@ class DashboardState:
                 "event_type": event.get("event_type"),
                 "entities": alert.entities,
                 "deep_link": alert.deep_link,
+                "received_at": now,
             }
             self._alerts.appendleft(alert_row)
             self._events.appendleft(event)
+            if self._history is not None:
+                self._history_pending.append((alert_row, event))
             self._recompute_alert_counts_24h(now)
 
+    def flush_history(self) -> int:
+        if self._history is None:
+            return 0
+        with self._lock:
+            pending, self._history_pending = self._history_pending, []
+        return self._history.append_many(pending)
+
     def _addresses_for_alert(self, alert: Alert) -> List[str]:
         out: List[str] = []
         candidates = [alert.watch_address, alert.from_address, alert.to_address]
@@ -204,10 +259,9 @@ class DashboardState:
                 continue
             if selected_chains and str(event.get("chain", "")).lower() not in selected_chains:
                 continue
-            ts = event.get("timestamp")
-            if isinstance(ts, int):
-                if ts < start_ts or ts > pivot_ts:
-                    continue
+            ts = row_timestamp(event)
+            if ts is not None and (ts < start_ts or ts > pivot_ts):
+                continue
             filtered.append(event)
         return filtered
 
@@ -229,10 +283,9 @@ class DashboardState:
                 continue
             if selected_chains and str(alert.get("chain", "")).lower() not in selected_chains:
                 continue
-            ts = alert.get("timestamp")
-            if isinstance(ts, int):
-                if ts < start_ts or ts > pivot_ts:
-                    continue
+            ts = row_timestamp(alert)
+            if ts is not None and (ts < start_ts or ts > pivot_ts):
+                continue
             out.append(alert)
         return out
 
@@ -241,13 +294,17 @@ class DashboardState:
         score_15m = 0.0
         count_5m = 0
         for event in events:
-            ts = event.get("timestamp")
-            if not isinstance(ts, int):
+            ts = row_timestamp(event)
+            if ts is None:
                 continue
             if ts >= now_ts - 15 * 60:
                 score_15m += float(event.get("score") or 0.0)
             if ts >= now_ts - 5 * 60:
                 count_5m += 1
+        return DashboardState._sea_state_from(score_15m, count_5m, now_ts)
+
+    @staticmethod
+    def _sea_state_from(score_15m: float, count_5m: int, now_ts: int) -> Dict[str, Any]:
         if score_15m >= 300:
             tier = "storm"
         elif score_15m >= 120:
@@ -261,13 +318,36 @@ class DashboardState:
             "updated_at": now_ts,
         }
 
+    def _history_window(self, now_ts: int) -> Dict[str, Any]:
+        pivot_ts = now_ts - int(self._filters.get("replay_offset_seconds", 0) or 0)
+        return {
+            "start_ts": pivot_ts - int(self._filters.get("window_seconds", 3600) or 3600),
+            "end_ts": pivot_ts,
+            "types": list(self._filters.get("types", [])),
+            "chains": list(self._filters.get("chains", [])),
+            "min_usd": float(self._filters.get("min_usd", 0.0) or 0.0),
+        }
+
     def snapshot(self) -> Dict[str, Any]:
+        now_ts = int(time.time())
+        history_result = None
+        if self._history is not None:
+            # The SQLite reads run outside the state lock so ingest_alert and the
+            # poller never wait on dashboard polls.
+            with self._lock:
+                window = self._history_window(now_ts)
+            alerts, events = self._history.query(**window)
+            history_result = (alerts, events, self._history.window_stats(now_ts=now_ts, **window))
         with self._lock:
-            now_ts = int(time.time())
-            raw_events = list(self._events)
-            raw_alerts = list(self._alerts)
-            filtered_events = self._apply_filters(raw_events, now_ts=now_ts)
-            filtered_alerts = self._apply_filters_to_alerts(raw_alerts, now_ts=now_ts)
+            if history_result is not None:
+                filtered_alerts, filtered_events, history_stats = history_result
+                event_count = history_stats["event_count"]
+                sea_state = self._sea_state_from(history_stats["score_15m"], history_stats["events_5m"], now_ts)
+            else:
+                filtered_events = self._apply_filters(list(self._events), now_ts=now_ts)
+                filtered_alerts = self._apply_filters_to_alerts(list(self._alerts), now_ts=now_ts)
+                event_count = len(filtered_events)
+                sea_state = self._sea_state(filtered_events, now_ts=now_ts)
             whales: List[Dict[str, Any]] = []
             for address, watch in self._watch_by_address.items():
                 metric = self._metrics_by_address.get(address, {})
@@ -302,7 +382,6 @@ class DashboardState:
                 ),
                 reverse=True,
             )
-            sea_state = self._sea_state(filtered_events, now_ts=now_ts)
             available_event_types = sorted(value for value in self._event_types_seen if value)
             available_chains = sorted(value for value in self._chains_seen if value)
             return {
@@ -316,11 +395,12 @@ class DashboardState:
                 "filters_meta": {
                     "available_event_types": available_event_types,
                     "available_chains": available_chains,
-                    "max_replay_offset_seconds": 24 * 60 * 60,
+                    "max_replay_offset_seconds": self._max_history_seconds,
+                    "max_window_seconds": self._max_history_seconds,
                 },
                 "watch_count": len(self._watch_by_address),
                 "geo_count": len([1 for row in self._geo_by_address.values() if row]),
-                "event_count": len(filtered_events),
+                "event_count": event_count,
             }
 
 
@@ -330,3 +410,6 @@ class DashboardSink(AlertSink):
 
     def send(self, alert: Alert) -> None:
         self._state.ingest_alert(alert)
+
+    def flush(self) -> None:
+        self._state.flush_history()
@@ -1,18 +1,85 @@
 from __future__ import annotations
 
+import hashlib
+import logging
+import math
+import os
 import sqlite3
 import threading
 import time
+from collections import OrderedDict
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
+LOG = logging.getLogger(__name__)
 
+# Stay well under SQLite's default host-parameter limit. Full chunks share one SQL
+# string, so the connection's statement cache keeps them prepared.
+MAX_KEYS_PER_QUERY = 500
+
+BLOOM_ERROR_RATE = 0.01
+# Compaction deletes and vacuums in small steps, releasing the store lock between
+# them so a running poll cycle never waits behind a large delete.
+COMPACT_BATCH_SIZE = 500
+VACUUM_PAGES_PER_STEP = 256
+
+_SELECT_SEEN = "SELECT dedupe_key FROM seen_alerts WHERE dedupe_key IN ({placeholders})"
+_INSERT_SEEN = "INSERT OR IGNORE INTO seen_alerts (dedupe_key, seen_at) VALUES (?, ?)"
+
+
+class BloomFilter:
+    __slots__ = ("capacity", "count", "_bits", "_size", "_hashes")
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE) -> None:
+        self.capacity = max(1, int(capacity))
+        self.count = 0
+        self._size = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self._hashes = max(1, round(self._size / self.capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterable[int]:
+        # Kirsch-Mitzenmacher double hashing over one 128-bit digest.
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        size = self._size
+        return ((first + index * second) % size for index in range(self._hashes))
+
+    def add(self, key: str) -> None:
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+
+# Front cache: a key missing from the Bloom filter was never marked seen, a key in
+# the LRU was marked seen recently; everything else is answered by SQLite. Another
+# process writing the same file (a backfill run) bumps PRAGMA data_version, and the
+# rows it added are loaded into the Bloom filter before the next lookup trusts it.
 class DedupeStore:
-    def __init__(self, db_path: Path) -> None:
+    def __init__(self, db_path: Path, bloom_capacity: int = 200_000, lru_size: int = 10_000) -> None:
         self._db_path = db_path
         self._db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
         self._lock = threading.Lock()
         with self._lock:
+            # Incremental auto-vacuum has to be set before the first table exists;
+            # older databases are converted once with a full VACUUM.
+            if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                self._conn.execute("VACUUM")
+            # WAL lets readers run alongside the per-cycle write transaction, and
+            # synchronous=NORMAL fsyncs at checkpoints rather than on every commit.
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
             self._conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS seen_alerts (
@@ -21,21 +88,266 @@ class DedupeStore:
                 )
                 """
             )
-            self._conn.commit()
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_alerts_seen_at ON seen_alerts (seen_at)")
+            self._rows = self._conn.execute("SELECT COUNT(*) FROM seen_alerts").fetchone()[0]
+        self._compaction = {"last_compacted_at": 0, "last_deleted": 0, "deleted_total": 0, "vacuumed_pages_total": 0}
+        self._bloom_capacity = max(1, int(bloom_capacity))
+        self._lru_size = max(0, int(lru_size))
+        self._lru: "OrderedDict[str, None]" = OrderedDict()
+        self._stats = {"lookups": 0, "bloom_negatives": 0, "lru_hits": 0, "sqlite_lookups": 0, "bloom_false_positives": 0}
+        self._bloom = BloomFilter(self._bloom_capacity)
+        self._data_version = 0
+        self._synced_rowid = 0
+        self._storage: Dict[str, Any] = {}
+        with self._lock:
+            self._rebuild_bloom()
+        self.refresh_storage_stats()
+
+    def _rebuild_bloom(self) -> None:
+        capacity = self._bloom_capacity
+        while capacity < self._rows * 2:
+            capacity *= 2
+        bloom = BloomFilter(capacity)
+        # Read before the scan, so a commit racing it still shows up as a new version.
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        top = 0
+        for rowid, key in self._conn.execute("SELECT rowid, dedupe_key FROM seen_alerts"):
+            bloom.add(key)
+            top = max(top, rowid)
+        self._bloom = bloom
+        self._synced_rowid = top
+
+    def _sync_external_writes(self) -> None:
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        self._data_version = version
+        self._rows = self._conn.execute("SELECT COUNT(*) FROM seen_alerts").fetchone()[0]
+        top = self._conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM seen_alerts").fetchone()[0]
+        if top < self._synced_rowid:
+            # The other writer deleted past our high-water mark, so rowids may be reused.
+            self._rebuild_bloom()
+            return
+        bloom = self._bloom
+        for rowid, key in self._conn.execute("SELECT rowid, dedupe_key FROM seen_alerts WHERE rowid > ?", (self._synced_rowid,)):
+            if key not in bloom:
+                bloom.add(key)
+            self._synced_rowid = max(self._synced_rowid, rowid)
+        if bloom.count > bloom.capacity:
+            self._rebuild_bloom()
+
+    def _remember(self, key: str) -> None:
+        if not self._lru_size:
+            return
+        self._lru[key] = None
+        self._lru.move_to_end(key)
+        if len(self._lru) > self._lru_size:
+            self._lru.popitem(last=False)
+
+    def _split_cached(self, keys: List[str]) -> Tuple[Set[str], List[str]]:
+        seen: Set[str] = set()
+        pending: List[str] = []
+        stats = self._stats
+        stats["lookups"] += len(keys)
+        for key in keys:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                stats["lru_hits"] += 1
+                seen.add(key)
+            elif key not in self._bloom:
+                stats["bloom_negatives"] += 1
+            else:
+                pending.append(key)
+        stats["sqlite_lookups"] += len(pending)
+        return seen, pending
 
     def has_seen(self, dedupe_key: str) -> bool:
+        return not self.filter_unseen([dedupe_key])
+
+    def filter_unseen(self, dedupe_keys: Iterable[str]) -> List[str]:
+        unique = list(dict.fromkeys(dedupe_keys))
         with self._lock:
-            cursor = self._conn.execute("SELECT 1 FROM seen_alerts WHERE dedupe_key = ? LIMIT 1", (dedupe_key,))
-            return cursor.fetchone() is not None
+            self._sync_external_writes()
+            seen, pending = self._split_cached(unique)
+            found: Set[str] = set()
+            for start in range(0, len(pending), MAX_KEYS_PER_QUERY):
+                chunk = pending[start : start + MAX_KEYS_PER_QUERY]
+                cursor = self._conn.execute(_SELECT_SEEN.format(placeholders=",".join("?" * len(chunk))), chunk)
+                found.update(row[0] for row in cursor)
+            self._stats["bloom_false_positives"] += len(pending) - len(found)
+            for key in found:
+                self._remember(key)
+            seen |= found
+        return [key for key in unique if key not in seen]
 
     def mark_seen(self, dedupe_key: str) -> None:
+        self.mark_seen_many([dedupe_key])
+
+    def mark_seen_many(self, dedupe_keys: Iterable[str]) -> int:
+        now_ts = int(time.time())
+        rows = [(key, now_ts) for key in dict.fromkeys(dedupe_keys)]
+        if not rows:
+            return 0
         with self._lock:
-            self._conn.execute(
-                "INSERT OR IGNORE INTO seen_alerts (dedupe_key, seen_at) VALUES (?, ?)",
-                (dedupe_key, int(time.time())),
-            )
-            self._conn.commit()
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                inserted = self._conn.executemany(_INSERT_SEEN, rows).rowcount
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._rows += max(0, inserted)
+            for key, _ in rows:
+                self._bloom.add(key)
+                self._remember(key)
+            if self._bloom.count > self._bloom.capacity:
+                self._rebuild_bloom()
+        return len(rows)
+
+    def compact_expired(self, cutoff_ts: int, batch_size: int = COMPACT_BATCH_SIZE) -> int:
+        deleted = 0
+        while True:
+            with self._lock:
+                batch = self._conn.execute(
+                    "SELECT rowid, dedupe_key FROM seen_alerts WHERE seen_at < ? ORDER BY seen_at LIMIT ?",
+                    (int(cutoff_ts), int(batch_size)),
+                ).fetchall()
+                if not batch:
+                    break
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.executemany("DELETE FROM seen_alerts WHERE rowid = ?", [(rowid,) for rowid, _ in batch])
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+                self._rows -= len(batch)
+                for _, key in batch:
+                    self._lru.pop(key, None)
+            deleted += len(batch)
+            if len(batch) < batch_size:
+                break
+
+        vacuumed = self._incremental_vacuum() if deleted else 0
+        with self._lock:
+            if deleted:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            # Deleted keys stay set in the Bloom filter and only cost a SQLite probe;
+            # once they are a large share of it, reload it from the table.
+            if deleted and deleted * 4 > self._bloom.count:
+                self._rebuild_bloom()
+            self._compaction["last_compacted_at"] = int(time.time())
+            self._compaction["last_deleted"] = deleted
+            self._compaction["deleted_total"] += deleted
+            self._compaction["vacuumed_pages_total"] += vacuumed
+        self.refresh_storage_stats()
+        return deleted
+
+    def _incremental_vacuum(self) -> int:
+        vacuumed = 0
+        while True:
+            with self._lock:
+                free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not free_pages:
+                    return vacuumed
+                step = min(free_pages, VACUUM_PAGES_PER_STEP)
+                # execute() only steps the pragma once (one page); executescript runs it to completion.
+                self._conn.executescript(f"PRAGMA incremental_vacuum({step});")
+            vacuumed += step
+
+    # File sizes and the oldest key are read here, off the scrape path: the poller
+    # calls this after each cycle's write and the compactor after each pass, and
+    # storage_stats() serves the cached figures.
+    def refresh_storage_stats(self) -> None:
+        with self._lock:
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+            free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            oldest = self._conn.execute("SELECT MIN(seen_at) FROM seen_alerts").fetchone()[0]
+        try:
+            wal_bytes = os.path.getsize(f"{self._db_path}-wal")
+        except OSError:
+            wal_bytes = 0
+        self._storage = {
+            "db_bytes": page_size * page_count,
+            "free_bytes": page_size * free_pages,
+            "wal_bytes": wal_bytes,
+            "oldest_seen_at": oldest or 0,
+        }
+
+    def storage_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"rows": self._rows, **self._compaction, **self._storage}
+
+    def cache_stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats: Dict[str, float] = dict(self._stats)
+            stats["bloom_keys"] = self._bloom.count
+            stats["bloom_capacity"] = self._bloom.capacity
+            stats["bloom_bytes"] = self._bloom.size_bytes
+            stats["lru_keys"] = len(self._lru)
+        lookups = stats["lookups"]
+        stats["bloom_hit_ratio"] = round(stats["bloom_negatives"] / lookups, 4) if lookups else 0.0
+        stats["lru_hit_ratio"] = round(stats["lru_hits"] / lookups, 4) if lookups else 0.0
+        stats["cache_hit_ratio"] = round((stats["bloom_negatives"] + stats["lru_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
 
     def close(self) -> None:
         with self._lock:
             self._conn.close()
+
+
+# `oldest_pending` reports when the oldest alert still waiting for delivery was
+# written (the outbox); keys are kept from that point on, whatever the retention,
+# so a re-fetch after a long sink outage cannot alert twice.
+class DedupeCompactor:
+    def __init__(
+        self,
+        store: DedupeStore,
+        retention_seconds: int,
+        interval_seconds: int = 600,
+        oldest_pending: Optional[Callable[[], Optional[int]]] = None,
+    ) -> None:
+        self._store = store
+        self._retention_seconds = max(0, int(retention_seconds))
+        self._interval_seconds = max(1, int(interval_seconds))
+        self.oldest_pending = oldest_pending
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._retention_seconds > 0
+
+    def run_once(self, now_ts: Optional[int] = None) -> int:
+        if not self.enabled:
+            return 0
+        cutoff = int(now_ts if now_ts is not None else time.time()) - self._retention_seconds
+        oldest = self.oldest_pending() if self.oldest_pending is not None else None
+        if oldest is not None and oldest < cutoff:
+            LOG.info("Keeping dedupe keys back to %d while older alerts await delivery.", oldest)
+            cutoff = int(oldest)
+        deleted = self._store.compact_expired(cutoff)
+        if deleted:
+            LOG.info("Compacted %d dedupe keys older than %ds.", deleted, self._retention_seconds)
+        return deleted
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="pequod-dedupe-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except sqlite3.Error:
+                LOG.exception("Dedupe compaction failed.")
+            self._stop_event.wait(self._interval_seconds)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Mapping, Optional
+
+# Identifying fields of an upstream tx without a hash. Two payloads that agree on
+# every projected field (case-insensitively for strings) get the same fingerprint
+# and are treated as the same transaction; anything outside the projection, such
+# as fees or labels, does not affect identity.
+TX_FINGERPRINT_FIELDS = (
+    "chain",
+    "network",
+    "block_number",
+    "block_hash",
+    "block_timestamp",
+    "timestamp",
+    "nonce",
+    "log_index",
+    "type",
+    "activity_type",
+    "from_address",
+    "to_address",
+    "token_address",
+    "amount",
+    "value",
+    "usd_value",
+    "address",
+)
+FINGERPRINT_BYTES = 8
+_SEPARATOR = "\x1f"
+
+
+def _canonical(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip().lower()
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def fingerprint(*parts: Any) -> str:
+    material = _SEPARATOR.join(_canonical(part) for part in parts)
+    return hashlib.blake2b(material.encode("utf-8"), digest_size=FINGERPRINT_BYTES).hexdigest()
+
+
+def tx_fingerprint(tx: Mapping[str, Any]) -> str:
+    transfers = tx.get("asset_transfers")
+    transfer_count: Optional[int] = len(transfers) if isinstance(transfers, list) else None
+    return fingerprint(*(tx.get(key) for key in TX_FINGERPRINT_FIELDS), transfer_count)
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+PRUNE_BATCH_SIZE = 500
+PRUNE_INTERVAL_SECONDS = 600
+
+_INSERT_ROW = """
+INSERT INTO alert_history (dedupe_key, ts, chain, event_type, watch_address, usd_value, score, alert_json, event_json)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+# Alerts without an event timestamp count as happening when the dashboard received
+# them, both here and in DashboardState's in-memory filters.
+def row_timestamp(row: Dict[str, Any]) -> Optional[int]:
+    for key in ("timestamp", "received_at"):
+        value = row.get(key)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def _dumps(value: Dict[str, Any]) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+# Append-only alert/event history for the dashboard. One row per delivered alert,
+# holding the alert row and map event as JSON next to the indexed filter columns.
+class HistoryStore:
+    def __init__(self, db_path: Path, retention_seconds: int = 0) -> None:
+        self._db_path = db_path
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.retention_seconds = max(0, int(retention_seconds))
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._last_pruned_at = 0
+        with self._lock:
+            if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                self._conn.execute("VACUUM")
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS alert_history (
+                  id INTEGER PRIMARY KEY,
+                  dedupe_key TEXT NOT NULL,
+                  ts INTEGER NOT NULL,
+                  chain TEXT NOT NULL,
+                  event_type TEXT NOT NULL,
+                  watch_address TEXT,
+                  usd_value REAL,
+                  score REAL NOT NULL,
+                  alert_json TEXT NOT NULL,
+                  event_json TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_ts ON alert_history (ts)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_chain_ts ON alert_history (chain, ts)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_event_type_ts ON alert_history (event_type, ts)")
+            # No query filters on watch_address; stores created with this index drop it.
+            self._conn.execute("DROP INDEX IF EXISTS idx_history_watch_ts")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_history_usd ON alert_history (usd_value)")
+            self._rows = self._conn.execute("SELECT COUNT(*) FROM alert_history").fetchone()[0]
+
+    def append_many(self, rows: Sequence[Tuple[Dict[str, Any], Dict[str, Any]]], now_ts: Optional[int] = None) -> int:
+        if not rows:
+            return 0
+        now_ts = int(now_ts if now_ts is not None else time.time())
+        params = []
+        for alert_row, event in rows:
+            ts = row_timestamp(alert_row)
+            usd_value = alert_row.get("usd_value")
+            params.append(
+                (
+                    str(alert_row.get("dedupe_key") or ""),
+                    ts if ts is not None else now_ts,
+                    str(alert_row.get("chain") or "").lower(),
+                    str(event.get("event_type") or "").lower(),
+                    (alert_row.get("watch_address") or "").lower() or None,
+                    float(usd_value) if isinstance(usd_value, (int, float)) else None,
+                    float(event.get("score") or 0.0),
+                    _dumps(alert_row),
+                    _dumps(event),
+                )
+            )
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(_INSERT_ROW, params)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._rows += len(params)
+        if self.retention_seconds and now_ts - self._last_pruned_at >= PRUNE_INTERVAL_SECONDS:
+            self.prune(now_ts - self.retention_seconds)
+            self._last_pruned_at = now_ts
+        return len(params)
+
+    @staticmethod
+    def _where(
+        start_ts: int,
+        end_ts: int,
+        types: Sequence[str],
+        chains: Sequence[str],
+        min_usd: float,
+    ) -> Tuple[str, List[Any]]:
+        clauses = ["ts >= ?", "ts <= ?"]
+        params: List[Any] = [int(start_ts), int(end_ts)]
+        if types:
+            clauses.append(f"event_type IN ({','.join('?' * len(types))})")
+            params.extend(value.lower() for value in types)
+        if chains:
+            clauses.append(f"chain IN ({','.join('?' * len(chains))})")
+            params.extend(value.lower() for value in chains)
+        if min_usd > 0:
+            clauses.append("(usd_value IS NULL OR usd_value >= ?)")
+            params.append(float(min_usd))
+        return " AND ".join(clauses), params
+
+    def query(
+        self,
+        start_ts: int,
+        end_ts: int,
+        types: Sequence[str] = (),
+        chains: Sequence[str] = (),
+        min_usd: float = 0.0,
+        alert_limit: int = 240,
+        event_limit: int = 900,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        where, params = self._where(start_ts, end_ts, types, chains, min_usd)
+        limit = max(alert_limit, event_limit)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT alert_json, event_json FROM alert_history WHERE {where} ORDER BY ts DESC, id DESC LIMIT ?",
+                [*params, limit],
+            ).fetchall()
+        alerts = [json.loads(alert_json) for alert_json, _ in rows[:alert_limit]]
+        events = [json.loads(event_json) for _, event_json in rows[:event_limit]]
+        return alerts, events
+
+    def window_stats(
+        self,
+        start_ts: int,
+        end_ts: int,
+        now_ts: int,
+        types: Sequence[str] = (),
+        chains: Sequence[str] = (),
+        min_usd: float = 0.0,
+    ) -> Dict[str, Any]:
+        where, params = self._where(start_ts, end_ts, types, chains, min_usd)
+        with self._lock:
+            count, score_15m, count_5m = self._conn.execute(
+                f"""
+                SELECT COUNT(*),
+                       COALESCE(SUM(CASE WHEN ts >= ? THEN score ELSE 0 END), 0),
+                       COALESCE(SUM(CASE WHEN ts >= ? THEN 1 ELSE 0 END), 0)
+                FROM alert_history WHERE {where}
+                """,
+                [now_ts - 15 * 60, now_ts - 5 * 60, *params],
+            ).fetchone()
+        return {"event_count": int(count), "score_15m": float(score_15m), "events_5m": int(count_5m)}
+
+    def distinct_values(self) -> Tuple[List[str], List[str]]:
+        with self._lock:
+            types = [row[0] for row in self._conn.execute("SELECT DISTINCT event_type FROM alert_history")]
+            chains = [row[0] for row in self._conn.execute("SELECT DISTINCT chain FROM alert_history")]
+        return types, chains
+
+    def prune(self, cutoff_ts: int, batch_size: int = PRUNE_BATCH_SIZE) -> int:
+        deleted = 0
+        while True:
+            with self._lock:
+                cursor = self._conn.execute(
+                    "DELETE FROM alert_history WHERE id IN (SELECT id FROM alert_history WHERE ts < ? ORDER BY ts LIMIT ?)",
+                    (int(cutoff_ts), int(batch_size)),
+                )
+                removed = cursor.rowcount
+                self._rows -= removed
+            deleted += removed
+            if removed < batch_size:
+                break
+        if deleted:
+            with self._lock:
+                self._conn.executescript("PRAGMA incremental_vacuum;")
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._rows
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+            page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        return {"rows": rows, "db_bytes": page_size * page_count}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import http.client
+import json
+import threading
+from dataclasses import dataclass
+from email.message import Message
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from .tracing import span
+
+MAX_IDLE_PER_HOST = 4
+MAX_REDIRECTS = 5
+USER_AGENT = "pequod-sinks/1.0"
+# Redirects are followed like urllib did: 307/308 repeat the request, 301/302/303
+# turn a POST into a GET without a body.
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+# Statuses the same request can still succeed after; every other 4xx is the
+# endpoint rejecting the request itself.
+_RETRYABLE_STATUSES = (408, 425, 429)
+
+# A reused keep-alive connection the server already closed fails with one of these
+# before any response arrives; the request is retried once on a fresh connection.
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+_PoolKey = Tuple[str, str, int]
+
+
+class TransportError(Exception):
+    pass
+
+
+# A sink's request was refused in a way no retry can fix (bad payload, revoked
+# token, deleted webhook). Not a SINK_NETWORK_ERRORS member: the alert is given up.
+class PermanentSinkError(Exception):
+    pass
+
+
+def _status_message(url: str, status: int, body: bytes) -> str:
+    return f"HTTP {status} from {urlsplit(url).netloc}: {body[:200].decode('utf-8', errors='replace')}"
+
+
+# 408, 425, 429 and 5xx: the endpoint may accept the same request later.
+class HttpStatusError(TransportError):
+    def __init__(self, url: str, status: int, headers: Message, body: bytes) -> None:
+        super().__init__(_status_message(url, status, body))
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def retry_after(self) -> float:
+        # Telegram sends {"parameters": {"retry_after": N}}, Discord {"retry_after": N};
+        # both also set the Retry-After header.
+        try:
+            payload = json.loads(self.body.decode("utf-8") or "{}")
+        except ValueError:
+            payload = {}
+        if isinstance(payload, dict):
+            parameters = payload.get("parameters")
+            for value in (payload.get("retry_after"), parameters.get("retry_after") if isinstance(parameters, dict) else None):
+                if isinstance(value, (int, float)):
+                    return float(value)
+        try:
+            return float(self.headers.get("Retry-After") or 1.0)
+        except ValueError:
+            return 1.0
+
+
+# Any other status >= 300 left after redirects.
+class HttpRejectedError(PermanentSinkError):
+    def __init__(self, url: str, status: int, headers: Message, body: bytes) -> None:
+        super().__init__(_status_message(url, status, body))
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+def is_retryable_status(status: int) -> bool:
+    return status >= 500 or status in _RETRYABLE_STATUSES
+
+
+@dataclass
+class HttpResponse:
+    status: int
+    headers: Message
+    body: bytes
+
+
+# Shared HTTP client for the webhook-style sinks. Connections are kept alive and
+# pooled per (scheme, host, port), so a burst of alerts to the same chat or webhook
+# pays for one TCP/TLS handshake instead of one per alert. Redirects are followed;
+# a retryable status raises HttpStatusError and any other status >= 300 raises
+# HttpRejectedError, both carrying the status, headers and body. Socket failures
+# and timeouts raise TransportError.
+class HttpTransport:
+    def __init__(self, timeout_seconds: float = 20, max_idle_per_host: int = MAX_IDLE_PER_HOST) -> None:
+        self._timeout_seconds = timeout_seconds
+        self._max_idle_per_host = max(1, int(max_idle_per_host))
+        self._idle: Dict[_PoolKey, List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self.requests_total = 0
+        self.connections_opened = 0
+
+    def post_json(self, url: str, payload: Any, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        body = json.dumps(payload).encode("utf-8")
+        request_headers = {"Content-Type": "application/json", **(headers or {})}
+        return self.request("POST", url, body, request_headers)
+
+    def request(self, method: str, url: str, body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        request_headers = {"User-Agent": USER_AGENT, "Connection": "keep-alive", **(headers or {})}
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https") or not parts.hostname:
+                raise TransportError(f"Unsupported URL: {url}")
+            key: _PoolKey = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80))
+            target = parts.path or "/"
+            if parts.query:
+                target = f"{target}?{parts.query}"
+            with span("sink.http", method=method, host=parts.hostname):
+                response = self._send(key, method, target, body, request_headers)
+            location = response.headers.get("Location")
+            if response.status not in _REDIRECT_STATUSES or not location:
+                break
+            url = urljoin(url, location)
+            if response.status in (301, 302, 303) and method != "HEAD":
+                method, body = "GET", None
+                request_headers = {name: value for name, value in request_headers.items() if name.lower() != "content-type"}
+        else:
+            raise TransportError(f"Too many redirects ending at {url}")
+        if response.status >= 300:
+            error = HttpStatusError if is_retryable_status(response.status) else HttpRejectedError
+            raise error(url, response.status, response.headers, response.body)
+        return response
+
+    def _send(self, key: _PoolKey, method: str, target: str, body: Optional[bytes], headers: Dict[str, str]) -> HttpResponse:
+        conn, reused = self._checkout(key)
+        try:
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                raw = conn.getresponse()
+            except _STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                conn.close()
+                conn, reused = self._connect(key), False
+                conn.request(method, target, body=body, headers=headers)
+                raw = conn.getresponse()
+            data = raw.read()
+        except (OSError, http.client.HTTPException) as exc:
+            # Timeouts included, so callers only need to handle TransportError.
+            conn.close()
+            raise TransportError(f"{method} {key[1]} failed: {exc or exc.__class__.__name__}") from exc
+        with self._lock:
+            self.requests_total += 1
+        if raw.will_close:
+            conn.close()
+        else:
+            self._checkin(key, conn)
+        return HttpResponse(status=raw.status, headers=raw.headers, body=data)
+
+    def _connect(self, key: _PoolKey) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        with self._lock:
+            self.connections_opened += 1
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self._timeout_seconds)
+        return http.client.HTTPConnection(host, port, timeout=self._timeout_seconds)
+
+    def _checkout(self, key: _PoolKey) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._connect(key), False
+
+    def _checkin(self, key: _PoolKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self._max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            idle = sum(len(conns) for conns in self._idle.values())
+        return {"requests": self.requests_total, "connections_opened": self.connections_opened, "idle_connections": idle}
+
+    def close(self) -> None:
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for conns in pools.values():
+            for conn in conns:
+                conn.close()
@@ -5,10 +5,14 @@ import sys
 
 from .allium_client import AlliumClient
 from .config import load_settings
-from .dedupe import DedupeStore
+from .dedupe import DedupeCompactor, DedupeStore
+from .outbox import Outbox, OutboxSink
 from .poller import WhalePoller
-from .sinks import build_sinks
-from .watchlist import load_watchlist
+from .profiler import CycleProfiler
+from .raw_store import build_raw_retention
+from .sinks import AlertSink, build_sinks
+from .tracing import TRACER
+from .watchlist import WatchlistWatcher, load_watchlist
 
 
 def configure_logging() -> None:
@@ -38,19 +42,70 @@ def main() -> int:
         logger.error("Watchlist is empty: %s", settings.watchlist_path)
         return 1
 
+    TRACER.configure(
+        enabled=settings.trace_enabled,
+        output_path=settings.trace_path,
+        max_bytes=settings.trace_max_bytes,
+    )
     client = AlliumClient(
         base_url=settings.allium_base_url,
         api_key=settings.allium_api_key,
         timeout_seconds=settings.http_timeout_seconds,
     )
-    dedupe_store = DedupeStore(settings.dedupe_db_path)
-    sinks = build_sinks(
-        timeout_seconds=settings.http_timeout_seconds,
-        telegram_bot_token=settings.telegram_bot_token,
-        telegram_chat_id=settings.telegram_chat_id,
-        discord_webhook_url=settings.discord_webhook_url,
-        generic_webhook_url=settings.generic_webhook_url,
+    dedupe_store = DedupeStore(
+        settings.dedupe_db_path,
+        bloom_capacity=settings.dedupe_bloom_capacity,
+        lru_size=settings.dedupe_lru_size,
+    )
+    compactor = DedupeCompactor(
+        dedupe_store,
+        retention_seconds=settings.dedupe_retention_seconds,
+        interval_seconds=settings.dedupe_compact_interval_seconds,
     )
+    try:
+        # With the outbox enabled its delivery workers already run one thread per
+        # sink, so the in-memory dispatch queues are only used without it (see the
+        # PEQUOD_SINK_QUEUE_SIZE row in the README).
+        sinks = build_sinks(
+            timeout_seconds=settings.http_timeout_seconds,
+            telegram_bot_token=settings.telegram_bot_token,
+            telegram_chat_id=settings.telegram_chat_id,
+            discord_webhook_url=settings.discord_webhook_url,
+            generic_webhook_url=settings.generic_webhook_url,
+            queue_size=0 if settings.outbox_db_path else settings.sink_queue_size,
+            overflow=settings.sink_overflow,
+            spill_dir=settings.sink_spill_dir,
+            telegram_rate_per_minute=settings.telegram_rate_per_minute,
+            discord_rate_per_minute=settings.discord_rate_per_minute,
+        )
+    except ValueError as exc:
+        logger.error("Configuration error: %s", exc)
+        return 1
+    try:
+        raw_retention = build_raw_retention(
+            settings.raw_retention,
+            sinks.requires_raw,
+            settings.raw_blob_dir,
+            max_blobs=settings.raw_blob_max,
+        )
+    except ValueError as exc:
+        logger.error("Configuration error: %s", exc)
+        return 1
+    outbox = Outbox(settings.outbox_db_path) if settings.outbox_db_path else None
+    if outbox is not None:
+        compactor.oldest_pending = outbox.oldest_pending_at
+    delivery = (
+        OutboxSink(
+            outbox,
+            sinks.sinks,
+            max_backoff_seconds=settings.outbox_max_backoff_seconds,
+            max_attempts=settings.outbox_max_attempts,
+            raw_store=raw_retention.blob_store,
+        )
+        if outbox is not None
+        else None
+    )
+    sink: AlertSink = delivery if delivery is not None else sinks
 
     logger.info(
         "Loaded %d watched addresses. Threshold: $%.2f, poll interval: %ss",
@@ -59,11 +114,15 @@ def main() -> int:
         settings.poll_interval_seconds,
     )
 
+    profiler = CycleProfiler(settings.profile_dir)
+    if settings.profile_cycles > 0:
+        profiler.arm(settings.profile_cycles)
+
     poller = WhalePoller(
         client=client,
         watchlist=watchlist,
         dedupe_store=dedupe_store,
-        sink=sinks,
+        sink=sink,
         min_alert_usd=settings.min_alert_usd,
         max_addresses_per_request=settings.max_addresses_per_request,
         poll_interval_seconds=settings.poll_interval_seconds,
@@ -72,17 +131,31 @@ def main() -> int:
         discover_min_usd=settings.discover_min_usd,
         discovered_watch_max=settings.discovered_watch_max,
         dashboard_base_url=settings.dashboard_base_url,
+        profiler=profiler,
+        raw_retention=raw_retention,
     )
 
     try:
         if settings.run_once:
             logger.info("Running a single poll cycle (PEQUOD_RUN_ONCE=true).")
             poller.run_once()
+            if delivery is not None:
+                delivery.drain()
         else:
-            poller.run_forever()
+            watcher = WatchlistWatcher(settings.watchlist_path, watchlist) if settings.watchlist_reload else None
+            compactor.start()
+            if delivery is not None:
+                delivery.start()
+            poller.run_forever(watcher=watcher)
     except KeyboardInterrupt:
         logger.info("Shutting down.")
     finally:
+        compactor.stop()
+        if delivery is not None:
+            delivery.stop()
+        if outbox is not None:
+            outbox.close()
+        sinks.close()
         dedupe_store.close()
     return 0
 
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .tracing import span
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CYCLE_STAGES: Tuple[str, ...] = ("fetch", "normalize", "price", "score", "dedupe", "sink")
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in pairs) + "}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        label_name: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_name = label_name
+        self._buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series: Dict[str, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, label: str = "") -> None:
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = ([0] * (len(self._buckets) + 1), [0.0, 0.0])
+                self._series[label] = series
+            counts, totals = series
+            counts[index] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def render(self, writer: "PrometheusWriter") -> None:
+        with self._lock:
+            series = {label: (list(counts), list(totals)) for label, (counts, totals) in self._series.items()}
+        writer.header(self.name, self.help_text, "histogram")
+        for label, (counts, totals) in sorted(series.items()):
+            base: List[Tuple[str, str]] = [(self.label_name, label)] if self.label_name else []
+            cumulative = 0
+            for bound, count in zip(self._buckets, counts):
+                cumulative += count
+                writer.sample(f"{self.name}_bucket", cumulative, [*base, ("le", _format_value(bound))])
+            cumulative += counts[-1]
+            writer.sample(f"{self.name}_bucket", cumulative, [*base, ("le", "+Inf")])
+            writer.sample(f"{self.name}_sum", totals[0], base)
+            writer.sample(f"{self.name}_count", totals[1], base)
+
+
+class PrometheusWriter:
+    def __init__(self) -> None:
+        self._lines: List[str] = []
+
+    def header(self, name: str, help_text: str, metric_type: str) -> None:
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {metric_type}")
+
+    def sample(self, name: str, value: float, labels: Sequence[Tuple[str, str]] = ()) -> None:
+        self._lines.append(f"{name}{_labels(labels)} {_format_value(value)}")
+
+    def counter(self, name: str, help_text: str, value: float) -> None:
+        self.header(name, help_text, "counter")
+        self.sample(name, value)
+
+    def gauge(self, name: str, help_text: str, value: float) -> None:
+        self.header(name, help_text, "gauge")
+        self.sample(name, value)
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+
+class StageClock:
+    def __init__(self) -> None:
+        self.totals: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str, **attrs: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            with span(name, **attrs):
+                yield
+        finally:
+            self.totals[name] = self.totals.get(name, 0.0) + (time.perf_counter() - started)
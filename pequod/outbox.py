@@ -0,0 +1,462 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .metrics import Histogram, PrometheusWriter
+from .raw_store import EMPTY_RAW, BlobRaw, RawBlobStore
+from .sinks import (
+    SINK_LATENCY_BUCKETS,
+    SINK_STATS_SERIES,
+    AlertSink,
+    PartialDeliveryError,
+    decode_alert,
+    encode_alert,
+    is_permanent_failure,
+    is_rate_limited,
+    render_per_sink,
+    sink_names,
+)
+from .tracing import SpanContext, current_context, span
+from .types import Alert
+
+LOG = logging.getLogger(__name__)
+
+IDLE_WAIT_SECONDS = 5.0
+
+_INSERT_ALERT = """
+INSERT OR IGNORE INTO outbox_alerts (dedupe_key, created_at, payload, trace_id, parent_span_id)
+VALUES (?, ?, ?, ?, ?)
+"""
+_INSERT_DELIVERY = """
+INSERT OR IGNORE INTO outbox_deliveries (sink, alert_id)
+SELECT ?, id FROM outbox_alerts WHERE dedupe_key = ?
+"""
+_SELECT_PENDING = """
+SELECT d.alert_id, d.attempts, d.next_attempt_at, a.payload, a.trace_id, a.parent_span_id
+FROM outbox_deliveries d JOIN outbox_alerts a ON a.id = d.alert_id
+WHERE d.sink = ? AND d.dead = 0
+ORDER BY d.alert_id
+LIMIT ?
+"""
+
+
+# Durable alert outbox. Each alert is stored once in outbox_alerts; every target
+# sink gets its own row in outbox_deliveries, removed only after that sink accepted
+# the alert, so a crash or a failing endpoint re-delivers instead of losing it.
+class Outbox:
+    def __init__(self, db_path: Path) -> None:
+        self._db_path = db_path
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS outbox_alerts (
+                  id INTEGER PRIMARY KEY,
+                  dedupe_key TEXT NOT NULL UNIQUE,
+                  created_at INTEGER NOT NULL,
+                  payload TEXT NOT NULL,
+                  trace_id INTEGER,
+                  parent_span_id INTEGER
+                )
+                """
+            )
+            # Span context of the poll cycle that wrote the alert; outboxes created
+            # before it was recorded gain the columns here.
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox_alerts)")}
+            for column in ("trace_id", "parent_span_id"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE outbox_alerts ADD COLUMN {column} INTEGER")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS outbox_deliveries (
+                  sink TEXT NOT NULL,
+                  alert_id INTEGER NOT NULL,
+                  attempts INTEGER NOT NULL DEFAULT 0,
+                  next_attempt_at REAL NOT NULL DEFAULT 0,
+                  dead INTEGER NOT NULL DEFAULT 0,
+                  last_error TEXT,
+                  PRIMARY KEY (sink, alert_id)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_deliveries_alert ON outbox_deliveries (alert_id)")
+        self._depth: Dict[str, Dict[str, Any]] = {}
+        self.refresh_depth()
+
+    def enqueue_many(
+        self,
+        items: Sequence[Tuple[str, str]],
+        sinks: Sequence[str],
+        now_ts: Optional[int] = None,
+        parent: Optional[SpanContext] = None,
+    ) -> int:
+        if not items or not sinks:
+            return 0
+        now_ts = int(now_ts if now_ts is not None else time.time())
+        trace_id, span_id = parent or (None, None)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(_INSERT_ALERT, [(key, now_ts, payload, trace_id, span_id) for key, payload in items])
+                self._conn.executemany(_INSERT_DELIVERY, [(sink, key) for key, _ in items for sink in sinks])
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return len(items)
+
+    # Creation time of the oldest alert some sink still has to take; the dedupe
+    # compactor keeps keys from here on.
+    def oldest_pending_at(self) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(a.created_at) FROM outbox_alerts a JOIN outbox_deliveries d ON d.alert_id = a.id WHERE d.dead = 0"
+            ).fetchone()
+        return row[0] if row else None
+
+    # Dedupe keys of every alert some sink has not taken yet (dead ones included).
+    def pending_keys(self) -> List[str]:
+        with self._lock:
+            return [key for (key,) in self._conn.execute("SELECT dedupe_key FROM outbox_alerts")]
+
+    def pending(self, sink: str, limit: int) -> List[Tuple[int, int, float, str, Optional[int], Optional[int]]]:
+        with self._lock:
+            return self._conn.execute(_SELECT_PENDING, (sink, int(limit))).fetchall()
+
+    def ack_many(self, sink: str, alert_ids: Sequence[int]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "DELETE FROM outbox_deliveries WHERE sink = ? AND alert_id = ?",
+                    [(sink, alert_id) for alert_id in alert_ids],
+                )
+                self._conn.executemany(
+                    "DELETE FROM outbox_alerts WHERE id = ?1 AND NOT EXISTS "
+                    "(SELECT 1 FROM outbox_deliveries WHERE alert_id = ?1)",
+                    [(alert_id,) for alert_id in alert_ids],
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def retry(
+        self,
+        sink: str,
+        alert_id: int,
+        next_attempt_at: float,
+        error: str,
+        dead: bool = False,
+        count_attempt: bool = True,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox_deliveries SET attempts = attempts + ?, next_attempt_at = ?, dead = ?, last_error = ? "
+                "WHERE sink = ? AND alert_id = ?",
+                (1 if count_attempt else 0, float(next_attempt_at), 1 if dead else 0, error[:500], sink, alert_id),
+            )
+
+    def depth(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT d.sink,
+                       SUM(CASE WHEN d.dead = 0 THEN 1 ELSE 0 END),
+                       SUM(d.dead),
+                       MIN(CASE WHEN d.dead = 0 THEN a.created_at END)
+                FROM outbox_deliveries d JOIN outbox_alerts a ON a.id = d.alert_id
+                GROUP BY d.sink
+                """
+            ).fetchall()
+        return {
+            sink: {"pending": int(pending or 0), "dead": int(dead or 0), "oldest_created_at": oldest}
+            for sink, pending, dead, oldest in rows
+        }
+
+    # The depth aggregate runs after writes on the poller and delivery threads;
+    # metrics read the cached copy.
+    def refresh_depth(self) -> None:
+        self._depth = self.depth()
+
+    @property
+    def cached_depth(self) -> Dict[str, Dict[str, Any]]:
+        return self._depth
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Drains one sink's deliveries in outbox order. A failing head alert is retried with
+# exponential backoff and holds back the alerts queued behind it, so each sink sees
+# alerts in the order they were written.
+class DeliveryWorker:
+    def __init__(
+        self,
+        outbox: Outbox,
+        sink: AlertSink,
+        base_backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 300.0,
+        max_attempts: int = 0,
+        name: Optional[str] = None,
+        latency: Optional[Histogram] = None,
+        raw_store: Optional[RawBlobStore] = None,
+    ) -> None:
+        self.name = name or sink.__class__.__name__
+        self._outbox = outbox
+        self.sink = sink
+        self._latency = latency
+        self._raw_store = raw_store
+        self._base_backoff_seconds = max(0.01, float(base_backoff_seconds))
+        self._max_backoff_seconds = max(self._base_backoff_seconds, float(max_backoff_seconds))
+        self._max_attempts = max(0, int(max_attempts))
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._next_attempt_at = 0.0
+        self.delivered_total = 0
+        self.failures_total = 0
+        self.dead_total = 0
+
+    def backoff_seconds(self, attempts: int) -> float:
+        return min(self._max_backoff_seconds, self._base_backoff_seconds * (2 ** max(0, attempts - 1)))
+
+    def drain_once(self, now: Optional[float] = None) -> int:
+        now = now if now is not None else time.time()
+        self._next_attempt_at = 0.0
+        delivered = 0
+        while not self._next_attempt_at:
+            rows = self._outbox.pending(self.name, max(1, self.sink.max_batch))
+            if not rows:
+                break
+            batch: List[Tuple[int, int, Alert]] = []
+            parent: Optional[SpanContext] = None
+            for alert_id, attempts, next_attempt_at, payload, trace_id, span_id in rows:
+                if next_attempt_at > now:
+                    self._next_attempt_at = next_attempt_at
+                    break
+                try:
+                    batch.append((alert_id, attempts, decode_alert(payload, self._resolve_raw)))
+                    if len(batch) == 1 and trace_id is not None and span_id is not None:
+                        # The send span joins the trace of the cycle that wrote the head alert.
+                        parent = (trace_id, span_id)
+                except (KeyError, TypeError, ValueError) as exc:
+                    self.failures_total += 1
+                    self._give_up(alert_id, attempts + 1, now, exc)
+            if not batch:
+                continue
+            alerts = [alert for _, _, alert in batch]
+            started = time.perf_counter()
+            try:
+                with span("sink.send", parent, sink=self.name, outbox_id=batch[0][0], alerts=len(alerts)):
+                    if len(alerts) == 1:
+                        self.sink.send(alerts[0])
+                    else:
+                        self.sink.send_many(alerts)
+            except Exception as exc:
+                # Alerts the sink accepted before failing are acked; the first one it
+                # did not carries the retry state and the rest wait behind it.
+                accepted = exc.delivered if isinstance(exc, PartialDeliveryError) else 0
+                if accepted:
+                    self._outbox.ack_many(self.name, [alert_id for alert_id, _, _ in batch[:accepted]])
+                    delivered += accepted
+                head_id, head_attempts, _ = batch[accepted]
+                self._record_failure(head_id, head_attempts + 1, now, exc)
+                continue
+            finally:
+                if self._latency is not None:
+                    self._latency.observe(time.perf_counter() - started, label=self.name)
+            self._outbox.ack_many(self.name, [alert_id for alert_id, _, _ in batch])
+            delivered += len(batch)
+        self._outbox.refresh_depth()
+        return self._finish(delivered)
+
+    def _resolve_raw(self, dedupe_key: str) -> Mapping[str, Any]:
+        if self._raw_store is None:
+            # Written under PEQUOD_RAW_RETENTION=disk and read back without it.
+            LOG.warning("%s has no raw blob store for outbox alert %s; sending it without raw.", self.name, dedupe_key)
+            return EMPTY_RAW
+        return BlobRaw(self._raw_store, dedupe_key)
+
+    def _finish(self, delivered: int) -> int:
+        if delivered:
+            self.delivered_total += delivered
+            try:
+                self.sink.flush()
+            except Exception:
+                LOG.exception("%s flush failed.", self.name)
+        return delivered
+
+    def _record_failure(self, alert_id: int, attempts: int, now: float, exc: Exception) -> None:
+        self.failures_total += 1
+        if is_rate_limited(exc):
+            # Throttling says nothing about the alert: it waits out retry_after without
+            # using up an attempt or growing the backoff.
+            self._next_attempt_at = now + float(getattr(exc, "retry_after", 0.0))
+            self._outbox.retry(self.name, alert_id, self._next_attempt_at, str(exc), count_attempt=False)
+            return
+        # A rejected request fails the same way every time, so it is dead-lettered
+        # at once rather than holding back every alert queued behind it.
+        if is_permanent_failure(exc) or (self._max_attempts and attempts >= self._max_attempts):
+            self._give_up(alert_id, attempts, now, exc)
+            return
+        delay = max(self.backoff_seconds(attempts), getattr(exc, "retry_after", 0.0))
+        LOG.warning("%s delivery of outbox alert %d failed (attempt %d, retry in %.0fs): %s", self.name, alert_id, attempts, delay, exc)
+        self._next_attempt_at = now + delay
+        self._outbox.retry(self.name, alert_id, self._next_attempt_at, str(exc))
+
+    def _give_up(self, alert_id: int, attempts: int, now: float, exc: Exception) -> None:
+        self.dead_total += 1
+        LOG.error("%s gave up on outbox alert %d after %d attempts: %s", self.name, alert_id, attempts, exc)
+        self._outbox.retry(self.name, alert_id, now, str(exc), dead=True)
+
+    def notify(self) -> None:
+        self._wake_event.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name=f"pequod-outbox-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop_event.is_set():
+            self._wake_event.clear()
+            try:
+                self.drain_once()
+            except sqlite3.Error:
+                LOG.exception("%s outbox drain failed.", self.name)
+            wait = IDLE_WAIT_SECONDS
+            if self._next_attempt_at:
+                wait = min(wait, max(0.0, self._next_attempt_at - time.time()))
+            self._wake_event.wait(wait)
+
+
+# Poller-facing sink: send() only buffers, flush() writes the cycle's alerts to the
+# outbox in one transaction and wakes the delivery workers. The poller marks the
+# alerts seen after flush() returns, so nothing is marked before it is durable.
+# With a raw blob store (PEQUOD_RAW_RETENTION=disk) rows only reference the blob,
+# and the store keeps every blob that is buffered here or still in the outbox.
+class OutboxSink(AlertSink):
+    def __init__(
+        self,
+        outbox: Outbox,
+        sinks: List[AlertSink],
+        base_backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 300.0,
+        max_attempts: int = 0,
+        raw_store: Optional[RawBlobStore] = None,
+    ) -> None:
+        self._outbox = outbox
+        self._sinks = sinks
+        self._include_raw = any(sink.requires_raw for sink in sinks)
+        if raw_store is not None:
+            raw_store.pinned = self._pinned_keys
+        self._latency = Histogram(
+            "pequod_sink_send_seconds",
+            "Time spent in each sink's send call.",
+            buckets=SINK_LATENCY_BUCKETS,
+            label_name="sink",
+        )
+        self._workers = [
+            DeliveryWorker(
+                outbox,
+                sink,
+                base_backoff_seconds=base_backoff_seconds,
+                max_backoff_seconds=max_backoff_seconds,
+                max_attempts=max_attempts,
+                name=name,
+                latency=self._latency,
+                raw_store=raw_store,
+            )
+            for sink, name in zip(sinks, sink_names(sinks))
+        ]
+        self._names = [worker.name for worker in self._workers]
+        self._pending: List[Tuple[str, str]] = []
+
+    @property
+    def requires_raw(self) -> bool:  # type: ignore[override]
+        return self._include_raw
+
+    def send(self, alert: Alert) -> None:
+        if self._include_raw and isinstance(alert.raw, BlobRaw):
+            payload = encode_alert(alert, True, raw_ref=alert.raw.dedupe_key)
+        else:
+            payload = encode_alert(alert, self._include_raw)
+        self._pending.append((alert.dedupe_key, payload))
+
+    def _pinned_keys(self) -> List[str]:
+        return [key for key, _ in self._pending] + self._outbox.pending_keys()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        self._outbox.enqueue_many(pending, self._names, parent=current_context())
+        self._outbox.refresh_depth()
+        for worker in self._workers:
+            worker.notify()
+
+    # Delivers whatever is due on the calling thread; used when the workers are not
+    # running (PEQUOD_RUN_ONCE).
+    def drain(self) -> int:
+        return sum(worker.drain_once() for worker in self._workers)
+
+    def start(self) -> None:
+        for worker in self._workers:
+            worker.start()
+
+    def stop(self) -> None:
+        for worker in self._workers:
+            worker.stop()
+
+    def stats(self) -> Dict[str, Any]:
+        depth = self._outbox.cached_depth
+        now_ts = time.time()
+        outbox: Dict[str, Dict[str, Any]] = {}
+        for worker in self._workers:
+            pending = depth.get(worker.name, {})
+            oldest = pending.get("oldest_created_at")
+            outbox[worker.name] = {
+                "pending": pending.get("pending", 0),
+                "dead": pending.get("dead", 0),
+                "oldest_age_seconds": max(0.0, now_ts - oldest) if oldest else 0.0,
+                "delivered": worker.delivered_total,
+                "failures": worker.failures_total,
+                **worker.sink.stats(),
+            }
+        return {"outbox": outbox}
+
+    def render_prometheus(self, writer: PrometheusWriter) -> None:
+        render_per_sink(
+            writer,
+            self.stats()["outbox"],
+            (
+                ("pequod_outbox_depth", "Alerts waiting in the outbox per sink.", "gauge", "pending"),
+                ("pequod_outbox_oldest_age_seconds", "Age of the oldest undelivered outbox alert per sink.", "gauge", "oldest_age_seconds"),
+                ("pequod_outbox_dead", "Outbox deliveries abandoned after PEQUOD_OUTBOX_MAX_ATTEMPTS.", "gauge", "dead"),
+                ("pequod_outbox_delivered_total", "Alerts delivered from the outbox per sink.", "counter", "delivered"),
+                ("pequod_outbox_failures_total", "Failed outbox delivery attempts per sink.", "counter", "failures"),
+                *SINK_STATS_SERIES,
+            ),
+        )
+        self._latency.render(writer)
+        for sink in self._sinks:
+            sink.render_prometheus(writer)
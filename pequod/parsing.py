@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Optional
+
+from . import utils
+
+TIMESTAMP_CACHE_SIZE = 4096
+_EPOCH_ORDINAL = 719163
+_MS_THRESHOLD = 10_000_000_000
+
+
+def _is_fixed_iso(raw: str) -> bool:
+    # "YYYY-MM-DDTHH:MM:SS" with an optional trailing "Z", the shape Allium returns.
+    length = len(raw)
+    if length == 20:
+        if raw[19] != "Z":
+            return False
+    elif length != 19:
+        return False
+    return raw[4] == "-" and raw[7] == "-" and raw[10] in "T " and raw[13] == ":" and raw[16] == ":"
+
+
+@lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def _parse_timestamp_str(value: str) -> Optional[int]:
+    raw = value.strip()
+    if _is_fixed_iso(raw):
+        try:
+            dt = datetime.fromisoformat(raw)
+        except ValueError:
+            return None
+        return (dt.toordinal() - _EPOCH_ORDINAL) * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second
+    return utils.parse_timestamp(raw)
+
+
+def parse_timestamp(value: Any) -> Optional[int]:
+    kind = type(value)
+    if kind is str:
+        return _parse_timestamp_str(value)
+    if kind is int:
+        return value // 1000 if value > _MS_THRESHOLD else value
+    return utils.parse_timestamp(value)
+
+
+def to_float(value: Any) -> Optional[float]:
+    kind = type(value)
+    if kind is float:
+        return value
+    if kind is int:
+        return float(value)
+    if kind is str:
+        try:
+            return float(value)
+        except ValueError:
+            if "," not in value:
+                return None
+    return utils.to_float(value)
+
+
+def timestamp_cache_info() -> Any:
+    return _parse_timestamp_str.cache_info()
+
+
+def clear_timestamp_cache() -> None:
+    _parse_timestamp_str.cache_clear()
@@ -2,21 +2,51 @@ from __future__ import annotations
 
 import threading
 import logging
-import math
 import time
 from collections import deque
 from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
 
-from .alerts import build_alert
+from .alerts import alert_dedupe_key, build_alert
+from .batch import NO_INDEX, TS_MISSING, CycleBatch
 from .allium_client import AlliumClient, AlliumError
 from .dedupe import DedupeStore
-from .sinks import MultiSink
-from .tx_extractors import normalize_transactions
+from .metrics import CYCLE_STAGES, Histogram, PrometheusWriter, StageClock
+from .profiler import CycleProfiler
+from .raw_store import RawRetention
+from .scoring import (
+    BURST_WINDOW_SECONDS,
+    BatchScorer,
+    ScoreComponents,
+    anomaly_score,
+    bridge_score,
+    burst_score,
+    magnitude_score,
+    median,
+    score_meta_from_components,
+)
+from .sinks import AlertSink
+from .tracing import span
+from .tx_extractors import normalize_into_batch
 from .types import NormalizedTransaction, WatchAddress
 from .utils import chunked
+from .watchlist import WatchlistDiff, WatchlistWatcher, watch_key
 
 LOG = logging.getLogger(__name__)
 
+COUNTER_HELP: Dict[str, str] = {
+    "events_ingested": "Normalized events returned by wallet/transactions.",
+    "events_new": "Events newer than the per-watch watermark.",
+    "events_usable": "Events with a resolvable USD value.",
+    "alerts_sent": "Alerts delivered to sinks.",
+    "price_items_requested": "Token prices requested from the prices endpoint.",
+    "price_items_quoted": "Token prices returned by the prices endpoint.",
+    "price_missing": "Events dropped because no price quote was available.",
+    "price_errors": "Token price lookups that failed.",
+    "price_request_calls": "Calls made to the prices endpoint.",
+    "discovered_watch_addresses": "Counterparty addresses added to the watch set.",
+}
+COUNTER_KEYS = tuple(COUNTER_HELP)
+
 
 class WhalePoller:
     def __init__(
@@ -24,7 +54,7 @@ class WhalePoller:
         client: AlliumClient,
         watchlist: List[WatchAddress],
         dedupe_store: DedupeStore,
-        sink: MultiSink,
+        sink: AlertSink,
         min_alert_usd: float,
         max_addresses_per_request: int,
         poll_interval_seconds: int,
@@ -34,8 +64,12 @@ class WhalePoller:
         discovered_watch_max: int = 0,
         on_discovered_watch_addresses: Optional[Callable[[List[WatchAddress]], None]] = None,
         dashboard_base_url: str = "",
+        profiler: Optional[CycleProfiler] = None,
+        raw_retention: Optional[RawRetention] = None,
     ) -> None:
         self._client = client
+        self._profiler = profiler
+        self._raw_retention = raw_retention or RawRetention("memory" if sink.requires_raw else "drop")
         self._watchlist = watchlist
         self._dedupe_store = dedupe_store
         self._sink = sink
@@ -51,7 +85,8 @@ class WhalePoller:
         self._dashboard_base_url = dashboard_base_url.strip().rstrip("/")
         self._dynamic_watch_count = 0
         self._discovered_watch_total = 0
-        cutoff = int(time.time()) - max(0, lookback_seconds)
+        self._lookback_seconds = max(0, lookback_seconds)
+        cutoff = int(time.time()) - self._lookback_seconds
         self._latest_timestamp_by_watch_address: Dict[str, int] = {item.address.lower(): cutoff for item in watchlist}
         self._metrics_lock = threading.Lock()
         self._started_at = int(time.time())
@@ -66,6 +101,13 @@ class WhalePoller:
         self._price_request_calls_total = 0
         self._recent_alerts: Deque[Tuple[int, str]] = deque(maxlen=8000)
         self._score_history_by_watch: Dict[str, Dict[str, Deque[Any]]] = {}
+        self._newest_event_ts = 0
+        self._cycle_seconds = Histogram("pequod_cycle_duration_seconds", "Wall time of a full poll cycle.")
+        self._stage_seconds = Histogram(
+            "pequod_cycle_stage_duration_seconds",
+            "Time spent per poll cycle in each pipeline stage.",
+            label_name="stage",
+        )
         self._last_cycle: Dict[str, Any] = {
             "started_at": self._started_at,
             "completed_at": self._started_at,
@@ -81,33 +123,90 @@ class WhalePoller:
             "discovered_watch_addresses": 0,
         }
 
-    def run_forever(self) -> None:
+    def run_forever(self, watcher: Optional[WatchlistWatcher] = None) -> None:
         LOG.info("Starting poller with %d watched addresses.", len(self._watchlist))
         while True:
             started = time.time()
+            if watcher is not None:
+                diff = watcher.poll()
+                if diff is not None:
+                    self.apply_watchlist_diff(diff)
             self.run_once()
             elapsed = time.time() - started
             sleep_for = max(0.0, self._poll_interval_seconds - elapsed)
             time.sleep(sleep_for)
 
     def run_once(self) -> None:
+        with span("poll.cycle", watch_count=len(self._watchlist)):
+            if self._profiler is None:
+                self._run_cycle()
+                return
+            with self._profiler.cycle():
+                self._run_cycle()
+
+    def _run_cycle(self) -> None:
         payload_addresses = [{"chain": item.chain, "address": item.address} for item in self._watchlist]
         cycle_started = int(time.time())
-        normalized_all: List[NormalizedTransaction] = []
+        cycle_started_perf = time.perf_counter()
+        clock = StageClock()
+        cycle_batch = CycleBatch()
         for batch in chunked(payload_addresses, self._max_addresses_per_request):
             try:
-                raw = self._client.wallet_transactions(batch)
+                with clock.stage("fetch", addresses=len(batch)):
+                    raw = self._client.wallet_transactions(batch)
             except AlliumError as exc:
                 LOG.error("wallet/transactions failed: %s", exc)
                 continue
 
-            normalized = normalize_transactions(raw, self._address_to_chain)
-            normalized_all.extend(normalized)
+            with clock.stage("normalize"):
+                normalize_into_batch(raw, self._address_to_chain, cycle_batch)
 
-        cycle = self._process_transactions(normalized_all)
+        cycle = self._process_batch(cycle_batch, clock=clock)
         cycle["started_at"] = cycle_started
         cycle["completed_at"] = int(time.time())
         self._commit_cycle_metrics(cycle)
+        self._dedupe_store.refresh_storage_stats()
+        self._observe_cycle_timings(clock, time.perf_counter() - cycle_started_perf)
+
+    def _observe_cycle_timings(self, clock: StageClock, elapsed_seconds: float) -> None:
+        self._cycle_seconds.observe(elapsed_seconds)
+        for stage in CYCLE_STAGES:
+            self._stage_seconds.observe(clock.totals.get(stage, 0.0), label=stage)
+
+    def apply_watchlist_diff(self, diff: WatchlistDiff) -> None:
+        removed = {watch_key(item) for item in diff.removed}
+        replaced = {watch_key(item): item for item in [*diff.added, *diff.relabeled]}
+        self._watchlist[:] = [
+            replaced.pop(watch_key(item), item)
+            for item in self._watchlist
+            if watch_key(item) not in removed
+        ]
+        self._watchlist.extend(replaced.values())
+        # Address indexes hold one entry per address; one still watched on another
+        # chain falls back to that entry instead of being dropped.
+        remaining = {item.address.lower(): item for item in self._watchlist}
+        for _, address in removed:
+            item = remaining.get(address)
+            if item is not None:
+                self._address_to_chain[address] = item.chain
+                self._address_labels[address] = item
+                continue
+            self._address_to_chain.pop(address, None)
+            self._address_labels.pop(address, None)
+            self._latest_timestamp_by_watch_address.pop(address, None)
+        cutoff = int(time.time()) - self._lookback_seconds
+        for item in [*diff.added, *diff.relabeled]:
+            address = item.address.lower()
+            self._address_to_chain[address] = item.chain
+            self._address_labels[address] = item
+            self._latest_timestamp_by_watch_address.setdefault(address, cutoff)
+        LOG.info(
+            "Applied watchlist diff: %d added, %d removed, %d relabeled (now %d watched).",
+            len(diff.added),
+            len(diff.removed),
+            len(diff.relabeled),
+            len(self._watchlist),
+        )
 
     @staticmethod
     def _normalize_address(value: Optional[str]) -> str:
@@ -226,17 +325,6 @@ class WhalePoller:
         self._score_history_by_watch[watch_key] = created
         return created
 
-    @staticmethod
-    def _median(values: Deque[Any]) -> Optional[float]:
-        numeric = [float(item) for item in values if isinstance(item, (int, float))]
-        if not numeric:
-            return None
-        ordered = sorted(numeric)
-        mid = len(ordered) // 2
-        if len(ordered) % 2 == 1:
-            return ordered[mid]
-        return (ordered[mid - 1] + ordered[mid]) / 2.0
-
     def _prune_score_history(self, watch_key: str, now_ts: int) -> Dict[str, Deque[Any]]:
         row = self._history_row(watch_key)
         while row["recent_alert_ts"] and int(row["recent_alert_ts"][0]) < now_ts - 24 * 60 * 60:
@@ -245,6 +333,15 @@ class WhalePoller:
             row["counterparties"].popleft()
         return row
 
+    @staticmethod
+    def _entities_have_exchange(entities: Dict[str, Dict[str, Any]]) -> bool:
+        for key in ("watch", "from", "to", "counterparty"):
+            entity = entities.get(key) or {}
+            tags = entity.get("tags")
+            if isinstance(tags, list) and any(str(tag).lower() == "exchange" for tag in tags):
+                return True
+        return False
+
     def _score_alert(
         self,
         tx: NormalizedTransaction,
@@ -254,50 +351,20 @@ class WhalePoller:
     ) -> Dict[str, Any]:
         watch_key = self._watch_key_for_tx(tx)
         history = self._prune_score_history(watch_key, now_ts=now_ts) if watch_key else None
-        baseline = self._median(history["usd_samples"]) if history else None
+        baseline = median(history["usd_samples"]) if history else None
         counterparty = self._counterparty_for_tx(tx)
 
-        breakdown: Dict[str, float] = {}
-        reasons: List[Dict[str, Any]] = []
-
-        magnitude = min(45.0, math.log10(max(0.0, float(usd_value)) + 10.0) * 9.0)
-        breakdown["magnitude"] = round(magnitude, 2)
-        reasons.append(
-            {
-                "key": "magnitude",
-                "label": "Large USD flow magnitude",
-                "impact": round(magnitude, 2),
-                "detail": f"{usd_value:,.2f} USD",
-            }
+        components = ScoreComponents(
+            watch_key=watch_key,
+            counterparty=counterparty,
+            usd_value=usd_value,
+            tx_type=tx.tx_type,
+            magnitude=magnitude_score(usd_value),
+            bridge=bridge_score(tx.tx_type),
+            cex=7.0 if self._entities_have_exchange(entities) else 0.0,
         )
+        components.anomaly, components.anomaly_detail = anomaly_score(usd_value, baseline)
 
-        anomaly = 0.0
-        anomaly_detail = ""
-        if baseline and baseline > 0:
-            ratio = usd_value / baseline
-            if ratio >= 8.0:
-                anomaly = 18.0
-            elif ratio >= 4.0:
-                anomaly = 12.0
-            elif ratio >= 2.0:
-                anomaly = 7.0
-            if anomaly > 0:
-                anomaly_detail = f"{ratio:.1f}x vs watch median"
-        elif usd_value >= 1_000_000:
-            anomaly = 6.0
-            anomaly_detail = "no baseline yet; absolute size is high"
-        if anomaly > 0:
-            breakdown["size_anomaly"] = anomaly
-            reasons.append(
-                {
-                    "key": "size_anomaly",
-                    "label": "Size anomaly vs recent watch flow",
-                    "impact": anomaly,
-                    "detail": anomaly_detail,
-                }
-            )
-
-        novelty = 0.0
         if counterparty and history:
             seen_recently = any(
                 str(item[1]).lower() == counterparty
@@ -305,85 +372,17 @@ class WhalePoller:
                 if isinstance(item, tuple) and len(item) == 2
             )
             if not seen_recently:
-                novelty = 10.0
-                breakdown["counterparty_novelty"] = novelty
-                reasons.append(
-                    {
-                        "key": "counterparty_novelty",
-                        "label": "New counterparty for this watched wallet",
-                        "impact": novelty,
-                        "detail": self._short_addr(counterparty),
-                    }
-                )
-
-        bridge = 0.0
-        tx_type_value = (tx.tx_type or "").lower()
-        if "bridge" in tx_type_value:
-            bridge = 8.0
-            breakdown["bridge_interaction"] = bridge
-            reasons.append(
-                {
-                    "key": "bridge_interaction",
-                    "label": "Bridge interaction",
-                    "impact": bridge,
-                    "detail": tx.tx_type,
-                }
-            )
-
-        cex = 0.0
-        has_exchange = False
-        for key in ("watch", "from", "to", "counterparty"):
-            entity = entities.get(key) or {}
-            tags = entity.get("tags")
-            if isinstance(tags, list) and any(str(tag).lower() == "exchange" for tag in tags):
-                has_exchange = True
-                break
-        if has_exchange:
-            cex = 7.0
-            breakdown["cex_interaction"] = cex
-            reasons.append(
-                {
-                    "key": "cex_interaction",
-                    "label": "Exchange-linked wallet involved",
-                    "impact": cex,
-                    "detail": "watchlist or label suggests exchange entity",
-                }
-            )
+                components.novelty = 10.0
 
-        burst = 0.0
         if history:
             burst_count = 0
             for value in history["recent_alert_ts"]:
-                if int(value) >= now_ts - 5 * 60:
+                if int(value) >= now_ts - BURST_WINDOW_SECONDS:
                     burst_count += 1
-            if burst_count >= 4:
-                burst = 8.0
-            elif burst_count >= 2:
-                burst = 4.0
-            if burst > 0:
-                breakdown["burst_activity"] = burst
-                reasons.append(
-                    {
-                        "key": "burst_activity",
-                        "label": "Burst of recent alerts on this watch",
-                        "impact": burst,
-                        "detail": f"{burst_count} alerts in 5m",
-                    }
-                )
+            components.burst_count = burst_count
+            components.burst = burst_score(burst_count)
 
-        total = max(0.0, min(100.0, magnitude + anomaly + novelty + bridge + cex + burst))
-        ranked = sorted(
-            [item for item in reasons if float(item.get("impact") or 0.0) > 0],
-            key=lambda item: float(item.get("impact") or 0.0),
-            reverse=True,
-        )
-        return {
-            "score": round(total, 2),
-            "breakdown": {key: round(float(value), 2) for key, value in breakdown.items()},
-            "reasons": ranked[:4],
-            "watch_key": watch_key,
-            "counterparty": counterparty,
-        }
+        return score_meta_from_components(components)
 
     def _record_alert_history(
         self,
@@ -400,9 +399,53 @@ class WhalePoller:
         if counterparty:
             row["counterparties"].append((int(ts), counterparty))
 
-    def _process_transactions(self, transactions: List[NormalizedTransaction]) -> Dict[str, int]:
+    def _process_transactions(
+        self,
+        transactions: List[NormalizedTransaction],
+        clock: Optional[StageClock] = None,
+        event_time: bool = False,
+    ) -> Dict[str, int]:
+        return self._process_batch(CycleBatch.from_transactions(transactions), clock=clock, event_time=event_time)
+
+    def _new_rows(self, batch: CycleBatch) -> List[int]:
+        watermarks = [self._latest_timestamp_by_watch_address.get(address) for address in batch.watches]
+        timestamps = batch.timestamps
+        rows: List[int] = []
+        for index, watch_id in enumerate(batch.watch_index):
+            if watch_id == NO_INDEX:
+                rows.append(index)
+                continue
+            watermark = watermarks[watch_id]
+            ts = timestamps[index]
+            if watermark is None or ts == TS_MISSING or ts > watermark:
+                rows.append(index)
+        return rows
+
+    def _bump_watermarks(self, batch: CycleBatch, rows: List[int]) -> None:
+        newest: Dict[int, int] = {}
+        timestamps = batch.timestamps
+        watch_index = batch.watch_index
+        for index in rows:
+            watch_id = watch_index[index]
+            ts = timestamps[index]
+            if watch_id == NO_INDEX or ts == TS_MISSING:
+                continue
+            if ts > newest.get(watch_id, TS_MISSING):
+                newest[watch_id] = ts
+        for watch_id, ts in newest.items():
+            key = batch.watches[watch_id]
+            if ts > self._latest_timestamp_by_watch_address.get(key, 0):
+                self._latest_timestamp_by_watch_address[key] = ts
+
+    def _process_batch(
+        self,
+        batch: CycleBatch,
+        clock: Optional[StageClock] = None,
+        event_time: bool = False,
+    ) -> Dict[str, int]:
+        clock = clock or StageClock()
         cycle = {
-            "events_ingested": len(transactions),
+            "events_ingested": len(batch),
             "events_new": 0,
             "events_usable": 0,
             "alerts_sent": 0,
@@ -414,69 +457,126 @@ class WhalePoller:
             "discovered_watch_addresses": 0,
         }
         discovered_in_cycle: List[WatchAddress] = []
-        new_transactions: List[NormalizedTransaction] = []
-        for tx in transactions:
-            if not self._is_new_enough(tx):
-                continue
-            new_transactions.append(tx)
-        cycle["events_new"] = len(new_transactions)
-
-        prefetch = self._prefetch_prices(new_transactions)
+        new_rows = self._new_rows(batch)
+        cycle["events_new"] = len(new_rows)
+        timestamps = batch.timestamps
+        newest_ts = max((timestamps[index] for index in new_rows if timestamps[index] != TS_MISSING), default=0)
+        if newest_ts > self._newest_event_ts:
+            self._newest_event_ts = newest_ts
+
+        usd_values, has_usd = batch.usd_values, batch.has_usd
+        amounts, has_amount = batch.amounts, batch.has_amount
+        token_index = batch.token_index
+        needs_price = [
+            index for index in new_rows if not has_usd[index] and has_amount[index] and token_index[index] != NO_INDEX
+        ]
+        with clock.stage("price"):
+            prefetch = self._prefetch_token_prices({token_index[index] for index in needs_price}, batch)
         cycle["price_items_requested"] = prefetch["price_items_requested"]
         cycle["price_items_quoted"] = prefetch["price_items_quoted"]
         cycle["price_errors"] = prefetch["price_errors"]
         cycle["price_request_calls"] = prefetch["price_request_calls"]
 
-        for tx in new_transactions:
-            usd_value = self._resolve_usd_value(tx)
+        prices: Dict[int, Optional[float]] = {}
+        for token_id in {token_index[index] for index in new_rows if token_index[index] != NO_INDEX}:
+            chain, token_address = batch.tokens[token_id]
+            quote = self._client.get_cached_price(chain, token_address)
+            prices[token_id] = quote.price if quote is not None else None
+
+        candidates: List[Tuple[int, NormalizedTransaction, float]] = []
+        dropped: List[int] = []
+        for index in new_rows:
+            usd_value: Optional[float] = None
+            if has_usd[index] and usd_values[index] >= 0:
+                usd_value = usd_values[index]
+            elif has_amount[index] and token_index[index] != NO_INDEX:
+                price = prices[token_index[index]]
+                if price is not None:
+                    usd_value = abs(amounts[index]) * price
             if usd_value is None:
-                if self._requires_price_lookup(tx):
+                if not has_usd[index] and has_amount[index] and token_index[index] != NO_INDEX:
                     cycle["price_missing"] += 1
-                self._bump_watermark(tx)
+                dropped.append(index)
                 continue
             cycle["events_usable"] += 1
             if usd_value < self._min_alert_usd:
-                self._bump_watermark(tx)
+                dropped.append(index)
                 continue
+            candidates.append((index, batch.materialize(index), usd_value))
+
+        # Dedupe before any enrichment, scoring or discovery: one store query for the
+        # whole cycle, then keys sent earlier in this cycle drop out of `unseen`.
+        dedupe_keys = [alert_dedupe_key(tx) for _, tx, _ in candidates]
+        with clock.stage("dedupe"):
+            unseen = set(self._dedupe_store.filter_unseen(dedupe_keys)) if dedupe_keys else set()
+        fresh: List[Tuple[NormalizedTransaction, float, str]] = []
+        for (index, tx, usd_value), dedupe_key in zip(candidates, dedupe_keys):
+            if dedupe_key in unseen:
+                fresh.append((tx, usd_value, dedupe_key))
+            else:
+                dropped.append(index)
+        self._bump_watermarks(batch, dropped)
 
-            discovered = self._discover_counterparties(tx=tx, usd_value=usd_value)
-            if discovered:
-                cycle["discovered_watch_addresses"] += len(discovered)
-                discovered_in_cycle.extend(discovered)
-
-            now_ts = int(time.time())
-            entities = self._enrich_entities(tx)
-            score_meta = self._score_alert(
-                tx=tx,
-                usd_value=usd_value,
-                entities=entities,
-                now_ts=now_ts,
-            )
-            alert = build_alert(
-                tx=tx,
-                usd_value=usd_value,
-                label_by_address=self._address_labels,
-                score=float(score_meta["score"]),
-                score_reasons=list(score_meta["reasons"]),
-                score_breakdown=dict(score_meta["breakdown"]),
-                entities=entities,
-                dashboard_base_url=self._dashboard_base_url,
-            )
-            if self._dedupe_store.has_seen(alert.dedupe_key):
+        now_ts = int(time.time())
+        scorer = BatchScorer(lambda key, ts: self._prune_score_history(key, now_ts=ts), now_ts=now_ts)
+        scorer.load([usd_value for _, usd_value, _ in fresh], [tx.tx_type for tx, _, _ in fresh])
+        sent_keys: List[str] = []
+        try:
+            for index, (tx, usd_value, dedupe_key) in enumerate(fresh):
+                if dedupe_key not in unseen:
+                    self._bump_watermark(tx)
+                    continue
+                discovered = self._discover_counterparties(tx=tx, usd_value=usd_value)
+                if discovered:
+                    cycle["discovered_watch_addresses"] += len(discovered)
+                    discovered_in_cycle.extend(discovered)
+
+                with clock.stage("score", tx_id=tx.tx_id):
+                    entities = self._enrich_entities(tx)
+                    # Historical rows (backfill) measure burst and baseline windows
+                    # against their own timestamp rather than the wall clock.
+                    components = scorer.score(
+                        index,
+                        watch_key=self._watch_key_for_tx(tx),
+                        counterparty=self._counterparty_for_tx(tx),
+                        has_exchange=self._entities_have_exchange(entities),
+                        now_ts=tx.timestamp if event_time and tx.timestamp is not None else None,
+                    )
+                    score_meta = score_meta_from_components(components)
+                    alert = build_alert(
+                        tx=tx,
+                        usd_value=usd_value,
+                        label_by_address=self._address_labels,
+                        score=float(score_meta["score"]),
+                        score_reasons=list(score_meta["reasons"]),
+                        score_breakdown=dict(score_meta["breakdown"]),
+                        entities=entities,
+                        dashboard_base_url=self._dashboard_base_url,
+                        dedupe_key=dedupe_key,
+                    )
+
+                self._raw_retention.apply(alert)
+                with clock.stage("sink"):
+                    self._sink.send(alert)
+                sent_keys.append(dedupe_key)
+                unseen.discard(dedupe_key)
+                cycle["alerts_sent"] += 1
+                self._record_alert_history(
+                    watch_key=components.watch_key,
+                    counterparty=components.counterparty,
+                    usd_value=usd_value,
+                    ts=alert.timestamp if isinstance(alert.timestamp, int) else now_ts,
+                )
+                scorer.invalidate(components.watch_key)
+                self._mark_alert_activity(alert)
                 self._bump_watermark(tx)
-                continue
+        finally:
+            if sent_keys:
+                with clock.stage("sink"):
+                    self._sink.flush()
+                with clock.stage("dedupe"):
+                    self._dedupe_store.mark_seen_many(sent_keys)
 
-            self._sink.send(alert)
-            self._dedupe_store.mark_seen(alert.dedupe_key)
-            cycle["alerts_sent"] += 1
-            self._record_alert_history(
-                watch_key=str(score_meta.get("watch_key") or ""),
-                counterparty=str(score_meta.get("counterparty") or ""),
-                usd_value=usd_value,
-                ts=alert.timestamp if isinstance(alert.timestamp, int) else now_ts,
-            )
-            self._mark_alert_activity(alert)
-            self._bump_watermark(tx)
         if discovered_in_cycle and self._on_discovered_watch_addresses:
             try:
                 self._on_discovered_watch_addresses(discovered_in_cycle)
@@ -484,16 +584,6 @@ class WhalePoller:
                 LOG.exception("Discovered-watch callback failed for %d addresses.", len(discovered_in_cycle))
         return cycle
 
-    def _is_new_enough(self, tx: NormalizedTransaction) -> bool:
-        if not tx.watch_address:
-            return True
-        current = self._latest_timestamp_by_watch_address.get(tx.watch_address.lower())
-        if current is None:
-            return True
-        if tx.timestamp is None:
-            return True
-        return tx.timestamp > current
-
     def _bump_watermark(self, tx: NormalizedTransaction) -> None:
         if not tx.watch_address or tx.timestamp is None:
             return
@@ -502,30 +592,10 @@ class WhalePoller:
         if tx.timestamp > current:
             self._latest_timestamp_by_watch_address[key] = tx.timestamp
 
-    def _resolve_usd_value(self, tx: NormalizedTransaction) -> Optional[float]:
-        if tx.usd_value is not None and tx.usd_value >= 0:
-            return tx.usd_value
-
-        if tx.amount is None or tx.token_address is None:
-            return None
-
-        cached = self._client.get_cached_price(tx.chain, tx.token_address)
-
-        if cached is None:
-            return None
-        return abs(tx.amount) * cached.price
-
-    @staticmethod
-    def _requires_price_lookup(tx: NormalizedTransaction) -> bool:
-        return tx.usd_value is None and tx.amount is not None and tx.token_address is not None
-
-    def _prefetch_prices(self, transactions: List[NormalizedTransaction]) -> Dict[str, int]:
+    def _prefetch_token_prices(self, token_ids: Set[int], batch: CycleBatch) -> Dict[str, int]:
         unique_tokens: Set[Tuple[str, str]] = set()
-        for tx in transactions:
-            if not self._requires_price_lookup(tx):
-                continue
-            chain = tx.chain.lower()
-            token_address = tx.token_address.lower() if tx.token_address else ""
+        for token_id in token_ids:
+            chain, token_address = batch.tokens[token_id]
             if not chain or not token_address:
                 continue
             if self._client.get_cached_price(chain, token_address) is not None:
@@ -662,4 +732,53 @@ class WhalePoller:
                 "events_per_min": events_1m,
                 "active_whales_5m": len(active_whales_5m),
                 "last_cycle": dict(self._last_cycle),
+                "dedupe_cache": self._dedupe_store.cache_stats(),
+                "dedupe_store": self._dedupe_store.storage_stats(),
+                "sinks": self._sink.stats(),
             }
+
+    def render_prometheus(self, writer: PrometheusWriter) -> None:
+        snapshot = self.metrics_snapshot()
+        now_ts = time.time()
+        for key in COUNTER_KEYS:
+            writer.counter(f"pequod_{key}_total", COUNTER_HELP[key], snapshot.get(key, 0))
+        writer.gauge("pequod_start_time_seconds", "Unix time the poller started.", snapshot.get("started_at", 0))
+        writer.gauge("pequod_watch_addresses", "Addresses currently on the watch set.", len(self._watchlist))
+        writer.gauge("pequod_price_miss_rate", "Share of requested price items that had no quote.", snapshot.get("price_miss_rate", 0.0))
+        writer.gauge("pequod_events_per_min", "Alerts emitted in the last minute.", snapshot.get("events_per_min", 0))
+        writer.gauge("pequod_active_whales_5m", "Distinct watch addresses alerted in the last five minutes.", snapshot.get("active_whales_5m", 0))
+        completed_at = int(snapshot.get("last_cycle", {}).get("completed_at") or 0)
+        writer.gauge("pequod_last_cycle_completed_seconds", "Unix time the last poll cycle completed.", completed_at)
+        writer.gauge(
+            "pequod_cycle_lag_seconds",
+            "Seconds since the last poll cycle completed.",
+            max(0.0, now_ts - completed_at) if completed_at else 0.0,
+        )
+        newest_event_ts = self._newest_event_ts
+        writer.gauge(
+            "pequod_event_lag_seconds",
+            "Seconds between now and the newest event timestamp seen by the poller.",
+            max(0.0, now_ts - newest_event_ts) if newest_event_ts else 0.0,
+        )
+        dedupe_cache = snapshot.get("dedupe_cache", {})
+        writer.header("pequod_dedupe_lookups_total", "Dedupe key lookups by the tier that answered them.", "counter")
+        for tier, key in (("bloom", "bloom_negatives"), ("lru", "lru_hits"), ("sqlite", "sqlite_lookups")):
+            writer.sample("pequod_dedupe_lookups_total", dedupe_cache.get(key, 0), [("tier", tier)])
+        writer.gauge(
+            "pequod_dedupe_cache_hit_ratio",
+            "Share of dedupe lookups answered by the Bloom filter or LRU without SQLite.",
+            dedupe_cache.get("cache_hit_ratio", 0.0),
+        )
+        writer.gauge("pequod_dedupe_bloom_keys", "Keys loaded into the dedupe Bloom filter.", dedupe_cache.get("bloom_keys", 0))
+        dedupe_store = snapshot.get("dedupe_store", {})
+        writer.gauge("pequod_dedupe_rows", "Rows in the seen_alerts table.", dedupe_store.get("rows", 0))
+        writer.gauge("pequod_dedupe_db_bytes", "Size of the dedupe database file.", dedupe_store.get("db_bytes", 0))
+        writer.gauge("pequod_dedupe_wal_bytes", "Size of the dedupe write-ahead log.", dedupe_store.get("wal_bytes", 0))
+        writer.counter(
+            "pequod_dedupe_compacted_total",
+            "Expired dedupe keys deleted by the compactor.",
+            dedupe_store.get("deleted_total", 0),
+        )
+        self._sink.render_prometheus(writer)
+        self._cycle_seconds.render(writer)
+        self._stage_seconds.render(writer)
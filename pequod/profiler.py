@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import cProfile
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+LOG = logging.getLogger(__name__)
+
+MAX_ARMED_CYCLES = 100
+PROFILE_NAME_RE = re.compile(r"^cycle-\d+-\d+\.pstats$")
+
+
+class CycleProfiler:
+    def __init__(self, output_dir: Path, max_files: int = 50) -> None:
+        self._output_dir = output_dir
+        self._max_files = max(1, int(max_files))
+        self._lock = threading.Lock()
+        self._remaining = 0
+        self._sequence = 0
+
+    @property
+    def remaining(self) -> int:
+        return self._remaining
+
+    def arm(self, cycles: int) -> int:
+        with self._lock:
+            self._remaining = max(0, min(MAX_ARMED_CYCLES, int(cycles)))
+            remaining = self._remaining
+        if remaining:
+            LOG.info("Profiling armed for the next %d poll cycles.", remaining)
+        return remaining
+
+    def _take(self) -> Optional[int]:
+        with self._lock:
+            if self._remaining <= 0:
+                return None
+            self._remaining -= 1
+            self._sequence += 1
+            return self._sequence
+
+    @contextmanager
+    def cycle(self) -> Iterator[None]:
+        if self._remaining <= 0:
+            yield
+            return
+        sequence = self._take()
+        if sequence is None:
+            yield
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._save(profile, sequence)
+
+    def _save(self, profile: cProfile.Profile, sequence: int) -> None:
+        try:
+            self._output_dir.mkdir(parents=True, exist_ok=True)
+            target = self._output_dir / f"cycle-{int(time.time())}-{sequence}.pstats"
+            profile.dump_stats(str(target))
+        except OSError as exc:
+            LOG.warning("Could not write cycle profile: %s", exc)
+            return
+        LOG.info("Saved poll cycle profile to %s.", target)
+        self._prune()
+
+    def _prune(self) -> None:
+        files = self._profile_files()
+        for stale in files[: max(0, len(files) - self._max_files)]:
+            try:
+                stale.unlink()
+            except OSError:
+                continue
+
+    def _profile_files(self) -> List[Path]:
+        if not self._output_dir.exists():
+            return []
+        files = [path for path in self._output_dir.iterdir() if PROFILE_NAME_RE.match(path.name)]
+        return sorted(files, key=lambda path: path.stat().st_mtime)
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        for path in reversed(self._profile_files()):
+            stat = path.stat()
+            rows.append({"name": path.name, "size_bytes": stat.st_size, "created_at": int(stat.st_mtime)})
+        return rows
+
+    def profile_path(self, name: str) -> Optional[Path]:
+        if not PROFILE_NAME_RE.match(name):
+            return None
+        target = self._output_dir / name
+        if not target.is_file():
+            return None
+        return target
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable
+
+MAX_RATE_WAIT_SECONDS = 30.0
+# Shorter waits are clock rounding left over from the last refill, not throttling.
+WAIT_TOLERANCE_SECONDS = 0.001
+
+
+class RateLimitedError(Exception):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"rate limited, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+# Token bucket for one platform endpoint (a Telegram chat, a Discord webhook). It
+# starts from the configured rate and learns from the platform: a 429 pauses it for
+# the advertised retry_after and halves the rate, and each accepted request earns a
+# tenth of the configured rate back.
+class RateLimiter:
+    def __init__(
+        self,
+        rate_per_minute: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._base_rate = max(0.01, float(rate_per_minute)) / 60.0
+        self._rate = self._base_rate
+        self._capacity = float(max(1, int(burst)))
+        self._tokens = self._capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def rate_per_minute(self) -> float:
+        return self._rate * 60.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def available(self) -> int:
+        with self._lock:
+            now = self._clock()
+            if now < self._blocked_until:
+                return 0
+            self._refill(now)
+            return int(self._tokens)
+
+    def acquire(self, max_wait: float = MAX_RATE_WAIT_SECONDS) -> None:
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            wait = max(self._blocked_until - now, 0.0, (1.0 - self._tokens) / self._rate)
+            if wait > max_wait + WAIT_TOLERANCE_SECONDS:
+                raise RateLimitedError(wait)
+            self._tokens -= 1.0
+        if wait > 0:
+            self._sleep(wait)
+
+    def block_for(self, seconds: float) -> None:
+        with self._lock:
+            now = self._clock()
+            self._blocked_until = max(self._blocked_until, now + max(0.0, seconds))
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = max(self._updated, now)
+
+    def penalize(self, retry_after: float) -> None:
+        self.block_for(retry_after)
+        with self._lock:
+            self._rate = max(self._base_rate / 8.0, self._rate / 2.0)
+
+    def reward(self) -> None:
+        with self._lock:
+            self._rate = min(self._base_rate, self._rate + self._base_rate / 10.0)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import zlib
+from collections.abc import Mapping
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .types import Alert, materialize_raw
+
+LOG = logging.getLogger(__name__)
+
+RAW_RETENTION_POLICIES = ("auto", "memory", "drop", "compressed", "disk")
+RAW_BLOB_MAX = 20_000
+EMPTY_RAW: Mapping[str, Any] = MappingProxyType({})
+
+
+def _encode(raw: Mapping[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(materialize_raw(raw), separators=(",", ":"), default=str).encode("utf-8"))
+
+
+def _decode(blob: bytes) -> Dict[str, Any]:
+    payload = json.loads(zlib.decompress(blob).decode("utf-8"))
+    return payload if isinstance(payload, dict) else {}
+
+
+class CompressedRaw(Mapping[str, Any]):
+    __slots__ = ("_blob",)
+
+    def __init__(self, raw: Mapping[str, Any]) -> None:
+        self._blob = _encode(raw)
+
+    @property
+    def compressed_size(self) -> int:
+        return len(self._blob)
+
+    def materialize(self) -> Dict[str, Any]:
+        return _decode(self._blob)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.materialize()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.materialize())
+
+    def __len__(self) -> int:
+        return len(self.materialize())
+
+
+# One zlib JSON blob per dedupe key, pruned oldest-first once there are more than
+# max_blobs. Keys returned by `pinned` (alerts still waiting in the outbox) are never
+# pruned, even if that keeps the directory above the limit.
+class RawBlobStore:
+    def __init__(self, directory: Path, max_blobs: int = RAW_BLOB_MAX) -> None:
+        self._directory = directory
+        self._max_blobs = max(1, int(max_blobs))
+        self.pinned: Optional[Callable[[], Iterable[str]]] = None
+        self._lock = threading.Lock()
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._count = len(self._blob_files())
+
+    def _path_for(self, dedupe_key: str) -> Path:
+        return self._directory / f"{hashlib.sha1(dedupe_key.encode('utf-8')).hexdigest()}.json.z"
+
+    def _blob_files(self) -> List[Path]:
+        return [path for path in self._directory.iterdir() if path.name.endswith(".json.z")]
+
+    def put(self, dedupe_key: str, raw: Mapping[str, Any]) -> None:
+        target = self._path_for(dedupe_key)
+        blob = _encode(raw)
+        with self._lock:
+            existed = target.exists()
+            tmp_path = target.with_suffix(".tmp")
+            tmp_path.write_bytes(blob)
+            tmp_path.replace(target)
+            if not existed:
+                self._count += 1
+            if self._count > self._max_blobs + self._max_blobs // 10:
+                self._prune(target.name)
+
+    def get(self, dedupe_key: str) -> Optional[Dict[str, Any]]:
+        try:
+            blob = self._path_for(dedupe_key).read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as exc:
+            LOG.warning("Could not read raw blob for %s: %s", dedupe_key, exc)
+            return None
+        return _decode(blob)
+
+    def _prune(self, just_written: str) -> None:
+        files = self._blob_files()
+        pinned = {self._path_for(key).name for key in self.pinned()} if self.pinned is not None else set()
+        pinned.add(just_written)
+        prunable = sorted((path for path in files if path.name not in pinned), key=lambda path: path.stat().st_mtime)
+        for stale in prunable[: max(0, len(files) - self._max_blobs)]:
+            try:
+                stale.unlink()
+            except OSError:
+                continue
+        self._count = len(self._blob_files())
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+
+class BlobRaw(Mapping[str, Any]):
+    __slots__ = ("_store", "_dedupe_key")
+
+    def __init__(self, store: RawBlobStore, dedupe_key: str) -> None:
+        self._store = store
+        self._dedupe_key = dedupe_key
+
+    @property
+    def dedupe_key(self) -> str:
+        return self._dedupe_key
+
+    def materialize(self) -> Dict[str, Any]:
+        return self._store.get(self._dedupe_key) or {}
+
+    def __getitem__(self, key: str) -> Any:
+        return self.materialize()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.materialize())
+
+    def __len__(self) -> int:
+        return len(self.materialize())
+
+
+class RawRetention:
+    def __init__(self, policy: str = "memory", blob_store: Optional[RawBlobStore] = None) -> None:
+        policy = policy.strip().lower()
+        if policy not in RAW_RETENTION_POLICIES or policy == "auto":
+            raise ValueError(f"Unknown raw retention policy {policy!r} (expected memory, drop, compressed or disk)")
+        if policy == "disk" and blob_store is None:
+            raise ValueError("Raw retention policy 'disk' needs a blob store")
+        self.policy = policy
+        self._blob_store = blob_store
+
+    @property
+    def blob_store(self) -> Optional[RawBlobStore]:
+        return self._blob_store
+
+    def apply(self, alert: Alert) -> Alert:
+        if self.policy == "memory":
+            return alert
+        if self.policy == "drop":
+            alert.raw = EMPTY_RAW
+        elif self.policy == "compressed":
+            alert.raw = CompressedRaw(alert.raw)
+        elif self._blob_store is not None:
+            self._blob_store.put(alert.dedupe_key, alert.raw)
+            alert.raw = BlobRaw(self._blob_store, alert.dedupe_key)
+        return alert
+
+
+def build_raw_retention(
+    policy: str,
+    sink_requires_raw: bool,
+    blob_dir: Path,
+    max_blobs: int = RAW_BLOB_MAX,
+) -> RawRetention:
+    policy = policy.strip().lower()
+    if policy == "auto":
+        policy = "memory" if sink_requires_raw else "drop"
+    if policy == "disk":
+        return RawRetention(policy, RawBlobStore(blob_dir, max_blobs=max_blobs))
+    return RawRetention(policy)
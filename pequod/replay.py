@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import resource
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .allium_client import PriceQuote
+from .dashboard_state import DashboardSink, DashboardState
+from .dedupe import DedupeStore
+from .poller import WhalePoller
+from .sinks import AlertSink, MultiSink, NullSink
+from .tx_extractors import normalize_transactions
+from .types import Alert, WatchAddress
+from .watchlist import load_watchlist
+
+LOG = logging.getLogger(__name__)
+
+
+class ReplayClient:
+    def __init__(self, prices_by_key: Optional[Dict[str, float]] = None) -> None:
+        self._prices_by_key = {key.lower(): float(value) for key, value in (prices_by_key or {}).items()}
+
+    def prices(self, tokens: List[Dict[str, str]]) -> List[PriceQuote]:
+        quotes: List[PriceQuote] = []
+        for item in tokens:
+            quote = self.get_cached_price(item.get("chain", ""), item.get("token_address", ""))
+            if quote is not None:
+                quotes.append(quote)
+        return quotes
+
+    def get_cached_price(self, chain: str, token_address: str, ttl_seconds: int = 60) -> Optional[PriceQuote]:
+        price = self._prices_by_key.get(f"{chain.lower()}:{token_address.lower()}")
+        if price is None:
+            return None
+        return PriceQuote(chain=chain.lower(), token_address=token_address.lower(), price=price, symbol=None)
+
+
+class LatencySink(AlertSink):
+    def __init__(self) -> None:
+        self.payload_started = 0.0
+        self.latencies: List[float] = []
+
+    def send(self, alert: Alert) -> None:
+        self.latencies.append(time.perf_counter() - self.payload_started)
+
+
+def read_payloads(path: Path) -> Iterator[Any]:
+    with path.open("r", encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                LOG.warning("Skipping malformed payload on line %d: %s", line_number, exc)
+
+
+def _watchlist_from_payloads(payloads: List[Any]) -> List[WatchAddress]:
+    seen: Dict[str, WatchAddress] = {}
+    for payload in payloads:
+        rows = payload if isinstance(payload, list) else [payload]
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            address = row.get("address")
+            if isinstance(address, str) and address and address.lower() not in seen:
+                chain = str(row.get("chain") or "ethereum").lower()
+                seen[address.lower()] = WatchAddress(chain=chain, address=address, label=address)
+    return list(seen.values())
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+def replay(
+    payloads: Iterable[Any],
+    watchlist: List[WatchAddress],
+    dedupe_db_path: Path,
+    min_alert_usd: float,
+    prices_by_key: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    payload_list = list(payloads)
+    if not watchlist:
+        watchlist = _watchlist_from_payloads(payload_list)
+    address_to_chain = {item.address.lower(): item.chain for item in watchlist}
+    state = DashboardState(watchlist=watchlist)
+    latency_sink = LatencySink()
+    dedupe_store = DedupeStore(dedupe_db_path)
+    poller = WhalePoller(
+        client=ReplayClient(prices_by_key),  # type: ignore[arg-type]
+        watchlist=list(watchlist),
+        dedupe_store=dedupe_store,
+        sink=MultiSink([DashboardSink(state), NullSink(), latency_sink]),
+        min_alert_usd=min_alert_usd,
+        max_addresses_per_request=20,
+        poll_interval_seconds=30,
+        lookback_seconds=int(time.time()),
+    )
+
+    events = 0
+    alerts = 0
+    started = time.perf_counter()
+    try:
+        for payload in payload_list:
+            latency_sink.payload_started = time.perf_counter()
+            normalized = normalize_transactions(payload, address_to_chain)
+            cycle = poller._process_transactions(normalized)
+            events += int(cycle.get("events_ingested", 0))
+            alerts += int(cycle.get("alerts_sent", 0))
+    finally:
+        dedupe_store.close()
+    elapsed = max(1e-9, time.perf_counter() - started)
+
+    return {
+        "payloads": len(payload_list),
+        "events": events,
+        "alerts": alerts,
+        "elapsed_seconds": round(elapsed, 6),
+        "events_per_second": round(events / elapsed, 2),
+        "alerts_per_second": round(alerts / elapsed, 2),
+        "alert_latency_p50_ms": round(percentile(latency_sink.latencies, 50) * 1000.0, 3),
+        "alert_latency_p99_ms": round(percentile(latency_sink.latencies, 99) * 1000.0, 3),
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(
+        prog="python -m pequod replay",
+        description="Replay recorded wallet/transactions payloads through the alert pipeline and report throughput.",
+    )
+    parser.add_argument("path", help="JSONL file, one recorded wallet/transactions response per line")
+    parser.add_argument("--watchlist", default=None, help="Watchlist file (default: addresses found in the payloads)")
+    parser.add_argument("--prices", default=None, help='JSON object of {"chain:token_address": usd_price}')
+    parser.add_argument("--min-alert-usd", type=float, default=10_000.0)
+    parser.add_argument("--output", default=None, help="Also write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    watchlist = load_watchlist(Path(args.watchlist)) if args.watchlist else []
+    prices: Dict[str, float] = {}
+    if args.prices:
+        prices = json.loads(Path(args.prices).read_text(encoding="utf-8"))
+    with TemporaryDirectory(prefix="pequod-replay-") as tmp:
+        report = replay(
+            read_payloads(Path(args.path)),
+            watchlist=watchlist,
+            dedupe_db_path=Path(tmp) / "dedupe.sqlite3",
+            min_alert_usd=args.min_alert_usd,
+            prices_by_key=prices,
+        )
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    return 0
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import math
+from array import array
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Set
+
+BURST_WINDOW_SECONDS = 5 * 60
+
+
+@dataclass
+class ScoreComponents:
+    watch_key: str
+    counterparty: str
+    usd_value: float
+    tx_type: str
+    magnitude: float
+    anomaly: float = 0.0
+    anomaly_detail: str = ""
+    novelty: float = 0.0
+    bridge: float = 0.0
+    cex: float = 0.0
+    burst: float = 0.0
+    burst_count: int = 0
+
+    @property
+    def total(self) -> float:
+        return max(
+            0.0,
+            min(100.0, self.magnitude + self.anomaly + self.novelty + self.bridge + self.cex + self.burst),
+        )
+
+
+def _short_addr(value: str) -> str:
+    if not value:
+        return "unknown"
+    if len(value) <= 14:
+        return value
+    return f"{value[:8]}...{value[-6:]}"
+
+
+def magnitude_score(usd_value: float) -> float:
+    return min(45.0, math.log10(max(0.0, float(usd_value)) + 10.0) * 9.0)
+
+
+def bridge_score(tx_type: Optional[str]) -> float:
+    return 8.0 if "bridge" in (tx_type or "").lower() else 0.0
+
+
+def anomaly_score(usd_value: float, baseline: Optional[float]) -> tuple[float, str]:
+    if baseline and baseline > 0:
+        ratio = usd_value / baseline
+        anomaly = 0.0
+        if ratio >= 8.0:
+            anomaly = 18.0
+        elif ratio >= 4.0:
+            anomaly = 12.0
+        elif ratio >= 2.0:
+            anomaly = 7.0
+        if anomaly > 0:
+            return anomaly, f"{ratio:.1f}x vs watch median"
+        return 0.0, ""
+    if usd_value >= 1_000_000:
+        return 6.0, "no baseline yet; absolute size is high"
+    return 0.0, ""
+
+
+def burst_score(burst_count: int) -> float:
+    if burst_count >= 4:
+        return 8.0
+    if burst_count >= 2:
+        return 4.0
+    return 0.0
+
+
+def median(values: Deque[Any]) -> Optional[float]:
+    numeric = [float(item) for item in values if isinstance(item, (int, float))]
+    if not numeric:
+        return None
+    ordered = sorted(numeric)
+    mid = len(ordered) // 2
+    if len(ordered) % 2 == 1:
+        return ordered[mid]
+    return (ordered[mid - 1] + ordered[mid]) / 2.0
+
+
+def score_meta_from_components(components: ScoreComponents) -> Dict[str, Any]:
+    breakdown: Dict[str, float] = {}
+    reasons: List[Dict[str, Any]] = []
+
+    breakdown["magnitude"] = round(components.magnitude, 2)
+    reasons.append(
+        {
+            "key": "magnitude",
+            "label": "Large USD flow magnitude",
+            "impact": round(components.magnitude, 2),
+            "detail": f"{components.usd_value:,.2f} USD",
+        }
+    )
+    if components.anomaly > 0:
+        breakdown["size_anomaly"] = components.anomaly
+        reasons.append(
+            {
+                "key": "size_anomaly",
+                "label": "Size anomaly vs recent watch flow",
+                "impact": components.anomaly,
+                "detail": components.anomaly_detail,
+            }
+        )
+    if components.novelty > 0:
+        breakdown["counterparty_novelty"] = components.novelty
+        reasons.append(
+            {
+                "key": "counterparty_novelty",
+                "label": "New counterparty for this watched wallet",
+                "impact": components.novelty,
+                "detail": _short_addr(components.counterparty),
+            }
+        )
+    if components.bridge > 0:
+        breakdown["bridge_interaction"] = components.bridge
+        reasons.append(
+            {
+                "key": "bridge_interaction",
+                "label": "Bridge interaction",
+                "impact": components.bridge,
+                "detail": components.tx_type,
+            }
+        )
+    if components.cex > 0:
+        breakdown["cex_interaction"] = components.cex
+        reasons.append(
+            {
+                "key": "cex_interaction",
+                "label": "Exchange-linked wallet involved",
+                "impact": components.cex,
+                "detail": "watchlist or label suggests exchange entity",
+            }
+        )
+    if components.burst > 0:
+        breakdown["burst_activity"] = components.burst
+        reasons.append(
+            {
+                "key": "burst_activity",
+                "label": "Burst of recent alerts on this watch",
+                "impact": components.burst,
+                "detail": f"{components.burst_count} alerts in 5m",
+            }
+        )
+
+    ranked = sorted(
+        [item for item in reasons if float(item.get("impact") or 0.0) > 0],
+        key=lambda item: float(item.get("impact") or 0.0),
+        reverse=True,
+    )
+    return {
+        "score": round(components.total, 2),
+        "breakdown": {key: round(float(value), 2) for key, value in breakdown.items()},
+        "reasons": ranked[:4],
+        "watch_key": components.watch_key,
+        "counterparty": components.counterparty,
+    }
+
+
+class _WatchStats:
+    __slots__ = ("now_ts", "baseline", "burst_count", "counterparties")
+
+    def __init__(self, history: Dict[str, Deque[Any]], now_ts: int) -> None:
+        self.now_ts = now_ts
+        self.baseline = median(history["usd_samples"])
+        cutoff = now_ts - BURST_WINDOW_SECONDS
+        self.burst_count = sum(1 for value in history["recent_alert_ts"] if int(value) >= cutoff)
+        self.counterparties: Set[str] = {
+            str(item[1]).lower()
+            for item in history["counterparties"]
+            if isinstance(item, tuple) and len(item) == 2
+        }
+
+
+class BatchScorer:
+    def __init__(
+        self,
+        history_for: Callable[[str, int], Dict[str, Deque[Any]]],
+        now_ts: int,
+    ) -> None:
+        self._history_for = history_for
+        self._now_ts = now_ts
+        self._usd_values = array("d")
+        self._tx_types: List[str] = []
+        self._magnitude = array("d")
+        self._bridge = array("d")
+        self._stats_by_watch: Dict[str, _WatchStats] = {}
+
+    def load(self, usd_values: Sequence[float], tx_types: Sequence[str]) -> None:
+        self._usd_values = array("d", (float(value) for value in usd_values))
+        self._tx_types = list(tx_types)
+        self._magnitude = array("d", map(magnitude_score, self._usd_values))
+        self._bridge = array("d", map(bridge_score, self._tx_types))
+
+    def __len__(self) -> int:
+        return len(self._usd_values)
+
+    def _stats(self, watch_key: str, now_ts: int) -> _WatchStats:
+        stats = self._stats_by_watch.get(watch_key)
+        if stats is None or stats.now_ts != now_ts:
+            stats = _WatchStats(self._history_for(watch_key, now_ts), now_ts)
+            self._stats_by_watch[watch_key] = stats
+        return stats
+
+    def invalidate(self, watch_key: str) -> None:
+        self._stats_by_watch.pop(watch_key, None)
+
+    def score(
+        self,
+        index: int,
+        watch_key: str,
+        counterparty: str,
+        has_exchange: bool,
+        now_ts: Optional[int] = None,
+    ) -> ScoreComponents:
+        # `now_ts` scores one row at its own clock (event time during backfill);
+        # cached watch stats are rebuilt when it moves.
+        usd_value = self._usd_values[index]
+        components = ScoreComponents(
+            watch_key=watch_key,
+            counterparty=counterparty,
+            usd_value=usd_value,
+            tx_type=self._tx_types[index],
+            magnitude=self._magnitude[index],
+            bridge=self._bridge[index],
+            cex=7.0 if has_exchange else 0.0,
+        )
+        stats = self._stats(watch_key, self._now_ts if now_ts is None else now_ts) if watch_key else None
+        components.anomaly, components.anomaly_detail = anomaly_score(
+            usd_value,
+            stats.baseline if stats else None,
+        )
+        if stats is None:
+            return components
+        if counterparty and counterparty not in stats.counterparties:
+            components.novelty = 10.0
+        components.burst_count = stats.burst_count
+        components.burst = burst_score(stats.burst_count)
+        return components
@@ -1,20 +1,61 @@
 from __future__ import annotations
 
 import json
+import logging
+import queue
 import sys
-import urllib.error
-import urllib.request
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Type
 
-from .types import Alert
+from .http_transport import HttpStatusError, HttpTransport, PermanentSinkError, TransportError
+from .metrics import Histogram, PrometheusWriter
+from .ratelimit import MAX_RATE_WAIT_SECONDS, RateLimitedError, RateLimiter
+from .tracing import SpanContext, current_context, span
+from .types import Alert, materialize_raw
+
+LOG = logging.getLogger(__name__)
+
+SINK_LATENCY_BUCKETS = (0.001, 0.005, 0.025, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+
+# Platform limits for bundled messages.
+TELEGRAM_MAX_MESSAGE_CHARS = 4096
+DISCORD_MAX_CONTENT_CHARS = 2000
+DISCORD_MAX_EMBEDS = 10
+DISCORD_MAX_EMBED_CHARS = 4096
+DISCORD_MAX_EMBED_TOTAL_CHARS = 6000
+BUNDLE_SEPARATOR = "\n\n"
+RATE_LIMIT_BURST = 3
+# Rate-limit waits an inline dispatcher sits out per alert before giving up on it.
+RATE_LIMIT_RETRIES = 2
 
 
 class AlertSink(ABC):
+    requires_raw = False
+    # Most alerts a queue worker hands to send_many at once.
+    max_batch = 1
+
     @abstractmethod
     def send(self, alert: Alert) -> None:
         raise NotImplementedError
 
+    def send_many(self, alerts: List[Alert]) -> None:
+        for alert in alerts:
+            self.send(alert)
+
+    # Called once at the end of each poll cycle that delivered alerts.
+    def flush(self) -> None:
+        return None
+
+    # Delivery state surfaced in the poller's metrics snapshot and /metrics.
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+    def render_prometheus(self, writer: PrometheusWriter) -> None:
+        return None
+
 
 class ConsoleSink(AlertSink):
     def send(self, alert: Alert) -> None:
@@ -22,58 +63,286 @@ class ConsoleSink(AlertSink):
         print("-" * 80)
 
 
-class TelegramSink(AlertSink):
-    def __init__(self, bot_token: str, chat_id: str, timeout_seconds: int) -> None:
-        self._bot_token = bot_token
-        self._chat_id = chat_id
-        self._timeout_seconds = timeout_seconds
+class NullSink(AlertSink):
+    def send(self, alert: Alert) -> None:
+        return
+
+
+class AlertLogSink(AlertSink):
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
 
     def send(self, alert: Alert) -> None:
-        payload = {"chat_id": self._chat_id, "text": alert.text}
-        self._post_json(
-            f"https://api.telegram.org/bot{self._bot_token}/sendMessage",
-            payload,
-            timeout_seconds=self._timeout_seconds,
+        line = json.dumps(alert_record(alert), sort_keys=True)
+        with self._lock:
+            with self._path.open("a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+
+
+def alert_record(alert: Alert) -> Dict[str, object]:
+    return {
+        "dedupe_key": alert.dedupe_key,
+        "text": alert.text,
+        "usd_value": alert.usd_value,
+        "score": alert.score,
+        "score_reasons": alert.score_reasons,
+        "score_breakdown": alert.score_breakdown,
+        "tx_id": alert.tx_id,
+        "chain": alert.chain,
+        "tx_type": alert.tx_type,
+        "timestamp": alert.timestamp,
+        "watch_address": alert.watch_address,
+        "from_address": alert.from_address,
+        "to_address": alert.to_address,
+        "token_symbol": alert.token_symbol,
+        "token_address": alert.token_address,
+        "amount": alert.amount,
+        "entities": alert.entities,
+        "deep_link": alert.deep_link,
+    }
+
+
+# `raw_ref` names a raw blob kept elsewhere (PEQUOD_RAW_RETENTION=disk) instead of
+# copying the payload into the record; decode_alert hands it to `resolve_raw`.
+def encode_alert(alert: Alert, include_raw: bool, raw_ref: Optional[str] = None) -> str:
+    record = alert_record(alert)
+    record["raw"] = materialize_raw(alert.raw) if include_raw and raw_ref is None else {}
+    if raw_ref is not None:
+        record["raw_ref"] = raw_ref
+    return json.dumps(record, separators=(",", ":"), default=str)
+
+
+def decode_alert(payload: str, resolve_raw: Optional[Callable[[str], Mapping[str, Any]]] = None) -> Alert:
+    record = json.loads(payload)
+    raw_ref = record.get("raw_ref")
+    raw = resolve_raw(raw_ref) if raw_ref and resolve_raw is not None else record.get("raw") or {}
+    return Alert(
+        dedupe_key=record["dedupe_key"],
+        text=record["text"],
+        usd_value=float(record["usd_value"]),
+        tx_id=record["tx_id"],
+        chain=record["chain"],
+        tx_type=record["tx_type"],
+        timestamp=record.get("timestamp"),
+        watch_address=record.get("watch_address"),
+        from_address=record.get("from_address"),
+        to_address=record.get("to_address"),
+        token_symbol=record.get("token_symbol"),
+        token_address=record.get("token_address"),
+        amount=record.get("amount"),
+        raw=raw,
+        score=float(record.get("score") or 0.0),
+        score_reasons=list(record.get("score_reasons") or []),
+        score_breakdown=dict(record.get("score_breakdown") or {}),
+        entities=dict(record.get("entities") or {}),
+        deep_link=record.get("deep_link"),
+    )
+
+
+def _pack(alerts: List[Alert], max_items: int, max_chars: int, size: Callable[[Alert], int]) -> List[List[Alert]]:
+    bundles: List[List[Alert]] = []
+    current: List[Alert] = []
+    used = 0
+    for alert in alerts:
+        cost = min(size(alert), max_chars)
+        if current and (len(current) >= max_items or used + cost > max_chars):
+            bundles.append(current)
+            current, used = [], 0
+        current.append(alert)
+        used += cost
+    if current:
+        bundles.append(current)
+    return bundles
+
+
+# Raised by send_many when the first `delivered` alerts were accepted before a
+# failure, so the caller retries only the rest and nobody gets duplicates. A
+# permanent `error` still means the next alert is given up, not retried.
+class PartialDeliveryError(Exception):
+    def __init__(self, delivered: int, error: Exception) -> None:
+        super().__init__(f"{delivered} alerts delivered before: {error}")
+        self.delivered = delivered
+        self.error = error
+
+    @property
+    def retry_after(self) -> float:
+        return float(getattr(self.error, "retry_after", 0.0))
+
+
+# Failures worth retrying later: the endpoint was unreachable, slow or rate limited.
+SINK_NETWORK_ERRORS = (TransportError, TimeoutError, RateLimitedError, PartialDeliveryError)
+
+
+# The error behind a partial delivery, or the error itself.
+def failure_cause(exc: BaseException) -> BaseException:
+    return exc.error if isinstance(exc, PartialDeliveryError) else exc
+
+
+def is_permanent_failure(exc: BaseException) -> bool:
+    return isinstance(failure_cause(exc), PermanentSinkError)
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    return isinstance(failure_cause(exc), RateLimitedError)
+
+
+# Chat sinks that share a platform rate limit. While the limiter has a token for every
+# alert handed over they go out one message each; once alerts arrive faster than that,
+# the backlog is bundled into as few messages as the platform's size limits allow.
+# The limiter never sleeps here: an exhausted budget or a 429 raises RateLimitedError
+# with the wait, and the caller decides what to do with it. The outbox and dispatch
+# queue reschedule; an inline dispatcher sleeps it out on the poller's thread.
+class BundlingSink(AlertSink):
+    max_batch = 20
+
+    def __init__(self, url: str, transport: HttpTransport, rate_per_minute: float) -> None:
+        self._url = url
+        self._transport = transport
+        self._limiter = RateLimiter(rate_per_minute, burst=RATE_LIMIT_BURST)
+        self.messages_total = 0
+        self.bundled_total = 0
+        self.rate_limited_total = 0
+
+    def send(self, alert: Alert) -> None:
+        self.send_many([alert])
+
+    def send_many(self, alerts: List[Alert]) -> None:
+        if not alerts:
+            return
+        if self._limiter.available() >= len(alerts):
+            bundles = [[alert] for alert in alerts]
+        else:
+            bundles = self._bundle(alerts)
+        delivered = 0
+        for bundle in bundles:
+            try:
+                self._deliver(self._payload(bundle))
+            except (*SINK_NETWORK_ERRORS, PermanentSinkError) as exc:
+                if delivered:
+                    raise PartialDeliveryError(delivered, exc) from exc
+                raise
+            delivered += len(bundle)
+            self.messages_total += 1
+            if len(bundle) > 1:
+                self.bundled_total += len(bundle)
+
+    def _deliver(self, payload: Dict[str, object]) -> None:
+        self._limiter.acquire(max_wait=0.0)
+        try:
+            headers = self._post_json(payload)
+        except HttpStatusError as exc:
+            if exc.status != 429:
+                raise
+            self.rate_limited_total += 1
+            self._limiter.penalize(exc.retry_after)
+            raise RateLimitedError(exc.retry_after) from exc
+        self._limiter.reward()
+        self._observe(headers)
+
+    def _observe(self, headers: Any) -> None:
+        return None
+
+    @abstractmethod
+    def _bundle(self, alerts: List[Alert]) -> List[List[Alert]]:
+        ...
+
+    @abstractmethod
+    def _payload(self, alerts: List[Alert]) -> Dict[str, object]:
+        ...
+
+    def _post_json(self, payload: Dict[str, object]) -> Any:
+        return self._transport.post_json(self._url, payload).headers
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_minute": round(self._limiter.rate_per_minute, 2),
+            "messages": self.messages_total,
+            "bundled": self.bundled_total,
+            "rate_limited": self.rate_limited_total,
+        }
+
+
+class TelegramSink(BundlingSink):
+    def __init__(
+        self,
+        bot_token: str,
+        chat_id: str,
+        timeout_seconds: int,
+        rate_per_minute: float = 20.0,
+        transport: Optional[HttpTransport] = None,
+    ) -> None:
+        super().__init__(
+            f"https://api.telegram.org/bot{bot_token}/sendMessage",
+            transport or HttpTransport(timeout_seconds),
+            rate_per_minute,
         )
+        self._chat_id = chat_id
 
-    @staticmethod
-    def _post_json(url: str, payload: Dict[str, object], timeout_seconds: int) -> None:
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(
-            url=url,
-            data=data,
-            headers={"Content-Type": "application/json"},
-            method="POST",
+    def _bundle(self, alerts: List[Alert]) -> List[List[Alert]]:
+        return _pack(
+            alerts,
+            max_items=self.max_batch,
+            max_chars=TELEGRAM_MAX_MESSAGE_CHARS,
+            size=lambda alert: len(alert.text) + len(BUNDLE_SEPARATOR),
         )
-        with urllib.request.urlopen(req, timeout=timeout_seconds):
-            return
 
+    def _payload(self, alerts: List[Alert]) -> Dict[str, object]:
+        text = BUNDLE_SEPARATOR.join(alert.text for alert in alerts)
+        return {"chat_id": self._chat_id, "text": text[:TELEGRAM_MAX_MESSAGE_CHARS]}
 
-class DiscordSink(AlertSink):
-    def __init__(self, webhook_url: str, timeout_seconds: int) -> None:
-        self._webhook_url = webhook_url
-        self._timeout_seconds = timeout_seconds
 
-    def send(self, alert: Alert) -> None:
-        payload = {"content": alert.text}
-        self._post_json(self._webhook_url, payload)
-
-    def _post_json(self, url: str, payload: Dict[str, object]) -> None:
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(
-            url=url,
-            data=data,
-            headers={"Content-Type": "application/json"},
-            method="POST",
+class DiscordSink(BundlingSink):
+    max_batch = DISCORD_MAX_EMBEDS
+
+    def __init__(
+        self,
+        webhook_url: str,
+        timeout_seconds: int,
+        rate_per_minute: float = 30.0,
+        transport: Optional[HttpTransport] = None,
+    ) -> None:
+        super().__init__(webhook_url, transport or HttpTransport(timeout_seconds), rate_per_minute)
+
+    def _bundle(self, alerts: List[Alert]) -> List[List[Alert]]:
+        return _pack(
+            alerts,
+            max_items=DISCORD_MAX_EMBEDS,
+            max_chars=DISCORD_MAX_EMBED_TOTAL_CHARS,
+            size=lambda alert: min(len(alert.text), DISCORD_MAX_EMBED_CHARS),
         )
-        with urllib.request.urlopen(req, timeout=self._timeout_seconds):
+
+    def _payload(self, alerts: List[Alert]) -> Dict[str, object]:
+        if len(alerts) == 1 and len(alerts[0].text) <= DISCORD_MAX_CONTENT_CHARS:
+            return {"content": alerts[0].text}
+        embeds: List[Dict[str, object]] = []
+        for alert in alerts:
+            embed: Dict[str, object] = {"description": alert.text[:DISCORD_MAX_EMBED_CHARS]}
+            if alert.deep_link:
+                embed["url"] = alert.deep_link
+            embeds.append(embed)
+        if len(alerts) == 1:
+            return {"embeds": embeds}
+        return {"content": f"{len(alerts)} alerts", "embeds": embeds}
+
+    def _observe(self, headers: Any) -> None:
+        # Discord reports the bucket on every response; wait out an exhausted one
+        # instead of finding out through a 429.
+        if headers is None or headers.get("X-RateLimit-Remaining") != "0":
+            return
+        try:
+            self._limiter.block_for(float(headers.get("X-RateLimit-Reset-After") or 0.0))
+        except ValueError:
             return
 
 
 class GenericWebhookSink(AlertSink):
-    def __init__(self, webhook_url: str, timeout_seconds: int) -> None:
+    requires_raw = True
+
+    def __init__(self, webhook_url: str, timeout_seconds: int, transport: Optional[HttpTransport] = None) -> None:
         self._webhook_url = webhook_url
-        self._timeout_seconds = timeout_seconds
+        self._transport = transport or HttpTransport(timeout_seconds)
 
     def send(self, alert: Alert) -> None:
         payload = {
@@ -87,29 +356,418 @@ class GenericWebhookSink(AlertSink):
             "timestamp": alert.timestamp,
             "entities": alert.entities,
             "deep_link": alert.deep_link,
-            "raw": alert.raw,
+            "raw": materialize_raw(alert.raw),
         }
-        data = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(
-            url=self._webhook_url,
-            data=data,
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
-        with urllib.request.urlopen(req, timeout=self._timeout_seconds):
+        self._transport.post_json(self._webhook_url, payload)
+
+
+# Series for the numbers sinks report through stats(); sinks without the key are skipped.
+SINK_STATS_SERIES: Tuple[Tuple[str, str, str, str], ...] = (
+    ("pequod_sink_rate_per_minute", "Send rate a chat sink currently allows itself after rate-limit feedback.", "gauge", "rate_per_minute"),
+    ("pequod_sink_messages_total", "Messages a chat sink posted, single or bundled.", "counter", "messages"),
+    ("pequod_sink_bundled_alerts_total", "Alerts that went out inside a multi-alert message.", "counter", "bundled"),
+    ("pequod_sink_rate_limited_total", "Rate-limit (429) responses a sink received.", "counter", "rate_limited"),
+)
+
+SINK_OVERFLOW_POLICIES = ("block", "drop_oldest", "spill")
+# Backoff for a queued batch whose send failed with one of SINK_NETWORK_ERRORS.
+SINK_RETRY_BASE_SECONDS = 1.0
+SINK_RETRY_MAX_SECONDS = 60.0
+
+_FLUSH = object()
+_STOP = object()
+
+# A queued alert with the span that was current when it was queued.
+_Queued = Tuple[Alert, Optional[SpanContext]]
+
+
+def render_per_sink(
+    writer: PrometheusWriter,
+    per_sink: Dict[str, Dict[str, Any]],
+    series: Tuple[Tuple[str, str, str, str], ...],
+) -> None:
+    for name, help_text, metric_type, key in series:
+        samples = [(sink, values[key]) for sink, values in sorted(per_sink.items()) if key in values]
+        if not samples:
+            continue
+        writer.header(name, help_text, metric_type)
+        for sink, value in samples:
+            writer.sample(name, value, [("sink", sink)])
+
+
+def sink_names(sinks: List[AlertSink]) -> List[str]:
+    # Stable per-sink names for metrics, spill files and outbox rows; repeats of a
+    # class are numbered.
+    names: List[str] = []
+    counts: Dict[str, int] = {}
+    for sink in sinks:
+        name = sink.__class__.__name__
+        counts[name] = counts.get(name, 0) + 1
+        names.append(name if counts[name] == 1 else f"{name}#{counts[name]}")
+    return names
+
+
+# One sink behind a bounded queue and its own worker thread, so a slow endpoint only
+# delays its own alerts. With queue_size=0 alerts are sent inline on the caller's
+# thread, waiting out rate limits there as well. When the queue is full the overflow
+# policy blocks the caller, drops the oldest queued alert, or appends to a JSONL
+# spill file the worker replays in order.
+# Either way a SINK_NETWORK_ERRORS failure is transient: inline it is counted and
+# logged, queued the batch is retried with backoff until it goes through or the
+# dispatcher closes. A PermanentSinkError drops the rejected alert and delivery
+# carries on with the next one. Anything else is a bug and propagates (inline) or
+# is logged with its traceback (queued).
+class SinkDispatcher:
+    def __init__(
+        self,
+        sink: AlertSink,
+        name: str,
+        latency: Histogram,
+        queue_size: int = 0,
+        overflow: str = "block",
+        spill_dir: Optional[Path] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if overflow not in SINK_OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown sink overflow policy {overflow!r}; expected one of {', '.join(SINK_OVERFLOW_POLICIES)}.")
+        self.sink = sink
+        self.name = name
+        self._latency = latency
+        self._overflow = overflow
+        self._sleep = sleep
+        # Counters move on both the caller's and the worker's thread.
+        self._counter_lock = threading.Lock()
+        self.sent_total = 0
+        self.failures_total = 0
+        self.dropped_total = 0
+        self.spilled_total = 0
+        self._inline = queue_size <= 0
+        self._queue: "queue.Queue[object]" = queue.Queue(maxsize=max(1, queue_size))
+        self._thread: Optional[threading.Thread] = None
+        self._closing = threading.Event()
+        # Set by flush(); kept outside the queue so no overflow policy can discard it.
+        self._flush_requested = threading.Event()
+        self._spill_lock = threading.Lock()
+        self._spilled = 0
+        self._spill_path: Optional[Path] = None
+        # Spill-mode alerts the worker could not deliver before closing, oldest first;
+        # written once on the way out instead of being prepended to the spill file.
+        self._parked: List[str] = []
+        if self._inline:
+            return
+        if overflow == "spill":
+            directory = spill_dir or Path("data/sink_spill")
+            directory.mkdir(parents=True, exist_ok=True)
+            self._spill_path = directory / f"{name.replace('#', '-')}.jsonl"
+            self._spilled = self._recover_spill(self._spill_path)
+        self._thread = threading.Thread(target=self._run, name=f"pequod-sink-{name}", daemon=True)
+        self._thread.start()
+
+    @property
+    def depth(self) -> int:
+        return (0 if self._inline else self._queue.qsize()) + self._spilled
+
+    def send(self, alert: Alert) -> None:
+        if not self._inline:
+            self._put(alert)
+            return
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            try:
+                self._deliver([alert])
+                return
+            except RateLimitedError as exc:
+                if attempt == RATE_LIMIT_RETRIES or exc.retry_after > MAX_RATE_WAIT_SECONDS:
+                    print(f"[sink-error] {self.name}: {exc}", file=sys.stderr)
+                    return
+                self._sleep(exc.retry_after)
+            except SINK_NETWORK_ERRORS as exc:
+                print(f"[sink-error] {self.name}: {exc}", file=sys.stderr)
+                return
+            except PermanentSinkError as exc:
+                self._reject(alert, exc)
+                return
+
+    def flush(self) -> None:
+        if self._inline:
+            self._flush()
+            return
+        self._flush_requested.set()
+        try:
+            # Only wakes an idle worker; a busy one flushes once its backlog is sent.
+            self._queue.put_nowait(_FLUSH)
+        except queue.Full:
+            pass
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        # Queued alerts still get one attempt each; failing ones are no longer retried.
+        self._closing.set()
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _put(self, alert: Alert) -> None:
+        item: _Queued = (alert, current_context())
+        if self._overflow == "block":
+            self._queue.put(item)
+            return
+        if self._spill_path is not None:
+            with self._spill_lock:
+                if self._spilled or self._queue.full():
+                    # Once spilling, everything goes to the file until the worker
+                    # has replayed it, so alerts keep their order.
+                    self._spill(self._spill_path, [encode_alert(alert, self.sink.requires_raw)])
+                    return
+                self._queue.put_nowait(item)
+            return
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                pass
+            try:
+                dropped = self._queue.get_nowait()
+            except queue.Empty:
+                continue
+            self._queue.task_done()
+            if isinstance(dropped, tuple):
+                self._count(dropped=1)
+                print(f"[sink-error] {self.name}: queue full, dropped {dropped[0].dedupe_key}", file=sys.stderr)
+
+    def _count(self, sent: int = 0, failures: int = 0, dropped: int = 0, spilled: int = 0) -> None:
+        with self._counter_lock:
+            self.sent_total += sent
+            self.failures_total += failures
+            self.dropped_total += dropped
+            self.spilled_total += spilled
+
+    def counters(self) -> Dict[str, int]:
+        with self._counter_lock:
+            return {
+                "sent": self.sent_total,
+                "failures": self.failures_total,
+                "dropped": self.dropped_total,
+                "spilled": self.spilled_total,
+            }
+
+    def _spill(self, path: Path, lines: List[str]) -> None:
+        with path.open("a", encoding="utf-8") as handle:
+            handle.write("".join(line + "\n" for line in lines))
+        self._spilled += len(lines)
+        self._count(spilled=len(lines))
+
+    @staticmethod
+    def _recover_spill(path: Path) -> int:
+        draining = path.with_suffix(".draining")
+        if draining.exists():
+            # A replay was interrupted: its alerts go back in front of newer spills.
+            tail = path.read_text(encoding="utf-8") if path.exists() else ""
+            path.write_text(draining.read_text(encoding="utf-8") + tail, encoding="utf-8")
+            draining.unlink()
+        if not path.exists():
+            return 0
+        with path.open("r", encoding="utf-8") as handle:
+            return sum(1 for line in handle if line.strip())
+
+    def _replay_spill(self, path: Path) -> None:
+        with self._spill_lock:
+            if not self._spilled:
+                return
+            draining = path.with_suffix(".draining")
+            path.replace(draining)
+            self._spilled = 0
+        lines = [line for line in draining.read_text(encoding="utf-8").splitlines() if line.strip()]
+        step = max(1, self.sink.max_batch)
+        for start in range(0, len(lines), step):
+            if not self._send_batch([decode_alert(line) for line in lines[start : start + step]]):
+                # Closing with the sink still failing: the unsent tail is parked and
+                # rewritten as the .draining file when the worker exits.
+                self._parked.extend(lines[start:])
+                return
+        draining.unlink()
+
+    def _write_parked(self, path: Path) -> None:
+        if not self._parked:
             return
+        # _recover_spill puts the .draining file in front of the spill file on the
+        # next start, which is where these alerts belong.
+        draining = path.with_suffix(".draining")
+        draining.write_text("".join(line + "\n" for line in self._parked), encoding="utf-8")
+        self._parked = []
+
+    def _take_batch(self) -> List[object]:
+        # Whatever queued up behind the first alert goes out in the same send_many
+        # call, up to the sink's max_batch; a flush or stop marker ends the batch.
+        items = [self._queue.get()]
+        while isinstance(items[-1], tuple) and len(items) < self.sink.max_batch:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self) -> None:
+        if self._spill_path is not None:
+            self._replay_spill(self._spill_path)
+        while True:
+            items = self._take_batch()
+            try:
+                queued = [item for item in items if isinstance(item, tuple)]
+                alerts = [alert for alert, _ in queued]
+                # The batch's span hangs off the span that queued its first alert.
+                if alerts and not self._send_batch(alerts, queued[0][1]):
+                    self._abandon(alerts)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+            stopping = items[-1] is _STOP
+            if self._queue.empty() and self._spill_path is not None and not stopping:
+                self._replay_spill(self._spill_path)
+            if self._flush_requested.is_set() and (stopping or self._queue.empty()):
+                self._flush_requested.clear()
+                self._flush()
+            if stopping:
+                if self._spill_path is not None:
+                    self._write_parked(self._spill_path)
+                return
+
+    # Returns False only when the dispatcher closed while the sink was still failing.
+    def _send_batch(self, alerts: List[Alert], parent: Optional[SpanContext] = None) -> bool:
+        attempts = 0
+        while alerts:
+            try:
+                self._deliver(alerts, parent)
+                return True
+            except (*SINK_NETWORK_ERRORS, PermanentSinkError) as exc:
+                if isinstance(exc, PartialDeliveryError):
+                    alerts = alerts[exc.delivered :]
+                if is_permanent_failure(exc):
+                    self._reject(alerts[0], exc)
+                    alerts = alerts[1:]
+                    continue
+                if is_rate_limited(exc):
+                    # Throttling is not the sink failing: wait as told, backoff unchanged.
+                    delay = float(getattr(exc, "retry_after", 0.0))
+                else:
+                    attempts += 1
+                    delay = min(SINK_RETRY_MAX_SECONDS, SINK_RETRY_BASE_SECONDS * (2 ** (attempts - 1)))
+                print(f"[sink-error] {self.name}: {exc} (retry in {delay:.1f}s)", file=sys.stderr)
+                if self._closing.wait(delay):
+                    return False
+            except Exception:
+                LOG.exception("%s dropped %d alerts after an unexpected send error.", self.name, len(alerts))
+                self._count(dropped=len(alerts))
+                return True
+        return True
+
+    def _reject(self, alert: Alert, exc: BaseException) -> None:
+        self._count(dropped=1)
+        LOG.error("%s rejected alert %s, not retrying: %s", self.name, alert.dedupe_key, exc)
+
+    def _abandon(self, alerts: List[Alert]) -> None:
+        if self._spill_path is not None:
+            self._parked.extend(encode_alert(alert, self.sink.requires_raw) for alert in alerts)
+            self._count(spilled=len(alerts))
+            return
+        self._count(dropped=len(alerts))
+        print(f"[sink-error] {self.name}: closing, dropped {len(alerts)} undelivered alerts", file=sys.stderr)
+
+    def _deliver(self, alerts: List[Alert], parent: Optional[SpanContext] = None) -> None:
+        started = time.perf_counter()
+        try:
+            with span("sink.send", parent, sink=self.name, dedupe_key=alerts[0].dedupe_key, alerts=len(alerts)):
+                if len(alerts) == 1:
+                    self.sink.send(alerts[0])
+                else:
+                    self.sink.send_many(alerts)
+            self._count(sent=len(alerts))
+        except PartialDeliveryError as exc:
+            self._count(sent=exc.delivered, failures=len(alerts) - exc.delivered)
+            raise
+        except Exception:
+            self._count(failures=len(alerts))
+            raise
+        finally:
+            self._latency.observe(time.perf_counter() - started, label=self.name)
+
+    def _flush(self) -> None:
+        try:
+            self.sink.flush()
+        except Exception as exc:
+            print(f"[sink-error] {self.name} flush: {exc}", file=sys.stderr)
 
 
 class MultiSink(AlertSink):
-    def __init__(self, sinks: List[AlertSink]) -> None:
+    def __init__(
+        self,
+        sinks: List[AlertSink],
+        queue_size: int = 0,
+        overflow: str = "block",
+        spill_dir: Optional[Path] = None,
+    ) -> None:
         self._sinks = sinks
+        self._latency = Histogram(
+            "pequod_sink_send_seconds",
+            "Time spent in each sink's send call.",
+            buckets=SINK_LATENCY_BUCKETS,
+            label_name="sink",
+        )
+        self._dispatchers = [
+            SinkDispatcher(sink, name, self._latency, queue_size=queue_size, overflow=overflow, spill_dir=spill_dir)
+            for sink, name in zip(sinks, sink_names(sinks))
+        ]
+
+    @property
+    def sinks(self) -> List[AlertSink]:
+        return list(self._sinks)
+
+    @property
+    def requires_raw(self) -> bool:  # type: ignore[override]
+        return any(sink.requires_raw for sink in self._sinks)
 
     def send(self, alert: Alert) -> None:
+        for dispatcher in self._dispatchers:
+            dispatcher.send(alert)
+
+    def flush(self) -> None:
+        for dispatcher in self._dispatchers:
+            dispatcher.flush()
+
+    # Stops the workers after they have sent everything already queued.
+    def close(self, timeout: float = 5.0) -> None:
+        for dispatcher in self._dispatchers:
+            dispatcher.close(timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "dispatch": {
+                dispatcher.name: {
+                    "queue_depth": dispatcher.depth,
+                    **dispatcher.counters(),
+                    **dispatcher.sink.stats(),
+                }
+                for dispatcher in self._dispatchers
+            }
+        }
+
+    def render_prometheus(self, writer: PrometheusWriter) -> None:
+        render_per_sink(
+            writer,
+            self.stats()["dispatch"],
+            (
+                ("pequod_sink_queue_depth", "Alerts queued or spilled for each sink.", "gauge", "queue_depth"),
+                ("pequod_sink_sent_total", "Alerts each sink accepted.", "counter", "sent"),
+                ("pequod_sink_failures_total", "Failed sends per sink.", "counter", "failures"),
+                ("pequod_sink_dropped_total", "Alerts dropped from a full sink queue (drop_oldest).", "counter", "dropped"),
+                ("pequod_sink_spilled_total", "Alerts spilled to disk from a full sink queue (spill).", "counter", "spilled"),
+                *SINK_STATS_SERIES,
+            ),
+        )
+        self._latency.render(writer)
         for sink in self._sinks:
-            try:
-                sink.send(alert)
-            except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError) as exc:
-                print(f"[sink-error] {sink.__class__.__name__}: {exc}", file=sys.stderr)
+            sink.render_prometheus(writer)
 
 
 def build_sinks(
@@ -118,12 +776,20 @@ def build_sinks(
     telegram_chat_id: str,
     discord_webhook_url: str,
     generic_webhook_url: str,
+    queue_size: int = 0,
+    overflow: str = "block",
+    spill_dir: Optional[Path] = None,
+    telegram_rate_per_minute: float = 20.0,
+    discord_rate_per_minute: float = 30.0,
 ) -> MultiSink:
     sinks: List[AlertSink] = [ConsoleSink()]
+    transport = HttpTransport(timeout_seconds)
     if telegram_bot_token and telegram_chat_id:
-        sinks.append(TelegramSink(telegram_bot_token, telegram_chat_id, timeout_seconds))
+        sinks.append(
+            TelegramSink(telegram_bot_token, telegram_chat_id, timeout_seconds, telegram_rate_per_minute, transport=transport)
+        )
     if discord_webhook_url:
-        sinks.append(DiscordSink(discord_webhook_url, timeout_seconds))
+        sinks.append(DiscordSink(discord_webhook_url, timeout_seconds, discord_rate_per_minute, transport=transport))
     if generic_webhook_url:
-        sinks.append(GenericWebhookSink(generic_webhook_url, timeout_seconds))
-    return MultiSink(sinks)
+        sinks.append(GenericWebhookSink(generic_webhook_url, timeout_seconds, transport=transport))
+    return MultiSink(sinks, queue_size=queue_size, overflow=overflow, spill_dir=spill_dir)
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import logging.handlers
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+LOG = logging.getLogger(__name__)
+
+# (trace_id, span_id) of a span, handed to another thread or stored with queued work
+# so the span that later processes it can name it as parent.
+SpanContext = Tuple[int, int]
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        return None
+
+    def set(self, **attrs: Any) -> None:
+        return None
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("_tracer", "_parent", "trace_id", "span_id", "parent_id", "name", "attrs", "_started_at", "_started_perf")
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any], parent: Optional[SpanContext] = None) -> None:
+        self._tracer = tracer
+        self._parent = parent
+        self.name = name
+        self.attrs = attrs
+        self.span_id = 0
+        self.parent_id: Optional[int] = None
+        self.trace_id = 0
+        self._started_at = 0.0
+        self._started_perf = 0.0
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "Span":
+        stack = self._tracer._stack()
+        self.span_id = next(self._tracer._ids)
+        if stack:
+            self.trace_id, self.parent_id = stack[-1].trace_id, stack[-1].span_id
+        elif self._parent is not None:
+            self.trace_id, self.parent_id = self._parent
+        else:
+            self.trace_id, self.parent_id = self.span_id, None
+        self._started_at = time.time()
+        self._started_perf = time.perf_counter()
+        stack.append(self)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        duration_ms = (time.perf_counter() - self._started_perf) * 1000.0
+        stack = self._tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self._tracer._finish(
+            {
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent_id,
+                "name": self.name,
+                "start": round(self._started_at, 6),
+                "duration_ms": round(duration_ms, 3),
+                "thread": threading.current_thread().name,
+                "attrs": self.attrs,
+            }
+        )
+
+
+class Tracer:
+    def __init__(self, ring_size: int = 5000) -> None:
+        self.enabled = False
+        # Ids start from the clock so contexts stored in the outbox by an earlier
+        # run never collide with this run's spans.
+        self._ids = itertools.count(time.time_ns() // 1000)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._ring: Deque[Dict[str, Any]] = deque(maxlen=max(1, ring_size))
+        self._file_logger: Optional[logging.Logger] = None
+
+    def configure(
+        self,
+        enabled: bool,
+        output_path: Optional[Path] = None,
+        max_bytes: int = 10_000_000,
+        backup_count: int = 3,
+        ring_size: int = 5000,
+    ) -> None:
+        with self._lock:
+            self._ring = deque(self._ring, maxlen=max(1, ring_size))
+        file_logger = logging.getLogger(f"{__name__}.spans")
+        for existing in list(file_logger.handlers):
+            file_logger.removeHandler(existing)
+            existing.close()
+        self._file_logger = None
+        if enabled and output_path is not None:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                str(output_path),
+                maxBytes=max(0, max_bytes),
+                backupCount=max(0, backup_count),
+                encoding="utf-8",
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            file_logger.addHandler(handler)
+            file_logger.setLevel(logging.INFO)
+            file_logger.propagate = False
+            self._file_logger = file_logger
+        self.enabled = enabled
+        if enabled:
+            LOG.info("Cycle tracing enabled (ring=%d, file=%s).", ring_size, output_path or "-")
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = []
+            self._local.stack = stack
+        return stack
+
+    def span(self, name: str, parent: Optional[SpanContext] = None, **attrs: Any) -> Any:
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs, parent)
+
+    def current_context(self) -> Optional[SpanContext]:
+        if not self.enabled:
+            return None
+        stack = self._stack()
+        return (stack[-1].trace_id, stack[-1].span_id) if stack else None
+
+    def _finish(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._ring.append(record)
+        if self._file_logger is not None:
+            self._file_logger.info(json.dumps(record, default=str))
+
+    def recent(self, limit: int = 500, trace_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = list(self._ring)
+        if trace_id is not None:
+            rows = [row for row in rows if row["trace_id"] == trace_id]
+        if limit > 0:
+            rows = rows[-limit:]
+        return rows
+
+
+TRACER = Tracer()
+
+
+def span(name: str, parent: Optional[SpanContext] = None, **attrs: Any) -> Any:
+    return TRACER.span(name, parent, **attrs)
+
+
+def current_context() -> Optional[SpanContext]:
+    return TRACER.current_context()
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
-from .types import NormalizedTransaction
-from .utils import parse_timestamp, short_hash, to_float
+from .types import NormalizedTransaction, RawTransferView
+from .batch import CycleBatch
+from .fingerprint import tx_fingerprint
+from .parsing import parse_timestamp, to_float
 
 
 def _flatten_transactions(payload: Any) -> Iterable[Tuple[Optional[str], Dict[str, Any]]]:
@@ -36,7 +38,7 @@ def _flatten_transactions(payload: Any) -> Iterable[Tuple[Optional[str], Dict[st
         yield None, payload
 
 
-def _pick_first_str(data: Dict[str, Any], keys: List[str]) -> Optional[str]:
+def _pick_first_str(data: Dict[str, Any], keys: Sequence[str]) -> Optional[str]:
     for key in keys:
         value = data.get(key)
         if isinstance(value, str) and value.strip():
@@ -44,7 +46,7 @@ def _pick_first_str(data: Dict[str, Any], keys: List[str]) -> Optional[str]:
     return None
 
 
-def _pick_first_float(data: Dict[str, Any], keys: List[str]) -> Optional[float]:
+def _pick_first_float(data: Dict[str, Any], keys: Sequence[str]) -> Optional[float]:
     for key in keys:
         value = data.get(key)
         parsed = to_float(value)
@@ -169,7 +171,7 @@ def _extract_tx_id(tx: Dict[str, Any]) -> str:
     tx_id = _pick_first_str(tx, ["transaction_hash", "tx_hash", "hash", "signature", "id"])
     if tx_id:
         return tx_id
-    return f"tx_{short_hash(tx)}"
+    return f"tx_{tx_fingerprint(tx)}"
 
 
 def _extract_timestamp(tx: Dict[str, Any]) -> Optional[int]:
@@ -288,36 +290,295 @@ def _extract_to_address(tx: Dict[str, Any], transfer: Optional[Dict[str, Any]] =
     return None
 
 
-def normalize_transactions(payload: Any, default_chain_by_address: Dict[str, str]) -> List[NormalizedTransaction]:
-    records: List[NormalizedTransaction] = []
+# Compiled accessor plans. Each field is a priority-ordered list of (source, key)
+# reads mirroring the matching _extract_* function; keys absent from a row's
+# schema are dropped at compile time so a matching row only touches keys it has.
+_SRC_TRANSFER, _SRC_TRANSFER_AMOUNT, _SRC_TRANSFER_ASSET, _SRC_TX, _SRC_TX_TOKEN, _SRC_FIRST, _SRC_FIRST_AMOUNT, _SRC_FIRST_ASSET = range(8)
+_TYPE_KEYS = ("activity_type", "type", "event_type", "operation", "kind")
+_TOKEN_ADDRESS_KEYS = ("token_address", "mint", "asset_address", "contract_address")
+_NESTED_TOKEN_ADDRESS_KEYS = ("address", "token_address", "mint")
+_SYMBOL_KEYS = ("token_symbol", "symbol", "asset_symbol", "currency")
+_NESTED_SYMBOL_KEYS = ("symbol", "ticker")
+_USD_KEYS = ("usd_value", "value_usd", "amount_usd", "usd")
+_FROM_KEYS = ("from_address", "sender", "from", "source_address")
+_TO_KEYS = ("to_address", "receiver", "to", "destination_address")
+_TRANSFER_AMOUNT_KEYS = ("amount", "quantity", "value")
+
+_FIELD_SOURCES: Dict[str, Tuple[Tuple[int, Tuple[str, ...]], ...]] = {
+    "tx_type": ((_SRC_TRANSFER, _TYPE_KEYS), (_SRC_TX, _TYPE_KEYS)),
+    "token_address": (
+        (_SRC_TRANSFER, _TOKEN_ADDRESS_KEYS),
+        (_SRC_TRANSFER_ASSET, _NESTED_TOKEN_ADDRESS_KEYS),
+        (_SRC_TX, _TOKEN_ADDRESS_KEYS),
+        (_SRC_TX_TOKEN, _NESTED_TOKEN_ADDRESS_KEYS),
+        (_SRC_FIRST_ASSET, _NESTED_TOKEN_ADDRESS_KEYS),
+    ),
+    "token_symbol": (
+        (_SRC_TRANSFER, _SYMBOL_KEYS),
+        (_SRC_TRANSFER_ASSET, _NESTED_SYMBOL_KEYS),
+        (_SRC_TX, _SYMBOL_KEYS),
+        (_SRC_TX_TOKEN, _NESTED_SYMBOL_KEYS),
+        (_SRC_FIRST_ASSET, _NESTED_SYMBOL_KEYS),
+    ),
+    "usd_value": (
+        (_SRC_TRANSFER_AMOUNT, _USD_KEYS),
+        (_SRC_TRANSFER, _USD_KEYS),
+        (_SRC_TX, ("usd_value", "value_usd", "amount_usd", "valueUsd", "usd")),
+        (_SRC_TX_TOKEN, ("usd_value", "value_usd", "price_usd")),
+        (_SRC_FIRST_AMOUNT, _USD_KEYS),
+    ),
+    "amount": (
+        (_SRC_TRANSFER_AMOUNT, ("amount", "raw_amount")),
+        (_SRC_TRANSFER, _TRANSFER_AMOUNT_KEYS),
+        (_SRC_TX, ("token_amount", "amount", "quantity", "value", "raw_amount", "amount_raw")),
+        (_SRC_TX_TOKEN, ("amount", "quantity", "balance_change")),
+        (_SRC_FIRST_AMOUNT, ("amount", "raw_amount")),
+        (_SRC_FIRST, _TRANSFER_AMOUNT_KEYS),
+    ),
+    "from_address": ((_SRC_TRANSFER, _FROM_KEYS), (_SRC_TX, _FROM_KEYS), (_SRC_FIRST, _FROM_KEYS)),
+    "to_address": ((_SRC_TRANSFER, _TO_KEYS), (_SRC_TX, _TO_KEYS), (_SRC_FIRST, _TO_KEYS)),
+}
+_TX_FIELD_KEYS: Dict[str, Tuple[str, ...]] = {
+    "chain": ("chain", "network", "source_chain"),
+    "tx_id": ("transaction_hash", "tx_hash", "hash", "signature", "id"),
+    "timestamp": ("block_timestamp", "timestamp", "time", "created_at"),
+}
+MAX_PLANS_PER_RESPONSE = 16
+
+_Steps = Tuple[Tuple[int, str], ...]
+
+
+class _TxPlan:
+    __slots__ = ("chain", "tx_id", "timestamp", "transfers")
+
+    def __init__(self, tx_keys: Tuple[str, ...]) -> None:
+        present = set(tx_keys)
+        self.chain = tuple(key for key in _TX_FIELD_KEYS["chain"] if key in present)
+        self.tx_id = tuple(key for key in _TX_FIELD_KEYS["tx_id"] if key in present)
+        self.timestamp = tuple(key for key in _TX_FIELD_KEYS["timestamp"] if key in present)
+        self.transfers: Dict[Optional[Tuple[str, ...]], Dict[str, _Steps]] = {}
+
+
+def _compile_field_steps(tx_keys: Tuple[str, ...], transfer_keys: Optional[Tuple[str, ...]]) -> Dict[str, _Steps]:
+    tx_present = set(tx_keys)
+    transfer_present = set(transfer_keys or ())
+    plan: Dict[str, _Steps] = {}
+    for field, sources in _FIELD_SOURCES.items():
+        steps: List[Tuple[int, str]] = []
+        for source, keys in sources:
+            if source == _SRC_TX:
+                keys = tuple(key for key in keys if key in tx_present)
+            elif source == _SRC_TRANSFER:
+                keys = tuple(key for key in keys if key in transfer_present)
+            elif source == _SRC_TX_TOKEN and "token" not in tx_present:
+                continue
+            elif transfer_keys is None and source in (_SRC_TRANSFER_AMOUNT, _SRC_TRANSFER_ASSET):
+                continue
+            steps.extend((source, key) for key in keys)
+        plan[field] = tuple(steps)
+    return plan
+
+
+def _read_str(sources: Tuple[Optional[Dict[str, Any]], ...], steps: _Steps) -> Optional[str]:
+    for source, key in steps:
+        container = sources[source]
+        if container is None:
+            continue
+        value = container.get(key)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return None
+
+
+def _read_float(sources: Tuple[Optional[Dict[str, Any]], ...], steps: _Steps) -> Optional[float]:
+    for source, key in steps:
+        container = sources[source]
+        if container is None:
+            continue
+        parsed = to_float(container.get(key))
+        if parsed is not None:
+            return parsed
+    return None
+
+
+def _nested_dict(container: Optional[Dict[str, Any]], key: str) -> Optional[Dict[str, Any]]:
+    if container is None:
+        return None
+    value = container.get(key)
+    return value if isinstance(value, dict) else None
+
+
+class _PlannedTransfer:
+    # Filtering fields are read eagerly; the rest of the record is only read by
+    # build(), so CycleBatch rows that get filtered out never pay for them.
+    __slots__ = (
+        "plan",
+        "steps",
+        "tx",
+        "sources",
+        "transfer_index",
+        "watch_address",
+        "chain",
+        "timestamp",
+        "token_address",
+        "amount",
+        "usd_value",
+    )
+
+    def __init__(
+        self,
+        plan: _TxPlan,
+        steps: Dict[str, _Steps],
+        tx: Dict[str, Any],
+        sources: Tuple[Optional[Dict[str, Any]], ...],
+        transfer_index: Optional[int],
+        watch_address: Optional[str],
+        chain: str,
+        timestamp: Optional[int],
+    ) -> None:
+        self.plan = plan
+        self.steps = steps
+        self.tx = tx
+        self.sources = sources
+        self.transfer_index = transfer_index
+        self.watch_address = watch_address
+        self.chain = chain
+        self.timestamp = timestamp
+        self.token_address = _read_str(sources, steps["token_address"])
+        self.amount = _read_float(sources, steps["amount"])
+        self.usd_value = _read_float(sources, steps["usd_value"])
+
+    def build(self) -> NormalizedTransaction:
+        sources = self.sources
+        steps = self.steps
+        tx = self.tx
+        return NormalizedTransaction(
+            tx_id=_pick_first_str(tx, self.plan.tx_id) or f"tx_{tx_fingerprint(tx)}",
+            chain=self.chain,
+            tx_type=(_read_str(sources, steps["tx_type"]) or "transfer").lower(),
+            from_address=_read_str(sources, steps["from_address"]),
+            to_address=_read_str(sources, steps["to_address"]),
+            token_address=self.token_address,
+            token_symbol=_read_str(sources, steps["token_symbol"]),
+            amount=self.amount,
+            usd_value=self.usd_value,
+            timestamp=self.timestamp,
+            watch_address=self.watch_address,
+            raw=RawTransferView(tx, self.transfer_index, sources[_SRC_TRANSFER]),
+        )
+
+
+def _iter_planned(
+    plan: _TxPlan,
+    tx: Dict[str, Any],
+    watched_address: Optional[str],
+    fallback_chain: Optional[str],
+    tx_keys: Tuple[str, ...],
+) -> Iterator[_PlannedTransfer]:
+    chain = (_pick_first_str(tx, plan.chain) or fallback_chain or "unknown").lower()
+    timestamp = None
+    for key in plan.timestamp:
+        timestamp = parse_timestamp(tx.get(key))
+        if timestamp is not None:
+            break
+
+    token = _nested_dict(tx, "token")
+    entries = _transfer_entries(tx)
+    first = entries[0][1]
+    first_amount = _nested_dict(first, "amount")
+    first_asset = _nested_dict(first, "asset")
+    for transfer_index, transfer in entries:
+        transfer_keys = tuple(transfer) if transfer is not None else None
+        steps = plan.transfers.get(transfer_keys)
+        if steps is None:
+            steps = _compile_field_steps(tx_keys, transfer_keys)
+            plan.transfers[transfer_keys] = steps
+        sources = (
+            transfer,
+            _nested_dict(transfer, "amount"),
+            _nested_dict(transfer, "asset"),
+            tx,
+            token,
+            first,
+            first_amount,
+            first_asset,
+        )
+        yield _PlannedTransfer(plan, steps, tx, sources, transfer_index, watched_address, chain, timestamp)
+
+
+def _normalize_generic(
+    tx: Dict[str, Any],
+    watched_address: Optional[str],
+    fallback_chain: Optional[str],
+    records: List[NormalizedTransaction],
+) -> None:
+    chain = _extract_chain(tx, fallback_chain)
+    tx_id = _extract_tx_id(tx)
+    timestamp = _extract_timestamp(tx)
+
+    for transfer_index, transfer in _transfer_entries(tx):
+        normalized = NormalizedTransaction(
+            tx_id=tx_id,
+            chain=chain,
+            tx_type=_infer_tx_type(tx, transfer=transfer),
+            from_address=_extract_from_address(tx, transfer=transfer),
+            to_address=_extract_to_address(tx, transfer=transfer),
+            token_address=_extract_token_address(tx, transfer=transfer),
+            token_symbol=_extract_symbol(tx, transfer=transfer),
+            amount=_extract_amount(tx, transfer=transfer),
+            usd_value=_extract_usd_value(tx, transfer=transfer),
+            timestamp=timestamp,
+            watch_address=watched_address,
+            raw=RawTransferView(tx, transfer_index, transfer if isinstance(transfer, dict) else None),
+        )
+        records.append(normalized)
+
+
+def _iter_normalized(
+    payload: Any,
+    default_chain_by_address: Dict[str, str],
+    compiled: bool,
+) -> Iterator[Union[_PlannedTransfer, NormalizedTransaction]]:
+    plans: Dict[Tuple[str, ...], _TxPlan] = {}
     for watched_address, tx in _flatten_transactions(payload):
         fallback_chain = None
         if watched_address:
             fallback_chain = default_chain_by_address.get(watched_address.lower())
-        chain = _extract_chain(tx, fallback_chain)
-        tx_id = _extract_tx_id(tx)
-        timestamp = _extract_timestamp(tx)
-
-        for transfer_index, transfer in _transfer_entries(tx):
-            raw = dict(tx)
-            if transfer_index is not None:
-                raw["asset_transfer_index"] = transfer_index
-            if isinstance(transfer, dict):
-                raw["asset_transfer"] = transfer
-
-            normalized = NormalizedTransaction(
-                tx_id=tx_id,
-                chain=chain,
-                tx_type=_infer_tx_type(tx, transfer=transfer),
-                from_address=_extract_from_address(tx, transfer=transfer),
-                to_address=_extract_to_address(tx, transfer=transfer),
-                token_address=_extract_token_address(tx, transfer=transfer),
-                token_symbol=_extract_symbol(tx, transfer=transfer),
-                amount=_extract_amount(tx, transfer=transfer),
-                usd_value=_extract_usd_value(tx, transfer=transfer),
-                timestamp=timestamp,
-                watch_address=watched_address,
-                raw=raw,
-            )
-            records.append(normalized)
-    return records
+        if compiled:
+            tx_keys = tuple(tx)
+            plan = plans.get(tx_keys)
+            if plan is None and len(plans) < MAX_PLANS_PER_RESPONSE:
+                plan = _TxPlan(tx_keys)
+                plans[tx_keys] = plan
+            if plan is not None:
+                yield from _iter_planned(plan, tx, watched_address, fallback_chain, tx_keys)
+                continue
+        records: List[NormalizedTransaction] = []
+        _normalize_generic(tx, watched_address, fallback_chain, records)
+        yield from records
+
+
+def normalize_transactions(
+    payload: Any,
+    default_chain_by_address: Dict[str, str],
+    compiled: bool = True,
+) -> List[NormalizedTransaction]:
+    return [
+        row.build() if isinstance(row, _PlannedTransfer) else row
+        for row in _iter_normalized(payload, default_chain_by_address, compiled)
+    ]
+
+
+def normalize_into_batch(
+    payload: Any,
+    default_chain_by_address: Dict[str, str],
+    batch: CycleBatch,
+    compiled: bool = True,
+) -> int:
+    start = len(batch)
+    for row in _iter_normalized(payload, default_chain_by_address, compiled):
+        if isinstance(row, _PlannedTransfer):
+            batch.append(row, row.chain, row.usd_value, row.amount, row.token_address, row.timestamp, row.watch_address)
+        else:
+            batch.append_transaction(row)
+    return len(batch) - start
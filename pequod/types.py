@@ -1,18 +1,81 @@
 from __future__ import annotations
 
+import sys
+from collections.abc import Mapping
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 
-@dataclass(frozen=True)
+def intern_str(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    return sys.intern(value)
+
+
+@dataclass(frozen=True, slots=True)
 class WatchAddress:
     chain: str
     address: str
     label: str
     category: Optional[str] = None
 
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "chain", sys.intern(self.chain))
+        if self.category is not None:
+            object.__setattr__(self, "category", sys.intern(self.category))
+
+
+class RawTransferView(Mapping[str, Any]):
+    __slots__ = ("tx", "transfer_index", "transfer")
+
+    def __init__(self, tx: Dict[str, Any], transfer_index: Optional[int] = None, transfer: Optional[Dict[str, Any]] = None) -> None:
+        self.tx = tx
+        self.transfer_index = transfer_index
+        self.transfer = transfer
+
+    def _overlay(self) -> Dict[str, Any]:
+        overlay: Dict[str, Any] = {}
+        if self.transfer_index is not None:
+            overlay["asset_transfer_index"] = self.transfer_index
+        if self.transfer is not None:
+            overlay["asset_transfer"] = self.transfer
+        return overlay
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "asset_transfer_index" and self.transfer_index is not None:
+            return self.transfer_index
+        if key == "asset_transfer" and self.transfer is not None:
+            return self.transfer
+        return self.tx[key]
+
+    def __iter__(self) -> Iterator[str]:
+        overlay = self._overlay()
+        for key in self.tx:
+            if key not in overlay:
+                yield key
+        yield from overlay
 
-@dataclass
+    def __len__(self) -> int:
+        overlay = self._overlay()
+        return len(self.tx) + sum(1 for key in overlay if key not in self.tx)
+
+    def __repr__(self) -> str:
+        return f"RawTransferView({self.materialize()!r})"
+
+    def materialize(self) -> Dict[str, Any]:
+        raw = dict(self.tx)
+        raw.update(self._overlay())
+        return raw
+
+
+def materialize_raw(raw: Mapping[str, Any]) -> Dict[str, Any]:
+    materialize = getattr(raw, "materialize", None)
+    if callable(materialize):
+        return materialize()
+    return dict(raw)
+
+
+@dataclass(slots=True)
 class NormalizedTransaction:
     tx_id: str
     chain: str
@@ -25,10 +88,15 @@ class NormalizedTransaction:
     usd_value: Optional[float]
     timestamp: Optional[int]
     watch_address: Optional[str]
-    raw: Dict[str, Any]
+    raw: Mapping[str, Any]
 
+    def __post_init__(self) -> None:
+        self.chain = sys.intern(self.chain)
+        self.tx_type = sys.intern(self.tx_type)
+        self.token_symbol = intern_str(self.token_symbol)
 
-@dataclass
+
+@dataclass(slots=True)
 class Alert:
     dedupe_key: str
     text: str
@@ -43,9 +111,14 @@ class Alert:
     token_symbol: Optional[str]
     token_address: Optional[str]
     amount: Optional[float]
-    raw: Dict[str, Any]
+    raw: Mapping[str, Any]
     score: float = 0.0
     score_reasons: List[Dict[str, Any]] = field(default_factory=list)
     score_breakdown: Dict[str, float] = field(default_factory=dict)
     entities: Dict[str, Dict[str, Any]] = field(default_factory=dict)
     deep_link: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        self.chain = sys.intern(self.chain)
+        self.tx_type = sys.intern(self.tx_type)
+        self.token_symbol = intern_str(self.token_symbol)
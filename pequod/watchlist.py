@@ -1,11 +1,22 @@
 from __future__ import annotations
 
 import json
+import logging
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from .types import WatchAddress
 
+LOG = logging.getLogger(__name__)
+
+WatchKey = Tuple[str, str]
+
+
+# The same EVM address can be watched on several chains; each is its own entry.
+def watch_key(item: WatchAddress) -> WatchKey:
+    return item.chain, item.address.lower()
+
 
 def _normalize_chain(chain: str) -> str:
     return chain.strip().lower()
@@ -89,9 +100,71 @@ def load_watchlist(path: Path) -> List[WatchAddress]:
     else:
         raise ValueError("Watchlist must be a JSON object or list.")
 
-    deduped: Dict[str, WatchAddress] = {}
+    deduped: Dict[WatchKey, WatchAddress] = {}
     for item in result:
-        key = f"{item.chain}:{item.address.lower()}"
-        deduped[key] = item
+        deduped[watch_key(item)] = item
     return list(deduped.values())
 
+
+@dataclass(frozen=True)
+class WatchlistDiff:
+    added: List[WatchAddress] = field(default_factory=list)
+    removed: List[WatchAddress] = field(default_factory=list)
+    relabeled: List[WatchAddress] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.relabeled)
+
+
+def diff_watchlists(old: List[WatchAddress], new: List[WatchAddress]) -> WatchlistDiff:
+    old_by_key = {watch_key(item): item for item in old}
+    new_by_key = {watch_key(item): item for item in new}
+    added: List[WatchAddress] = []
+    relabeled: List[WatchAddress] = []
+    for key, item in new_by_key.items():
+        previous = old_by_key.get(key)
+        if previous is None:
+            added.append(item)
+        elif previous != item:
+            relabeled.append(item)
+    removed = [item for key, item in old_by_key.items() if key not in new_by_key]
+    return WatchlistDiff(added=added, removed=removed, relabeled=relabeled)
+
+
+class WatchlistWatcher:
+    def __init__(self, path: Path, current: List[WatchAddress]) -> None:
+        self._path = path
+        self._current = list(current)
+        self._mtime_ns = self._stat_mtime_ns()
+
+    def _stat_mtime_ns(self) -> Optional[int]:
+        try:
+            return self._path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def poll(self) -> Optional[WatchlistDiff]:
+        mtime_ns = self._stat_mtime_ns()
+        if mtime_ns is None or mtime_ns == self._mtime_ns:
+            return None
+        self._mtime_ns = mtime_ns
+        try:
+            updated = load_watchlist(self._path)
+        except (OSError, ValueError) as exc:
+            LOG.warning("Watchlist reload skipped, %s is not loadable: %s", self._path, exc)
+            return None
+        if not updated:
+            LOG.warning("Watchlist reload skipped, %s is empty.", self._path)
+            return None
+        diff = diff_watchlists(self._current, updated)
+        self._current = updated
+        if diff.is_empty():
+            return None
+        LOG.info(
+            "Watchlist %s changed: %d added, %d removed, %d relabeled.",
+            self._path,
+            len(diff.added),
+            len(diff.removed),
+            len(diff.relabeled),
+        )
+        return diff
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pequod.types import WatchAddress
+
+# Seeded Allium payload generator shared by the tests and the benchmark suite.
+
+CHAINS: Tuple[str, ...] = ("ethereum", "ethereum", "ethereum", "base", "arbitrum", "solana", "polygon")
+EVM_CHAINS = {"ethereum", "base", "arbitrum", "polygon", "optimism", "avalanche"}
+TOKENS: Tuple[Tuple[str, str, int, float], ...] = (
+    ("USDC", "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48", 6, 1.0),
+    ("USDT", "0xdac17f958d2ee523a2206206994597c13d831ec7", 6, 1.0),
+    ("WETH", "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2", 18, 3200.0),
+    ("WBTC", "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599", 8, 64000.0),
+    ("ARB", "0x912ce59144191c1204e64559fe8253a0e49e6548", 18, 1.1),
+    ("PEPE", "0x6982508145454ce325ddbf47a25d4ec3d2311933", 18, 0.0000012),
+)
+ACTIVITY_TYPES: Tuple[Tuple[str, int], ...] = (
+    ("asset_transfer", 60),
+    ("dex_trade", 25),
+    ("asset_bridge", 8),
+    ("dex_liquidity_pool_mint", 4),
+    ("asset_approval", 3),
+)
+LABEL_PREFIXES = ("binance_hot", "coinbase_custody", "kraken_cold", "whale", "fund", "market_maker", "dao_treasury")
+
+
+class SyntheticTraffic:
+    def __init__(self, seed: int = 7, wallets: int = 2000, counterparties: int = 5000) -> None:
+        self._rng = random.Random(seed)
+        self.watchlist = [self._watch(index) for index in range(wallets)]
+        self._counterparties = [self._address("ethereum") for _ in range(counterparties)]
+        self._activity_types = [name for name, weight in ACTIVITY_TYPES for _ in range(weight)]
+
+    def _address(self, chain: str) -> str:
+        if chain in EVM_CHAINS:
+            return "0x" + "".join(self._rng.choice("0123456789abcdef") for _ in range(40))
+        alphabet = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+        return "".join(self._rng.choice(alphabet) for _ in range(44))
+
+    def _watch(self, index: int) -> WatchAddress:
+        chain = self._rng.choice(CHAINS)
+        prefix = self._rng.choice(LABEL_PREFIXES)
+        category = "exchanges" if prefix.split("_")[0] in {"binance", "coinbase", "kraken"} else "whales"
+        return WatchAddress(chain=chain, address=self._address(chain), label=f"{prefix}_{index}", category=category)
+
+    def _timestamp(self, ts: int) -> Any:
+        style = self._rng.random()
+        if style < 0.6:
+            return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        if style < 0.9:
+            return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        return ts
+
+    def _usd_amount(self) -> float:
+        return round(10 ** self._rng.uniform(1.0, 7.5), 2)
+
+    def _transfer(self, watch: WatchAddress, inbound: bool) -> Dict[str, Any]:
+        symbol, token_address, decimals, price = self._rng.choice(TOKENS)
+        usd_value = self._usd_amount()
+        amount = usd_value / price
+        counterparty = self._rng.choice(self._counterparties)
+        amount_obj: Dict[str, Any] = {
+            "amount": round(amount, 8),
+            "raw_amount": str(int(amount * (10 ** min(decimals, 12)))),
+        }
+        if self._rng.random() < 0.7:
+            amount_obj["usd_value"] = usd_value
+        return {
+            "from_address": counterparty if inbound else watch.address,
+            "to_address": watch.address if inbound else counterparty,
+            "operation": "sent" if not inbound else "received",
+            "transfer_type": "erc20" if symbol != "WETH" else "native",
+            "amount": amount_obj,
+            "asset": {"address": token_address, "symbol": symbol, "decimals": decimals, "type": "erc20"},
+        }
+
+    def transaction(self, watch: WatchAddress, ts: int) -> Dict[str, Any]:
+        activity = self._rng.choice(self._activity_types)
+        tx: Dict[str, Any] = {
+            "address": watch.address,
+            "chain": watch.chain,
+            "hash": "0x" + "".join(self._rng.choice("0123456789abcdef") for _ in range(64)),
+            "type": activity,
+            "block_timestamp": self._timestamp(ts),
+            "block_number": 19_000_000 + ts % 1_000_000,
+            "fee": {"amount": round(self._rng.uniform(0.0005, 0.02), 6), "usd_value": round(self._rng.uniform(1, 60), 2)},
+            "labels": [activity],
+        }
+        if activity == "asset_approval" or self._rng.random() < 0.1:
+            symbol, token_address, _, price = self._rng.choice(TOKENS)
+            usd_value = self._usd_amount()
+            tx.update(
+                {
+                    "from_address": watch.address,
+                    "to_address": self._rng.choice(self._counterparties),
+                    "token_address": token_address,
+                    "token_symbol": symbol,
+                    "amount": str(round(usd_value / price, 6)),
+                }
+            )
+            if self._rng.random() < 0.5:
+                tx["usd_value"] = usd_value
+            return tx
+        if activity == "dex_trade":
+            count = self._rng.choice((2, 2, 3, 4, 6, 12, 30))
+        else:
+            count = self._rng.choice((1, 1, 1, 2))
+        tx["asset_transfers"] = [self._transfer(watch, inbound=bool(index % 2)) for index in range(count)]
+        return tx
+
+    def wallet_transactions_payload(
+        self,
+        watches: Optional[List[WatchAddress]] = None,
+        txs_per_wallet: int = 4,
+        now_ts: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        now = int(now_ts if now_ts is not None else time.time())
+        rows: List[Dict[str, Any]] = []
+        for watch in watches if watches is not None else self.watchlist:
+            count = self._rng.randint(0, txs_per_wallet * 2)
+            items = [self.transaction(watch, now - self._rng.randint(1, 900)) for _ in range(count)]
+            rows.append({"address": watch.address, "chain": watch.chain, "items": items})
+        return rows
+
+    def wallet_balances_payload(self, watches: Optional[List[WatchAddress]] = None, tokens_per_wallet: int = 12) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        for watch in watches if watches is not None else self.watchlist:
+            items: List[Dict[str, Any]] = []
+            for _ in range(self._rng.randint(1, tokens_per_wallet)):
+                symbol, token_address, decimals, price = self._rng.choice(TOKENS)
+                amount = self._usd_amount() / price
+                items.append(
+                    {
+                        "chain": watch.chain,
+                        "token": {"address": token_address, "symbol": symbol, "decimals": decimals, "price": price},
+                        "raw_balance": str(int(amount * (10 ** decimals))),
+                        "decimals": decimals,
+                    }
+                )
+            rows.append({"address": watch.address, "items": items})
+        return rows
+
+    def prices(self) -> Dict[str, float]:
+        return {f"{chain}:{token}": price for chain in set(CHAINS) for _, token, _, price in TOKENS}
+
@@ -0,0 +1,55 @@
+import threading
+import unittest
+
+from benchmarks.allium_standin import StandinConfig, make_server
+from pequod.allium_client import AlliumClient, AlliumError
+from pequod.tx_extractors import normalize_transactions
+
+WATCH = "0x1111111111111111111111111111111111111111"
+USDC = "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"
+
+
+class AlliumStandinTests(unittest.TestCase):
+    def _serve(self, config: StandinConfig) -> AlliumClient:
+        server = make_server("127.0.0.1", 0, config)
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 2)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address[:2]
+        return AlliumClient(base_url=f"http://{host}:{port}", api_key="test", min_request_interval_seconds=0)
+
+    def test_serves_wallet_price_and_explorer_endpoints(self) -> None:
+        client = self._serve(StandinConfig(txs_per_wallet=6, pages=2, explorer_run_seconds=0))
+        addresses = [{"chain": "ethereum", "address": WATCH}]
+
+        first = client.wallet_transactions(addresses)
+        self.assertEqual(first["cursor"], "page-2")
+        second = client.wallet_transactions(addresses, cursor=first["cursor"])
+        self.assertNotIn("cursor", second)
+        normalized = normalize_transactions(first, {WATCH: "ethereum"})
+        self.assertTrue(all(tx.watch_address == WATCH for tx in normalized))
+
+        self.assertEqual(client.wallet_balances(addresses)[0]["address"], WATCH)
+        quotes = client.prices([{"chain": "ethereum", "token_address": USDC}])
+        self.assertEqual(quotes[0].price, 1.0)
+
+        query_id = client.explorer_create_query("geo", f"SELECT * FROM t WHERE address IN ('{WATCH}')")
+        run_id = client.explorer_run_query_async(query_id)
+        self.assertEqual(client.explorer_query_status(run_id), "success")
+        self.assertEqual(client.explorer_query_results(run_id)["data"][0]["address"], WATCH)
+
+    def test_injects_rate_limit_and_server_errors(self) -> None:
+        client = self._serve(StandinConfig(rate_limit_per_second=1))
+        client.prices([{"chain": "ethereum", "token_address": USDC}])
+        with self.assertRaisesRegex(AlliumError, "HTTP 429"):
+            client.prices([{"chain": "ethereum", "token_address": USDC}])
+
+        failing = self._serve(StandinConfig(error_5xx_rate=1.0))
+        with self.assertRaisesRegex(AlliumError, r"HTTP 50[023]"):
+            failing.wallet_balances([{"chain": "ethereum", "address": WATCH}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+import json
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List, Optional
+
+from pequod.backfill import BackfillCheckpoint, Backfiller
+from pequod.dashboard_state import DashboardSink, DashboardState
+from pequod.dedupe import DedupeStore
+from pequod.history import HistoryStore
+from pequod.poller import WhalePoller
+from pequod.sinks import AlertLogSink, AlertSink, MultiSink
+from pequod.types import WatchAddress
+
+WATCH = "0x1111111111111111111111111111111111111111"
+
+
+class PagedClient:
+    def __init__(self, pages: Dict[Optional[str], Any]) -> None:
+        self._pages = pages
+        self.cursors: List[Optional[str]] = []
+
+    def wallet_transactions(self, addresses: List[Dict[str, str]], cursor: Optional[str] = None) -> Any:
+        self.cursors.append(cursor)
+        return self._pages[cursor]
+
+    def get_cached_price(self, chain: str, token_address: str, ttl_seconds: int = 60) -> None:
+        return None
+
+
+def _item(tx_hash: str, ts: int, usd: float) -> Dict[str, Any]:
+    return {
+        "address": WATCH,
+        "transaction_hash": tx_hash,
+        "chain": "ethereum",
+        "activity_type": "asset_transfer",
+        "from_address": WATCH,
+        "to_address": "0x2222222222222222222222222222222222222222",
+        "amount": 1,
+        "usd_value": usd,
+        "block_timestamp": ts,
+    }
+
+
+class BackfillTests(unittest.TestCase):
+    def _backfiller(
+        self,
+        tmp: Path,
+        client: PagedClient,
+        since: int,
+        until: int,
+        history: Optional[HistoryStore] = None,
+    ) -> Backfiller:
+        watchlist = [WatchAddress(chain="ethereum", address=WATCH, label="Watch Whale")]
+        sinks: List[AlertSink] = [AlertLogSink(tmp / "alerts.jsonl")]
+        if history is not None:
+            sinks.append(DashboardSink(DashboardState(watchlist, history=history, max_history_seconds=86_400)))
+        poller = WhalePoller(
+            client=client,  # type: ignore[arg-type]
+            watchlist=list(watchlist),
+            dedupe_store=DedupeStore(tmp / "dedupe.sqlite3"),
+            sink=MultiSink(sinks),
+            min_alert_usd=1000.0,
+            max_addresses_per_request=20,
+            poll_interval_seconds=20,
+            lookback_seconds=int(time.time()) - since + 1,
+        )
+        return Backfiller(
+            client=client,  # type: ignore[arg-type]
+            poller=poller,
+            watchlist=watchlist,
+            checkpoint=BackfillCheckpoint(tmp / "checkpoint.json", since=since, until=until),
+            since=since,
+            until=until,
+            batch_size=20,
+            workers=2,
+            max_pages=10,
+        )
+
+    def test_pages_window_records_alerts_and_checkpoints(self) -> None:
+        until = int(time.time()) - 60
+        since = until - 7200
+        client = PagedClient(
+            {
+                None: {"items": [_item("0xnew", until + 30, 5000), _item("0xb", until - 100, 5000)], "cursor": "p2"},
+                "p2": {"items": [_item("0xa", since + 10, 2000), _item("0xold", since - 10, 9000)], "cursor": "p3"},
+            }
+        )
+        with TemporaryDirectory() as tmp:
+            history = HistoryStore(Path(tmp) / "history.sqlite3")
+            totals = self._backfiller(Path(tmp), client, since, until, history=history).run()
+            records = [json.loads(line) for line in (Path(tmp) / "alerts.jsonl").read_text(encoding="utf-8").splitlines()]
+            history_alerts, _ = history.query(start_ts=since, end_ts=until)
+            history.close()
+            checkpoint = json.loads((Path(tmp) / "checkpoint.json").read_text(encoding="utf-8"))
+
+            resumed_client = PagedClient({})
+            resumed = self._backfiller(Path(tmp), resumed_client, since, until).run()
+
+        self.assertEqual([None, "p2"], client.cursors)
+        self.assertEqual(["0xa", "0xb"], [row["tx_id"] for row in records])
+        self.assertEqual(["0xb", "0xa"], [row["tx_id"] for row in history_alerts])
+        self.assertEqual(2, totals["alerts"])
+        self.assertEqual(1, len(checkpoint["completed_batches"]))
+        self.assertEqual([], resumed_client.cursors)
+        self.assertEqual(0, resumed["batches"])
+
+    def test_running_poller_sees_keys_backfilled_into_its_dedupe_db(self) -> None:
+        until = int(time.time()) - 60
+        since = until - 7200
+        client = PagedClient({None: {"items": [_item("0xa", since + 10, 2000)]}})
+        with TemporaryDirectory() as tmp:
+            # Opened before the run, like a poller that is already up.
+            live = DedupeStore(Path(tmp) / "dedupe.sqlite3")
+            self._backfiller(Path(tmp), client, since, until).run()
+            records = [json.loads(line) for line in (Path(tmp) / "alerts.jsonl").read_text(encoding="utf-8").splitlines()]
+            unseen_after = live.filter_unseen([records[0]["dedupe_key"]])
+            live.close()
+
+        self.assertEqual(1, len(records))
+        self.assertEqual([], unseen_after)
+
+    def test_unexpected_batch_error_is_counted_and_not_checkpointed(self) -> None:
+        until = int(time.time()) - 60
+        since = until - 7200
+
+        class BrokenClient(PagedClient):
+            def wallet_transactions(self, addresses: List[Dict[str, str]], cursor: Optional[str] = None) -> Any:
+                raise ValueError("malformed page")
+
+        with TemporaryDirectory() as tmp:
+            totals = self._backfiller(Path(tmp), BrokenClient({}), since, until).run()
+            checkpoint_written = (Path(tmp) / "checkpoint.json").exists()
+
+        self.assertEqual(1, totals["failed_batches"])
+        self.assertEqual(0, totals["batches"])
+        self.assertFalse(checkpoint_written)
+
+    def test_burst_is_scored_at_event_time(self) -> None:
+        until = int(time.time()) - 86_400
+        since = until - 7200
+        base = since + 600
+        client = PagedClient(
+            {None: {"items": [_item(f"0x{index}", base + index * 30, 5000) for index in range(3)]}}
+        )
+        with TemporaryDirectory() as tmp:
+            self._backfiller(Path(tmp), client, since, until).run()
+            records = [json.loads(line) for line in (Path(tmp) / "alerts.jsonl").read_text(encoding="utf-8").splitlines()]
+
+        self.assertEqual(["0x0", "0x1", "0x2"], [row["tx_id"] for row in records])
+        self.assertNotIn("burst_activity", records[1]["score_breakdown"])
+        self.assertEqual(4.0, records[2]["score_breakdown"]["burst_activity"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List, Optional
+
+from pequod.allium_client import PriceQuote
+from pequod.batch import NO_INDEX, TS_MISSING, CycleBatch
+from pequod.dedupe import DedupeStore
+from pequod.poller import WhalePoller
+from pequod.sinks import AlertSink
+from pequod.tx_extractors import normalize_into_batch, normalize_transactions
+from pequod.types import Alert, NormalizedTransaction, WatchAddress
+
+WATCH = "0x1111111111111111111111111111111111111111"
+
+
+class RecordingSink(AlertSink):
+    def __init__(self) -> None:
+        self.alerts: List[Alert] = []
+
+    def send(self, alert: Alert) -> None:
+        self.alerts.append(alert)
+
+
+class PricedClient:
+    def __init__(self, prices_by_key: Dict[str, float]) -> None:
+        self._prices_by_key = prices_by_key
+        self._cache: Dict[str, float] = {}
+
+    def prices(self, tokens: List[Dict[str, str]]) -> List[PriceQuote]:
+        quotes: List[PriceQuote] = []
+        for item in tokens:
+            key = f"{item['chain'].lower()}:{item['token_address'].lower()}"
+            price = self._prices_by_key.get(key)
+            if price is None:
+                continue
+            self._cache[key] = price
+            quotes.append(PriceQuote(chain=item["chain"], token_address=item["token_address"], price=price, symbol=None))
+        return quotes
+
+    def get_cached_price(self, chain: str, token_address: str, ttl_seconds: int = 60) -> Optional[PriceQuote]:
+        price = self._cache.get(f"{chain.lower()}:{token_address.lower()}")
+        if price is None:
+            return None
+        return PriceQuote(chain=chain.lower(), token_address=token_address.lower(), price=price, symbol=None)
+
+
+def _payload(now: int) -> List[Dict[str, Any]]:
+    items: List[Dict[str, Any]] = [
+        {
+            "transaction_hash": "0xbig",
+            "chain": "ethereum",
+            "activity_type": "asset_transfer",
+            "from_address": WATCH,
+            "to_address": "0x2222222222222222222222222222222222222222",
+            "token_address": "0xToken",
+            "amount": 50,
+            "block_timestamp": now - 10,
+        },
+        {
+            "transaction_hash": "0xsmall",
+            "chain": "ethereum",
+            "activity_type": "asset_transfer",
+            "from_address": WATCH,
+            "to_address": "0x3333333333333333333333333333333333333333",
+            "token_address": "0xtoken",
+            "amount": 1,
+            "block_timestamp": now - 5,
+        },
+        {
+            "transaction_hash": "0xunpriced",
+            "chain": "ethereum",
+            "activity_type": "asset_transfer",
+            "from_address": WATCH,
+            "to_address": "0x4444444444444444444444444444444444444444",
+            "token_address": "0xunknown",
+            "amount": 7,
+            "block_timestamp": now - 3,
+        },
+        {
+            "transaction_hash": "0xquoted",
+            "chain": "ethereum",
+            "activity_type": "asset_transfer",
+            "from_address": WATCH,
+            "to_address": "0x5555555555555555555555555555555555555555",
+            "usd_value": 25000,
+            "block_timestamp": now - 1,
+        },
+    ]
+    return [{"address": WATCH, "items": items}]
+
+
+class CycleBatchTests(unittest.TestCase):
+    def _build_poller(self, tmp_dir: Path, sink: RecordingSink) -> WhalePoller:
+        return WhalePoller(
+            client=PricedClient({"ethereum:0xtoken": 100.0}),  # type: ignore[arg-type]
+            watchlist=[WatchAddress(chain="ethereum", address=WATCH, label="Watch Whale")],
+            dedupe_store=DedupeStore(tmp_dir / "dedupe.sqlite3"),
+            sink=sink,
+            min_alert_usd=1000.0,
+            max_addresses_per_request=20,
+            poll_interval_seconds=20,
+            lookback_seconds=3600,
+        )
+
+    def test_batch_rows_match_list_normalization(self) -> None:
+        payload = _payload(int(time.time()))
+        expected = normalize_transactions(payload, {WATCH: "ethereum"})
+        batch = CycleBatch()
+
+        self.assertEqual(len(expected), normalize_into_batch(payload, {WATCH: "ethereum"}, batch))
+        self.assertEqual(expected, batch.transactions())
+        self.assertEqual([("ethereum", "0xtoken"), ("ethereum", "0xunknown")], batch.tokens)
+        self.assertEqual([WATCH], batch.watches)
+        self.assertEqual([0, 0, 1, NO_INDEX], list(batch.token_index))
+        self.assertEqual([0, 0, 0, 1], list(batch.has_usd))
+
+    def test_missing_columns_use_sentinels(self) -> None:
+        batch = CycleBatch.from_transactions(
+            [
+                NormalizedTransaction(
+                    chain="ethereum",
+                    tx_id="0x1",
+                    tx_type="transfer",
+                    timestamp=None,
+                    from_address=None,
+                    to_address=None,
+                    token_address=None,
+                    token_symbol=None,
+                    amount=None,
+                    usd_value=None,
+                    watch_address=None,
+                    raw={},
+                )
+            ]
+        )
+
+        self.assertEqual(TS_MISSING, batch.timestamps[0])
+        self.assertEqual(NO_INDEX, batch.token_index[0])
+        self.assertEqual(NO_INDEX, batch.watch_index[0])
+        self.assertEqual((0, 0), (batch.has_usd[0], batch.has_amount[0]))
+
+    def test_batch_and_list_paths_produce_same_cycle(self) -> None:
+        now = int(time.time())
+        payload = _payload(now)
+        with TemporaryDirectory() as tmp:
+            list_sink = RecordingSink()
+            list_poller = self._build_poller(Path(tmp) / "list", list_sink)
+            list_cycle = list_poller._process_transactions(normalize_transactions(payload, {WATCH: "ethereum"}))
+
+            batch_sink = RecordingSink()
+            batch_poller = self._build_poller(Path(tmp) / "batch", batch_sink)
+            batch = CycleBatch()
+            normalize_into_batch(payload, {WATCH: "ethereum"}, batch)
+            batch_cycle = batch_poller._process_batch(batch)
+
+        self.assertEqual(list_cycle, batch_cycle)
+        self.assertEqual(4, batch_cycle["events_new"])
+        self.assertEqual(3, batch_cycle["events_usable"])
+        self.assertEqual(1, batch_cycle["price_missing"])
+        self.assertEqual(2, batch_cycle["alerts_sent"])
+        self.assertEqual(
+            [alert.dedupe_key for alert in list_sink.alerts],
+            [alert.dedupe_key for alert in batch_sink.alerts],
+        )
+        self.assertEqual(
+            list_poller._latest_timestamp_by_watch_address,
+            batch_poller._latest_timestamp_by_watch_address,
+        )
+        self.assertEqual(now - 1, batch_poller._latest_timestamp_by_watch_address[WATCH.lower()])
+
+    def test_filtered_rows_are_never_materialized(self) -> None:
+        payload = _payload(int(time.time()))
+        batch = CycleBatch()
+        normalize_into_batch(payload, {WATCH: "ethereum"}, batch)
+        with TemporaryDirectory() as tmp:
+            self._build_poller(Path(tmp), RecordingSink())._process_batch(batch)
+
+        built = [isinstance(row, NormalizedTransaction) for row in batch._rows]
+        self.assertEqual([True, False, False, True], built)
+
+    def test_rows_at_or_below_watermark_are_skipped(self) -> None:
+        now = int(time.time())
+        with TemporaryDirectory() as tmp:
+            sink = RecordingSink()
+            poller = self._build_poller(Path(tmp), sink)
+            poller._latest_timestamp_by_watch_address[WATCH.lower()] = now - 5
+            batch = CycleBatch()
+            normalize_into_batch(_payload(now), {WATCH: "ethereum"}, batch)
+            cycle = poller._process_batch(batch)
+
+        self.assertEqual(2, cycle["events_new"])
+        self.assertEqual(["0xquoted"], [alert.tx_id for alert in sink.alerts])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from benchmarks.run import BENCHMARKS, compare, run_benchmarks
+from tests.synthetic import SyntheticTraffic
+from pequod.balances import extract_wallet_balance_summary
+from pequod.tx_extractors import normalize_transactions
+
+
+class SyntheticTrafficTests(unittest.TestCase):
+    def test_generator_is_deterministic_for_a_seed(self) -> None:
+        first = SyntheticTraffic(seed=3, wallets=20)
+        second = SyntheticTraffic(seed=3, wallets=20)
+        self.assertEqual(first.watchlist, second.watchlist)
+        self.assertEqual(
+            first.wallet_transactions_payload(now_ts=1_700_000_000),
+            second.wallet_transactions_payload(now_ts=1_700_000_000),
+        )
+
+    def test_payloads_normalize_into_multi_transfer_events(self) -> None:
+        traffic = SyntheticTraffic(seed=5, wallets=50)
+        address_to_chain = {item.address.lower(): item.chain for item in traffic.watchlist}
+        payload = traffic.wallet_transactions_payload(txs_per_wallet=4, now_ts=1_700_000_000)
+        raw_count = sum(len(row["items"]) for row in payload)
+        normalized = normalize_transactions(payload, address_to_chain)
+
+        self.assertGreater(len(normalized), raw_count)
+        self.assertGreater(len({tx.chain for tx in normalized}), 1)
+        self.assertTrue(extract_wallet_balance_summary(traffic.wallet_balances_payload()))
+
+
+class BenchmarkRunnerTests(unittest.TestCase):
+    def test_quick_run_reports_every_benchmark(self) -> None:
+        report = run_benchmarks(seed=1, scale_name="quick", only=["normalize_transactions", "dedupe_store"])
+
+        self.assertEqual(set(report["results"]), {"normalize_transactions", "dedupe_store"})
+        for row in report["results"].values():
+            self.assertGreater(row["ops"], 0)
+            self.assertGreater(row["ops_per_second"], 0)
+        self.assertIn("normalize_transactions", BENCHMARKS)
+
+    def test_cycle_filter_paths_cover_the_same_transactions(self) -> None:
+        report = run_benchmarks(seed=1, scale_name="quick", only=["cycle_filter_list", "cycle_filter_batch"])
+
+        results = report["results"]
+        self.assertEqual(results["cycle_filter_list"]["ops"], results["cycle_filter_batch"]["ops"])
+        self.assertGreater(results["cycle_filter_batch"]["ops_per_second"], 0)
+
+        lines = compare(report, {"results": {"normalize_transactions": {"ops_per_second": 1.0}}})
+        self.assertEqual(len(lines), 2)
+        self.assertIn("(new)", lines[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
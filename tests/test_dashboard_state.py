@@ -3,6 +3,7 @@ import time
 
 from pequod.dashboard_state import DashboardState
 from pequod.types import Alert, WatchAddress
+from pequod.watchlist import WatchlistDiff
 
 
 class DashboardStateTests(unittest.TestCase):
@@ -125,6 +126,35 @@ class DashboardStateTests(unittest.TestCase):
         addresses = [row["address"] for row in snapshot["whales"]]
         self.assertIn("0xnew", addresses)
 
+    def test_apply_watchlist_diff_relabels_and_removes_rows(self) -> None:
+        watchlist = [
+            WatchAddress(chain="ethereum", address="0xwatch", label="Whale 1"),
+            WatchAddress(chain="ethereum", address="0xgone", label="Whale 2"),
+        ]
+        state = DashboardState(watchlist=watchlist, max_alerts=10, max_events=10)
+        state.apply_watchlist_diff(
+            WatchlistDiff(
+                removed=[WatchAddress(chain="ethereum", address="0xgone", label="Whale 2")],
+                relabeled=[WatchAddress(chain="ethereum", address="0xwatch", label="Whale One")],
+            )
+        )
+        whales = state.snapshot()["whales"]
+        self.assertEqual(["0xwatch"], [row["address"] for row in whales])
+        self.assertEqual("Whale One", whales[0]["label"])
+
+    def test_apply_watchlist_diff_removes_one_chain_of_a_shared_address(self) -> None:
+        watchlist = [
+            WatchAddress(chain="ethereum", address="0xwatch", label="Whale 1"),
+            WatchAddress(chain="base", address="0xwatch", label="Whale 1 Base"),
+        ]
+        state = DashboardState(watchlist=watchlist, max_alerts=10, max_events=10)
+        state.apply_watchlist_diff(WatchlistDiff(removed=[watchlist[0]]))
+        snapshot = state.snapshot()
+
+        self.assertEqual([("0xwatch", "Whale 1 Base")], [(row["address"], row["label"]) for row in snapshot["whales"]])
+        self.assertNotIn("ethereum", snapshot["filters_meta"]["available_chains"])
+        self.assertIn("base", snapshot["filters_meta"]["available_chains"])
+
 
 if __name__ == "__main__":
     unittest.main()
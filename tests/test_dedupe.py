@@ -0,0 +1,192 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from pequod.dedupe import MAX_KEYS_PER_QUERY, BloomFilter, DedupeCompactor, DedupeStore
+from pequod.outbox import Outbox
+
+
+class DedupeStoreTests(unittest.TestCase):
+    def test_filter_unseen_keeps_order_and_drops_duplicates(self) -> None:
+        with TemporaryDirectory() as tmp:
+            store = DedupeStore(Path(tmp) / "dedupe.sqlite3")
+            store.mark_seen("b")
+            unseen = store.filter_unseen(["c", "b", "a", "c"])
+            store.close()
+
+        self.assertEqual(["c", "a"], unseen)
+
+    def test_filter_unseen_spans_query_chunks(self) -> None:
+        keys = [f"key-{index}" for index in range(MAX_KEYS_PER_QUERY * 2 + 3)]
+        with TemporaryDirectory() as tmp:
+            store = DedupeStore(Path(tmp) / "dedupe.sqlite3")
+            for key in keys[::2]:
+                store.mark_seen(key)
+            unseen = store.filter_unseen(keys)
+            store.close()
+
+        self.assertEqual(keys[1::2], unseen)
+
+
+    def test_mark_seen_many_writes_each_key_once(self) -> None:
+        with TemporaryDirectory() as tmp:
+            store = DedupeStore(Path(tmp) / "dedupe.sqlite3")
+            self.assertEqual(2, store.mark_seen_many(["a", "b", "a"]))
+            self.assertEqual(0, store.mark_seen_many([]))
+            store.mark_seen_many(["b", "c"])
+            unseen = store.filter_unseen(["a", "b", "c", "d"])
+            store.close()
+
+        self.assertEqual(["d"], unseen)
+
+    def test_uses_wal_journal(self) -> None:
+        with TemporaryDirectory() as tmp:
+            store = DedupeStore(Path(tmp) / "dedupe.sqlite3")
+            mode = store._conn.execute("PRAGMA journal_mode").fetchone()[0]
+            store.close()
+
+        self.assertEqual("wal", mode)
+
+    def test_bloom_filter_has_no_false_negatives(self) -> None:
+        bloom = BloomFilter(1000)
+        keys = [f"ethereum:0x{index:064x}:transfer:0" for index in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        false_positives = sum(f"other-{index}" in bloom for index in range(5000))
+
+        self.assertTrue(all(key in bloom for key in keys))
+        self.assertLess(false_positives, 150)
+
+    def test_front_cache_is_rebuilt_from_disk_and_stays_exact(self) -> None:
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "dedupe.sqlite3"
+            store = DedupeStore(path)
+            store.mark_seen_many(["a", "b"])
+            store.close()
+
+            store = DedupeStore(path, lru_size=0)
+            unseen = store.filter_unseen(["a", "b", "c"])
+            stats = store.cache_stats()
+            store.close()
+
+        self.assertEqual(["c"], unseen)
+        self.assertEqual(2, stats["bloom_keys"])
+        self.assertEqual(2, stats["sqlite_lookups"] - stats["bloom_false_positives"])
+
+    def test_keys_written_by_another_store_on_the_same_file_are_seen(self) -> None:
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "dedupe.sqlite3"
+            poller = DedupeStore(path)
+            backfill = DedupeStore(path)
+            before = poller.filter_unseen(["a", "b"])
+            backfill.mark_seen_many(["a"])
+            after = poller.filter_unseen(["a", "b"])
+            poller.mark_seen("c")
+            seen_by_backfill = backfill.filter_unseen(["a", "c"])
+            rows = poller.storage_stats()["rows"]
+            poller.close()
+            backfill.close()
+
+        self.assertEqual(["a", "b"], before)
+        self.assertEqual(["b"], after)
+        self.assertEqual([], seen_by_backfill)
+        self.assertEqual(2, rows)
+
+    def test_reports_tier_hit_ratios(self) -> None:
+        with TemporaryDirectory() as tmp:
+            store = DedupeStore(Path(tmp) / "dedupe.sqlite3")
+            store.mark_seen_many(["a", "b"])
+            unseen = store.filter_unseen(["a", "b", "c", "d"])
+            stats = store.cache_stats()
+            store.close()
+
+        self.assertEqual(["c", "d"], unseen)
+        self.assertEqual(2, stats["lru_hits"])
+        self.assertEqual(0.5, stats["lru_hit_ratio"])
+        self.assertEqual(stats["bloom_negatives"] + stats["lru_hits"] + stats["sqlite_lookups"], stats["lookups"])
+        self.assertGreaterEqual(stats["cache_hit_ratio"], 0.5)
+
+    def test_bloom_grows_past_capacity_without_losing_keys(self) -> None:
+        keys = [f"key-{index}" for index in range(40)]
+        with TemporaryDirectory() as tmp:
+            store = DedupeStore(Path(tmp) / "dedupe.sqlite3", bloom_capacity=8, lru_size=4)
+            for start in range(0, len(keys), 5):
+                store.mark_seen_many(keys[start : start + 5])
+            unseen = store.filter_unseen([*keys, "fresh"])
+            stats = store.cache_stats()
+            store.close()
+
+        self.assertEqual(["fresh"], unseen)
+        self.assertGreaterEqual(stats["bloom_capacity"], 40)
+        self.assertEqual(4, stats["lru_keys"])
+
+    def test_compaction_deletes_expired_keys_in_batches(self) -> None:
+        keys = [f"key-{index}" for index in range(25)]
+        with TemporaryDirectory() as tmp:
+            store = DedupeStore(Path(tmp) / "dedupe.sqlite3")
+            store.mark_seen_many(keys)
+            store._conn.execute("UPDATE seen_alerts SET seen_at = 100 WHERE dedupe_key < 'key-2'")
+            deleted = store.compact_expired(cutoff_ts=1_000, batch_size=4)
+            unseen = store.filter_unseen(keys)
+            stats = store.storage_stats()
+            plan = store._conn.execute("EXPLAIN QUERY PLAN DELETE FROM seen_alerts WHERE seen_at < 5").fetchall()
+            auto_vacuum = store._conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            store.close()
+
+        expired = [key for key in keys if key < "key-2"]
+        self.assertEqual(len(expired), deleted)
+        self.assertEqual(expired, unseen)
+        self.assertEqual(len(keys) - len(expired), stats["rows"])
+        self.assertEqual(len(expired), stats["deleted_total"])
+        self.assertGreater(stats["db_bytes"], 0)
+        self.assertIn("idx_seen_alerts_seen_at", " ".join(str(row) for row in plan))
+        self.assertEqual(2, auto_vacuum)
+
+    def test_compactor_uses_retention_window(self) -> None:
+        with TemporaryDirectory() as tmp:
+            store = DedupeStore(Path(tmp) / "dedupe.sqlite3")
+            store.mark_seen_many(["old", "new"])
+            store._conn.execute("UPDATE seen_alerts SET seen_at = 1000 WHERE dedupe_key = 'old'")
+            store._conn.execute("UPDATE seen_alerts SET seen_at = 1900 WHERE dedupe_key = 'new'")
+            disabled = DedupeCompactor(store, retention_seconds=0).run_once(now_ts=2000)
+            deleted = DedupeCompactor(store, retention_seconds=500).run_once(now_ts=2000)
+            unseen = store.filter_unseen(["old", "new"])
+            store.close()
+
+        self.assertEqual(0, disabled)
+        self.assertEqual(1, deleted)
+        self.assertEqual(["old"], unseen)
+
+    def test_compactor_keeps_keys_of_alerts_still_in_the_outbox(self) -> None:
+        with TemporaryDirectory() as tmp:
+            store = DedupeStore(Path(tmp) / "dedupe.sqlite3")
+            outbox = Outbox(Path(tmp) / "outbox.sqlite3")
+            store.mark_seen_many(["older", "pending"])
+            store._conn.execute("UPDATE seen_alerts SET seen_at = 900 WHERE dedupe_key = 'older'")
+            store._conn.execute("UPDATE seen_alerts SET seen_at = 1000 WHERE dedupe_key = 'pending'")
+            outbox.enqueue_many([("pending", "{}")], ["ConsoleSink"], now_ts=1000)
+            compactor = DedupeCompactor(store, retention_seconds=500, oldest_pending=outbox.oldest_pending_at)
+            held = compactor.run_once(now_ts=2000)
+            outbox.ack_many("ConsoleSink", [1])
+            released = compactor.run_once(now_ts=2000)
+            outbox.close()
+            store.close()
+
+        self.assertEqual(1, held)
+        self.assertEqual(1, released)
+
+    def test_storage_stats_are_served_from_the_last_refresh(self) -> None:
+        with TemporaryDirectory() as tmp:
+            store = DedupeStore(Path(tmp) / "dedupe.sqlite3")
+            store.mark_seen_many(["a", "b"])
+            stale = store.storage_stats()
+            store.refresh_storage_stats()
+            fresh = store.storage_stats()
+            store.close()
+
+        self.assertEqual((2, 0), (stale["rows"], stale["oldest_seen_at"]))
+        self.assertGreater(fresh["oldest_seen_at"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
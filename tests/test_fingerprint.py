@@ -0,0 +1,45 @@
+import unittest
+
+from pequod.alerts import build_alert
+from pequod.fingerprint import FINGERPRINT_BYTES, fingerprint, tx_fingerprint
+from pequod.tx_extractors import normalize_transactions
+
+TX = {
+    "chain": "ethereum",
+    "block_number": 19000123,
+    "from_address": "0xAbC",
+    "to_address": "0xdef",
+    "amount": 1000,
+    "fee": {"usd_value": 3.1},
+    "labels": ["dex"],
+}
+
+
+class FingerprintTests(unittest.TestCase):
+    def test_fingerprint_is_canonical_and_fixed_width(self) -> None:
+        value = fingerprint("0xAbC ", 1000.0, None, True)
+        self.assertEqual(FINGERPRINT_BYTES * 2, len(value))
+        self.assertEqual(value, fingerprint("0xabc", 1000, "", 1 == 1))
+        self.assertNotEqual(value, fingerprint("0xabc", 1000.5, None, True))
+        self.assertNotEqual(fingerprint("a", "b"), fingerprint("ab", ""))
+
+    def test_tx_fingerprint_uses_only_identifying_fields(self) -> None:
+        baseline = tx_fingerprint(TX)
+        self.assertEqual(baseline, tx_fingerprint({**TX, "fee": {"usd_value": 9.9}, "labels": []}))
+        self.assertEqual(baseline, tx_fingerprint({**TX, "from_address": "0xabc"}))
+        self.assertNotEqual(baseline, tx_fingerprint({**TX, "block_number": 19000124}))
+        self.assertNotEqual(baseline, tx_fingerprint({**TX, "asset_transfers": [{}]}))
+
+    def test_hashless_transactions_get_stable_ids_and_suffixes(self) -> None:
+        first = normalize_transactions({"items": [dict(TX)]}, {})[0]
+        second = normalize_transactions({"items": [{**TX, "fee": None}]}, {}, compiled=False)[0]
+        self.assertEqual(f"tx_{tx_fingerprint(TX)}", first.tx_id)
+        self.assertEqual(first.tx_id, second.tx_id)
+
+        alert = build_alert(first, 1000.0, {})
+        self.assertEqual(alert.dedupe_key, build_alert(second, 1000.0, {}).dedupe_key)
+        self.assertTrue(alert.dedupe_key.endswith(fingerprint("0xAbC", "0xdef", None, 1000.0, None)))
+
+
+if __name__ == "__main__":
+    unittest.main()
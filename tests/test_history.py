@@ -0,0 +1,164 @@
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, Tuple
+
+from pequod.dashboard_state import DashboardState
+from pequod.history import HistoryStore
+from pequod.types import Alert, WatchAddress
+
+WATCHLIST = [WatchAddress(chain="ethereum", address="0xwatch", label="Whale 1")]
+
+
+def _row(
+    index: int,
+    ts: int,
+    chain: str = "ethereum",
+    event_type: str = "transfer",
+    usd: float = 50_000.0,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    alert_row = {
+        "dedupe_key": f"key-{index}",
+        "timestamp": ts,
+        "chain": chain,
+        "usd_value": usd,
+        "watch_address": "0xWatch",
+    }
+    event = {"event_id": f"key-{index}", "timestamp": ts, "event_type": event_type, "score": 10.0}
+    return alert_row, event
+
+
+def _alert(index: int, ts: int) -> Alert:
+    return Alert(
+        dedupe_key=f"ethereum:0x{index}:asset_transfer:0",
+        text=f"alert {index}",
+        usd_value=100_000.0 + index,
+        tx_id=f"0x{index}",
+        chain="ethereum",
+        tx_type="asset_transfer",
+        timestamp=ts,
+        watch_address="0xwatch",
+        from_address="0xwatch",
+        to_address="0xother",
+        token_symbol="USDC",
+        token_address="0xa0b8",
+        amount=100_000.0,
+        raw={},
+        score=20.0,
+    )
+
+
+class HistoryStoreTests(unittest.TestCase):
+    def test_query_filters_and_orders_newest_first(self) -> None:
+        now = int(time.time())
+        with TemporaryDirectory() as tmp:
+            store = HistoryStore(Path(tmp) / "history.sqlite3")
+            store.append_many(
+                [
+                    _row(1, now - 300),
+                    _row(2, now - 100, chain="base"),
+                    _row(3, now - 50, event_type="bridge", usd=5_000.0),
+                    _row(4, now - 10),
+                    _row(5, now - 7200),
+                ]
+            )
+            alerts, events = store.query(start_ts=now - 3600, end_ts=now)
+            eth_only, _ = store.query(start_ts=now - 3600, end_ts=now, chains=["Ethereum"], min_usd=10_000.0)
+            _, bridges = store.query(start_ts=now - 3600, end_ts=now, types=["bridge"])
+            stats = store.window_stats(start_ts=now - 3600, end_ts=now, now_ts=now)
+            store.close()
+
+        self.assertEqual(["key-4", "key-3", "key-2", "key-1"], [row["dedupe_key"] for row in alerts])
+        self.assertEqual(["key-4", "key-3", "key-2", "key-1"], [row["event_id"] for row in events])
+        self.assertEqual(["key-4", "key-1"], [row["dedupe_key"] for row in eth_only])
+        self.assertEqual(["key-3"], [row["event_id"] for row in bridges])
+        self.assertEqual({"event_count": 4, "score_15m": 40.0, "events_5m": 4}, stats)
+
+    def test_window_queries_use_indexes(self) -> None:
+        with TemporaryDirectory() as tmp:
+            store = HistoryStore(Path(tmp) / "history.sqlite3")
+            plans = {
+                column: " ".join(
+                    str(row)
+                    for row in store._conn.execute(f"EXPLAIN QUERY PLAN SELECT id FROM alert_history WHERE {column} = ?", ("x",))
+                )
+                for column in ("chain", "event_type", "usd_value")
+            }
+            ts_plan = str(store._conn.execute("EXPLAIN QUERY PLAN SELECT id FROM alert_history WHERE ts > 5").fetchall())
+            store.close()
+
+        self.assertIn("idx_history_ts", ts_plan)
+        for column, plan in plans.items():
+            self.assertIn("INDEX idx_history_", plan, column)
+
+    def test_prune_drops_rows_older_than_cutoff(self) -> None:
+        now = int(time.time())
+        with TemporaryDirectory() as tmp:
+            store = HistoryStore(Path(tmp) / "history.sqlite3")
+            store.append_many([_row(index, now - index * 60) for index in range(10)])
+            deleted = store.prune(now - 270, batch_size=2)
+            stats = store.stats()
+            store.close()
+
+        self.assertEqual(5, deleted)
+        self.assertEqual(5, stats["rows"])
+
+
+class DashboardHistoryTests(unittest.TestCase):
+    def test_snapshot_reads_flushed_history_beyond_memory_limits(self) -> None:
+        now = int(time.time())
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "history.sqlite3"
+            store = HistoryStore(path, retention_seconds=3 * 86_400)
+            state = DashboardState(
+                watchlist=WATCHLIST,
+                max_alerts=2,
+                max_events=2,
+                history=store,
+                max_history_seconds=3 * 86_400,
+            )
+            for index in range(5):
+                state.ingest_alert(_alert(index, now - 60 * (index + 1)))
+            self.assertEqual(0, state.snapshot()["event_count"])
+
+            self.assertEqual(5, state.flush_history())
+            snapshot = state.snapshot()
+            store.close()
+
+            reopened = HistoryStore(path)
+            state = DashboardState(watchlist=WATCHLIST, history=reopened, max_history_seconds=3 * 86_400)
+            filters = state.set_filters({"window_seconds": 2 * 86_400, "replay_offset_seconds": 30 * 3600})
+            reloaded = state.snapshot()
+            reopened.close()
+
+        self.assertEqual(5, snapshot["event_count"])
+        self.assertEqual(5, len(snapshot["alerts"]))
+        self.assertEqual("ethereum:0x0:asset_transfer:0", snapshot["alerts"][0]["dedupe_key"])
+        self.assertEqual(5, snapshot["sea_state"]["events_5m"])
+        self.assertEqual(3 * 86_400, snapshot["filters_meta"]["max_replay_offset_seconds"])
+        self.assertEqual(30 * 3600, filters["replay_offset_seconds"])
+        self.assertEqual(0, reloaded["event_count"])
+        self.assertIn("ethereum", reloaded["filters_meta"]["available_chains"])
+        self.assertTrue(reloaded["filters_meta"]["available_event_types"])
+
+    def test_alerts_without_timestamp_filter_the_same_in_memory_and_history(self) -> None:
+        undated = _alert(1, 0)
+        undated.timestamp = None
+        counts: Dict[str, Tuple[int, int]] = {}
+        with TemporaryDirectory() as tmp:
+            store = HistoryStore(Path(tmp) / "history.sqlite3")
+            for mode, history in (("memory", None), ("history", store)):
+                state = DashboardState(watchlist=WATCHLIST, history=history, max_history_seconds=86_400)
+                state.ingest_alert(undated)
+                state.flush_history()
+                current = state.snapshot()["event_count"]
+                state.set_filters({"replay_offset_seconds": 7200})
+                counts[mode] = (current, state.snapshot()["event_count"])
+            store.close()
+
+        self.assertEqual({"memory": (1, 0), "history": (1, 0)}, counts)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Set, Tuple
+
+from pequod.http_transport import HttpRejectedError, HttpStatusError, HttpTransport, PermanentSinkError, TransportError
+from pequod.sinks import SINK_NETWORK_ERRORS, DiscordSink, GenericWebhookSink
+from pequod.types import Alert
+
+
+class WebhookServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), WebhookHandler)
+        self.bodies: List[Dict[str, Any]] = []
+        self.peers: Set[Tuple[str, int]] = set()
+        self.status = 204
+        self.reply: Dict[str, Any] = {}
+        self.close_after_reply = False
+        self.requests: List[Tuple[str, str]] = []
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: WebhookServer
+
+    def do_GET(self) -> None:
+        self.server.requests.append(("GET", self.path))
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self) -> None:
+        self.server.requests.append(("POST", self.path))
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        redirects = {"/old": (308, "/hook"), "/moved": (302, "/landing")}
+        if self.path in redirects:
+            status, location = redirects[self.path]
+            self.send_response(status)
+            self.send_header("Location", location)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/slow":
+            time.sleep(0.5)
+        self.server.bodies.append(json.loads(body))
+        self.server.peers.add(self.client_address)
+        body = json.dumps(self.server.reply).encode("utf-8") if self.server.reply else b""
+        self.send_response(self.server.status)
+        self.send_header("Content-Length", str(len(body)))
+        if self.server.status == 429:
+            self.send_header("Retry-After", "3")
+        self.end_headers()
+        self.wfile.write(body)
+        if self.server.close_after_reply:
+            self.close_connection = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        return
+
+
+def _alert(index: int) -> Alert:
+    return Alert(
+        dedupe_key=f"key-{index}",
+        text=f"alert {index}",
+        usd_value=50_000.0,
+        tx_id=f"0x{index}",
+        chain="ethereum",
+        tx_type="asset_transfer",
+        timestamp=1_700_000_000 + index,
+        watch_address="0xwatch",
+        from_address="0xwatch",
+        to_address="0xother",
+        token_symbol="USDC",
+        token_address="0xa0b8",
+        amount=50_000.0,
+        raw={"transaction_hash": f"0x{index}"},
+    )
+
+
+class HttpTransportTests(unittest.TestCase):
+    def _serve(self) -> Tuple[WebhookServer, str]:
+        server = WebhookServer()
+        thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 2)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address[:2]
+        return server, f"http://{host}:{port}"
+
+    def test_sinks_share_one_keep_alive_connection(self) -> None:
+        server, base_url = self._serve()
+        transport = HttpTransport(timeout_seconds=5)
+        self.addCleanup(transport.close)
+        discord = DiscordSink(f"{base_url}/discord", 5, rate_per_minute=6000, transport=transport)
+        webhook = GenericWebhookSink(f"{base_url}/hook", 5, transport=transport)
+        for index in range(3):
+            discord.send(_alert(index))
+            webhook.send(_alert(index))
+
+        self.assertEqual(6, len(server.bodies))
+        self.assertEqual(1, len(server.peers))
+        self.assertEqual({"requests": 6, "connections_opened": 1, "idle_connections": 1}, transport.stats())
+        self.assertEqual({"transaction_hash": "0x2"}, server.bodies[-1]["raw"])
+
+    def test_reconnects_when_the_server_closes_the_connection(self) -> None:
+        server, base_url = self._serve()
+        server.close_after_reply = True
+        transport = HttpTransport(timeout_seconds=5)
+        self.addCleanup(transport.close)
+        for index in range(3):
+            transport.post_json(f"{base_url}/hook", {"n": index})
+
+        self.assertEqual([{"n": 0}, {"n": 1}, {"n": 2}], server.bodies)
+        self.assertEqual(3, transport.stats()["connections_opened"])
+
+    def test_error_statuses_raise_with_retry_after(self) -> None:
+        server, base_url = self._serve()
+        transport = HttpTransport(timeout_seconds=5)
+        self.addCleanup(transport.close)
+        server.status = 429
+        server.reply = {"retry_after": 1.5}
+        with self.assertRaises(HttpStatusError) as limited:
+            transport.post_json(f"{base_url}/hook", {})
+        server.reply = {}
+        with self.assertRaises(HttpStatusError) as header_only:
+            transport.post_json(f"{base_url}/hook", {})
+        server.status = 500
+        with self.assertRaisesRegex(HttpStatusError, "HTTP 500"):
+            transport.post_json(f"{base_url}/hook", {})
+        with self.assertRaises(TransportError):
+            transport.post_json("ftp://example.test/hook", {})
+
+        self.assertEqual((429, 1.5), (limited.exception.status, limited.exception.retry_after))
+        self.assertEqual(3.0, header_only.exception.retry_after)
+        self.assertEqual(1, transport.stats()["connections_opened"])
+
+    def test_only_transient_statuses_are_network_errors(self) -> None:
+        server, base_url = self._serve()
+        transport = HttpTransport(timeout_seconds=5)
+        self.addCleanup(transport.close)
+        server.status = 503
+        with self.assertRaises(HttpStatusError) as unavailable:
+            transport.post_json(f"{base_url}/hook", {})
+        server.status = 400
+        with self.assertRaises(HttpRejectedError) as rejected:
+            transport.post_json(f"{base_url}/hook", {})
+
+        self.assertIsInstance(unavailable.exception, SINK_NETWORK_ERRORS)
+        self.assertEqual(400, rejected.exception.status)
+        self.assertIsInstance(rejected.exception, PermanentSinkError)
+        self.assertNotIsInstance(rejected.exception, SINK_NETWORK_ERRORS)
+
+    def test_follows_redirects_like_urllib(self) -> None:
+        server, base_url = self._serve()
+        transport = HttpTransport(timeout_seconds=5)
+        self.addCleanup(transport.close)
+        transport.post_json(f"{base_url}/old", {"n": 1})
+        transport.post_json(f"{base_url}/moved", {"n": 2})
+
+        self.assertEqual([{"n": 1}], server.bodies)
+        self.assertEqual(
+            [("POST", "/old"), ("POST", "/hook"), ("POST", "/moved"), ("GET", "/landing")],
+            server.requests,
+        )
+
+    def test_timeouts_surface_as_transport_errors(self) -> None:
+        _, base_url = self._serve()
+        transport = HttpTransport(timeout_seconds=0.1)
+        self.addCleanup(transport.close)
+        with self.assertRaises(TransportError) as raised:
+            transport.post_json(f"{base_url}/slow", {})
+
+        self.assertIsInstance(raised.exception.__cause__, TimeoutError)
+        self.assertIsInstance(raised.exception, SINK_NETWORK_ERRORS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from pequod.metrics import Histogram, PrometheusWriter, StageClock
+
+
+class MetricsTests(unittest.TestCase):
+    def test_histogram_renders_cumulative_buckets(self) -> None:
+        histogram = Histogram("pequod_stage_seconds", "Stage time.", buckets=(0.1, 1.0), label_name="stage")
+        histogram.observe(0.05, label="fetch")
+        histogram.observe(0.1, label="fetch")
+        histogram.observe(3.0, label="fetch")
+        writer = PrometheusWriter()
+        histogram.render(writer)
+        text = writer.render()
+
+        self.assertIn("# TYPE pequod_stage_seconds histogram", text)
+        self.assertIn('pequod_stage_seconds_bucket{stage="fetch",le="0.1"} 2', text)
+        self.assertIn('pequod_stage_seconds_bucket{stage="fetch",le="1"} 2', text)
+        self.assertIn('pequod_stage_seconds_bucket{stage="fetch",le="+Inf"} 3', text)
+        self.assertIn('pequod_stage_seconds_count{stage="fetch"} 3', text)
+
+    def test_stage_clock_accumulates_repeated_stages(self) -> None:
+        clock = StageClock()
+        with clock.stage("sink"):
+            pass
+        with clock.stage("sink"):
+            pass
+        self.assertEqual(["sink"], list(clock.totals))
+        self.assertGreaterEqual(clock.totals["sink"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,305 @@
+import time
+import unittest
+from email.message import Message
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List, Optional
+
+from pequod.dedupe import DedupeStore
+from pequod.http_transport import HttpRejectedError, HttpStatusError
+from pequod.metrics import PrometheusWriter
+from pequod.outbox import DeliveryWorker, Outbox, OutboxSink
+from pequod.poller import WhalePoller
+from pequod.ratelimit import RateLimitedError
+from pequod.raw_store import RawBlobStore, RawRetention
+from pequod.sinks import AlertSink, encode_alert
+from pequod.types import Alert, WatchAddress, materialize_raw
+
+WATCH = "0x1111111111111111111111111111111111111111"
+
+
+class FlakySink(AlertSink):
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.alerts: List[Alert] = []
+        self.attempts = 0
+
+    def send(self, alert: Alert) -> None:
+        self.attempts += 1
+        if self.failures > 0:
+            self.failures -= 1
+            raise TimeoutError("sink timed out")
+        self.alerts.append(alert)
+
+
+class RawSink(FlakySink):
+    requires_raw = True
+
+
+class SteadySink(FlakySink):
+    pass
+
+
+class BatchSink(FlakySink):
+    max_batch = 10
+
+    def __init__(self, failures: int = 0) -> None:
+        super().__init__(failures)
+        self.batches: List[int] = []
+
+    def send_many(self, alerts: List[Alert]) -> None:
+        self.batches.append(len(alerts))
+        if self.failures > 0:
+            self.failures -= 1
+            raise RateLimitedError(30.0)
+        self.alerts.extend(alerts)
+
+
+class StatusSink(FlakySink):
+    def __init__(self, statuses: Dict[str, int]) -> None:
+        super().__init__()
+        self.statuses = statuses
+
+    def send(self, alert: Alert) -> None:
+        self.attempts += 1
+        status = self.statuses.get(alert.text)
+        if status is None:
+            self.alerts.append(alert)
+            return
+        error = HttpStatusError if status >= 500 else HttpRejectedError
+        raise error("https://example.test/hook", status, Message(), b"")
+
+
+class StaticClient:
+    def __init__(self, payload: Any) -> None:
+        self._payload = payload
+
+    def wallet_transactions(self, addresses: List[Dict[str, str]]) -> Any:
+        return self._payload
+
+    def prices(self, tokens: List[Dict[str, str]]) -> List[Any]:
+        return []
+
+    def get_cached_price(self, chain: str, token_address: str, ttl_seconds: int = 60) -> Optional[Any]:
+        return None
+
+
+def _alert(index: int) -> Alert:
+    return Alert(
+        dedupe_key=f"ethereum:0x{index}:asset_transfer:0",
+        text=f"alert {index}",
+        usd_value=100_000.0 + index,
+        tx_id=f"0x{index}",
+        chain="ethereum",
+        tx_type="asset_transfer",
+        timestamp=1_700_000_000 + index,
+        watch_address=WATCH,
+        from_address=WATCH,
+        to_address="0xother",
+        token_symbol="USDC",
+        token_address="0xa0b8",
+        amount=100_000.0,
+        raw={"transaction_hash": f"0x{index}"},
+        score=20.0,
+    )
+
+
+class OutboxTests(unittest.TestCase):
+    def test_failed_head_is_retried_with_backoff_and_order_is_kept(self) -> None:
+        with TemporaryDirectory() as tmp:
+            outbox = Outbox(Path(tmp) / "outbox.sqlite3")
+            flaky = FlakySink(failures=2)
+            steady = SteadySink()
+            sink = OutboxSink(outbox, [flaky, steady], base_backoff_seconds=1.0, max_backoff_seconds=60.0)
+            for index in range(3):
+                sink.send(_alert(index))
+            sink.flush()
+            workers = {worker.name: worker for worker in sink._workers}
+
+            now = time.time()
+            self.assertEqual(3, workers["SteadySink"].drain_once(now))
+            self.assertEqual(0, workers["FlakySink"].drain_once(now))
+            self.assertEqual(0, workers["FlakySink"].drain_once(now + 0.5))
+            self.assertEqual(0, workers["FlakySink"].drain_once(now + 1.0))
+            depth = outbox.depth()
+            self.assertEqual(3, workers["FlakySink"].drain_once(now + 3.0))
+            stats = sink.stats()
+            writer = PrometheusWriter()
+            sink.render_prometheus(writer)
+            outbox.close()
+
+        self.assertEqual(5, flaky.attempts)
+        self.assertEqual(["alert 0", "alert 1", "alert 2"], [alert.text for alert in flaky.alerts])
+        self.assertEqual(3, len(steady.alerts))
+        self.assertEqual(3, depth["FlakySink"]["pending"])
+        self.assertNotIn("SteadySink", depth)
+        self.assertEqual({"pending": 0, "delivered": 3, "failures": 2}, {
+            key: stats["outbox"]["FlakySink"][key] for key in ("pending", "delivered", "failures")
+        })
+        self.assertIn('pequod_outbox_depth{sink="FlakySink"} 0', writer.render())
+        self.assertIn('pequod_sink_send_seconds_count{sink="FlakySink"} 5', writer.render())
+
+    def test_undelivered_alerts_survive_a_restart(self) -> None:
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "outbox.sqlite3"
+            outbox = Outbox(path)
+            sink = OutboxSink(outbox, [RawSink()])
+            sink.send(_alert(1))
+            sink.send(_alert(1))
+            sink.flush()
+            outbox.close()
+
+            reopened = Outbox(path)
+            recovered = RawSink()
+            delivered = OutboxSink(reopened, [recovered]).drain()
+            depth = reopened.depth()
+            rows = reopened._conn.execute("SELECT COUNT(*) FROM outbox_alerts").fetchone()[0]
+            reopened.close()
+
+        self.assertEqual(1, delivered)
+        self.assertEqual(_alert(1), recovered.alerts[0])
+        self.assertEqual({}, depth)
+        self.assertEqual(0, rows)
+
+    def test_disk_retained_raw_is_referenced_not_copied(self) -> None:
+        with TemporaryDirectory() as tmp:
+            blobs = RawBlobStore(Path(tmp) / "blobs", max_blobs=1)
+            retention = RawRetention("disk", blobs)
+            outbox = Outbox(Path(tmp) / "outbox.sqlite3")
+            target = RawSink()
+            sink = OutboxSink(outbox, [target], raw_store=blobs)
+            for index in range(3):
+                sink.send(retention.apply(_alert(index)))
+            sink.flush()
+            payload = outbox._conn.execute("SELECT payload FROM outbox_alerts ORDER BY id").fetchone()[0]
+            for index in range(3, 6):
+                retention.apply(_alert(index))
+            sink.drain()
+            delivered_raw = [materialize_raw(alert.raw) for alert in target.alerts]
+            outbox.close()
+
+        self.assertNotIn("transaction_hash", payload)
+        self.assertIn('"raw_ref":"ethereum:0x0:asset_transfer:0"', payload)
+        self.assertEqual([{"transaction_hash": f"0x{index}"} for index in range(3)], delivered_raw)
+
+    def test_backlog_is_handed_over_as_one_batch_after_retry_after(self) -> None:
+        with TemporaryDirectory() as tmp:
+            outbox = Outbox(Path(tmp) / "outbox.sqlite3")
+            target = BatchSink(failures=1)
+            sink = OutboxSink(outbox, [target], base_backoff_seconds=1.0)
+            for index in range(3):
+                sink.send(_alert(index))
+            sink.flush()
+            worker = sink._workers[0]
+            now = time.time()
+            worker.drain_once(now)
+            early = worker.drain_once(now + 10)
+            late = worker.drain_once(now + 30)
+            outbox.close()
+
+        self.assertEqual((0, 3), (early, late))
+        self.assertEqual([3, 3], target.batches)
+        self.assertEqual(["alert 0", "alert 1", "alert 2"], [alert.text for alert in target.alerts])
+
+    def test_gives_up_after_max_attempts(self) -> None:
+        with TemporaryDirectory() as tmp:
+            outbox = Outbox(Path(tmp) / "outbox.sqlite3")
+            broken = FlakySink(failures=10)
+            worker = DeliveryWorker(outbox, broken, max_attempts=2)
+            outbox.enqueue_many([(_alert(1).dedupe_key, encode_alert(_alert(1), False)), ("bad", "{}")], [worker.name])
+            now = time.time()
+            worker.drain_once(now)
+            worker.drain_once(now + 10)
+            depth = outbox.depth()
+            outbox.close()
+
+        self.assertEqual({"FlakySink": {"pending": 0, "dead": 2, "oldest_created_at": None}}, depth)
+        self.assertEqual(2, worker.dead_total)
+        self.assertEqual(2, broken.attempts)
+
+    def test_rejected_alert_is_dead_lettered_at_once_and_unblocks_the_rest(self) -> None:
+        with TemporaryDirectory() as tmp:
+            outbox = Outbox(Path(tmp) / "outbox.sqlite3")
+            rejecting = StatusSink({"alert 0": 400})
+            unavailable = StatusSink({"alert 0": 503})
+            sink = OutboxSink(outbox, [rejecting, unavailable])
+            for index in range(2):
+                sink.send(_alert(index))
+            sink.flush()
+            workers = sink._workers
+            now = time.time()
+            delivered = [worker.drain_once(now) for worker in workers]
+            depth = outbox.depth()
+            outbox.close()
+
+        self.assertEqual([1, 0], delivered)
+        self.assertEqual(["alert 1"], [alert.text for alert in rejecting.alerts])
+        self.assertEqual(1, workers[0].dead_total)
+        self.assertEqual({"pending": 0, "dead": 1}, {key: depth["StatusSink"][key] for key in ("pending", "dead")})
+        self.assertEqual({"pending": 2, "dead": 0}, {key: depth["StatusSink#2"][key] for key in ("pending", "dead")})
+
+    def test_rate_limits_do_not_use_up_attempts(self) -> None:
+        with TemporaryDirectory() as tmp:
+            outbox = Outbox(Path(tmp) / "outbox.sqlite3")
+            throttled = BatchSink(failures=3)
+            worker = DeliveryWorker(outbox, throttled, max_attempts=2)
+            outbox.enqueue_many([(_alert(index).dedupe_key, encode_alert(_alert(index), False)) for index in range(2)], [worker.name])
+            now = time.time()
+            for step in range(3):
+                worker.drain_once(now + step * 30)
+            throttled_rows = outbox._conn.execute("SELECT attempts, dead FROM outbox_deliveries").fetchall()
+            delivered = worker.drain_once(now + 90)
+            outbox.close()
+
+        self.assertEqual([(0, 0), (0, 0)], throttled_rows)
+        self.assertEqual(2, delivered)
+        self.assertEqual(0, worker.dead_total)
+
+    def test_poll_cycle_writes_to_outbox_without_calling_sinks(self) -> None:
+        now = int(time.time())
+        payload = [
+            {
+                "address": WATCH,
+                "items": [
+                    {
+                        "transaction_hash": f"0xtx{index}",
+                        "chain": "ethereum",
+                        "activity_type": "asset_transfer",
+                        "from_address": WATCH,
+                        "to_address": "0x2222222222222222222222222222222222222222",
+                        "usd_value": 50_000 + index,
+                        "block_timestamp": now - 10 + index,
+                        "asset_transfer_index": 0,
+                    }
+                    for index in range(3)
+                ],
+            }
+        ]
+        with TemporaryDirectory() as tmp:
+            outbox = Outbox(Path(tmp) / "outbox.sqlite3")
+            target = FlakySink()
+            dedupe = DedupeStore(Path(tmp) / "dedupe.sqlite3")
+            poller = WhalePoller(
+                client=StaticClient(payload),  # type: ignore[arg-type]
+                watchlist=[WatchAddress(chain="ethereum", address=WATCH, label="Watch Whale")],
+                dedupe_store=dedupe,
+                sink=OutboxSink(outbox, [target]),
+                min_alert_usd=1000.0,
+                max_addresses_per_request=20,
+                poll_interval_seconds=20,
+                lookback_seconds=3600,
+            )
+            poller.run_once()
+            snapshot = poller.metrics_snapshot()
+            seen = dedupe.filter_unseen([f"ethereum:0xtx{index}:asset_transfer:0" for index in range(3)])
+            dedupe.close()
+            outbox.close()
+
+        self.assertEqual([], target.alerts)
+        self.assertEqual(3, snapshot["alerts_sent"])
+        self.assertEqual(3, snapshot["sinks"]["outbox"]["FlakySink"]["pending"])
+        self.assertEqual([], seen)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from pequod import parsing, utils
+
+
+class ParsingTests(unittest.TestCase):
+    def test_parse_timestamp_matches_utils(self) -> None:
+        values = [
+            None,
+            True,
+            1770381296,
+            1770381296789,
+            1770381296.9,
+            "1770381296",
+            " 2026-02-06T12:34:56Z ",
+            "2026-02-06T12:34:56",
+            "2026-02-06 12:34:56",
+            "2026-02-06T12:34:56.250Z",
+            "2026-02-06T12:34:56+02:00",
+            "2026-02-06",
+            "1969-12-31T23:59:59Z",
+            "2026-13-06T12:34:56Z",
+            "2026-02-06T12:34:56X",
+            "not a time",
+            "",
+            {"ts": 1},
+        ]
+        for value in values:
+            with self.subTest(value=value):
+                self.assertEqual(utils.parse_timestamp(value), parsing.parse_timestamp(value))
+
+    def test_timestamp_cache_is_bounded_and_reused(self) -> None:
+        parsing.clear_timestamp_cache()
+        for _ in range(3):
+            parsing.parse_timestamp("2026-02-06T12:34:56Z")
+        info = parsing.timestamp_cache_info()
+        self.assertEqual(2, info.hits)
+        self.assertEqual(parsing.TIMESTAMP_CACHE_SIZE, info.maxsize)
+
+    def test_to_float_matches_utils(self) -> None:
+        values = [None, True, 0, 7, 2.5, "3.25", " 4 ", "1,234.5", "1_000", "nan", "12abc", ",", "", [], {"a": 1}]
+        for value in values:
+            with self.subTest(value=value):
+                expected = utils.to_float(value)
+                actual = parsing.to_float(value)
+                if expected is not None and expected != expected:
+                    self.assertNotEqual(actual, actual)
+                else:
+                    self.assertEqual(expected, actual)
+
+
+if __name__ == "__main__":
+    unittest.main()
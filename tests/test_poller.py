@@ -6,18 +6,24 @@ from typing import Any, Callable, Dict, List, Optional
 
 from pequod.allium_client import PriceQuote
 from pequod.dedupe import DedupeStore
+from pequod.metrics import PrometheusWriter
 from pequod.poller import WhalePoller
 from pequod.sinks import AlertSink, MultiSink
 from pequod.types import Alert, WatchAddress
+from pequod.watchlist import WatchlistDiff
 
 
 class RecordingSink(AlertSink):
     def __init__(self) -> None:
         self.alerts: List[Alert] = []
+        self.flushed_at: List[int] = []
 
     def send(self, alert: Alert) -> None:
         self.alerts.append(alert)
 
+    def flush(self) -> None:
+        self.flushed_at.append(len(self.alerts))
+
 
 class FakeClient:
     def __init__(self, transactions_payload: Any, prices_by_key: Dict[str, float]) -> None:
@@ -126,6 +132,14 @@ class PollerTests(unittest.TestCase):
         self.assertEqual(0, metrics["price_missing"])
         self.assertGreaterEqual(metrics["events_per_min"], 2)
 
+        writer = PrometheusWriter()
+        poller.render_prometheus(writer)
+        exposition = writer.render()
+        self.assertIn("pequod_alerts_sent_total 2", exposition)
+        self.assertIn("pequod_watch_addresses 1", exposition)
+        self.assertIn('pequod_cycle_stage_duration_seconds_count{stage="price"} 1', exposition)
+        self.assertIn("pequod_cycle_duration_seconds_count 1", exposition)
+
     def test_records_price_miss_when_quote_unavailable(self) -> None:
         now = int(time.time())
         payload = [
@@ -201,6 +215,107 @@ class PollerTests(unittest.TestCase):
         self.assertEqual("discovered", discovered[0].category)
         self.assertEqual(1, metrics["discovered_watch_addresses"])
 
+    def test_already_seen_events_skip_enrichment_and_discovery(self) -> None:
+        now = int(time.time())
+        item = {
+            "transaction_hash": "0xtx-seen",
+            "chain": "ethereum",
+            "activity_type": "asset_transfer",
+            "from_address": "0x1111111111111111111111111111111111111111",
+            "to_address": "0x2222222222222222222222222222222222222222",
+            "token_address": "0xtoken",
+            "amount": 10,
+            "usd_value": 120000,
+            "block_timestamp": now - 3,
+        }
+        payload = [{"address": "0x1111111111111111111111111111111111111111", "items": [item, dict(item)]}]
+        client = FakeClient(payload, {})
+        sink = RecordingSink()
+        discovered: List[WatchAddress] = []
+        with TemporaryDirectory() as tmp:
+            poller = self._build_poller(
+                Path(tmp),
+                client,
+                sink,
+                auto_discover_counterparties=True,
+                discover_min_usd=50_000.0,
+                discovered_watch_max=20,
+                on_discovered_watch_addresses=lambda rows: discovered.extend(rows),
+            )
+            poller.run_once()
+            self.assertEqual(1, len(sink.alerts))
+
+            enriched: List[str] = []
+            poller._enrich_entities = lambda tx: enriched.append(tx.tx_id) or {}  # type: ignore[method-assign]
+            poller._latest_timestamp_by_watch_address.clear()
+            poller.run_once()
+            metrics = poller.metrics_snapshot()
+
+        self.assertEqual(1, len(sink.alerts))
+        self.assertEqual([], enriched)
+        self.assertEqual(1, len(discovered))
+        self.assertEqual(1, metrics["alerts_sent"])
+
+    def test_marks_sent_alerts_in_one_write_per_cycle(self) -> None:
+        now = int(time.time())
+        items = [
+            {
+                "transaction_hash": f"0xtx-burst-{index}",
+                "chain": "ethereum",
+                "activity_type": "asset_transfer",
+                "from_address": "0xa",
+                "to_address": "0xb",
+                "usd_value": 5000 + index,
+                "block_timestamp": now - 10 + index,
+            }
+            for index in range(5)
+        ]
+        client = FakeClient([{"address": "0x1111111111111111111111111111111111111111", "items": items}], {})
+        sink = RecordingSink()
+        with TemporaryDirectory() as tmp:
+            poller = self._build_poller(Path(tmp), client, sink)
+            writes: List[List[str]] = []
+            mark_seen_many = poller._dedupe_store.mark_seen_many
+            poller._dedupe_store.mark_seen_many = lambda keys: writes.append(list(keys)) or mark_seen_many(keys)  # type: ignore[method-assign]
+            poller.run_once()
+            unseen = poller._dedupe_store.filter_unseen(alert.dedupe_key for alert in sink.alerts)
+
+        self.assertEqual(5, len(sink.alerts))
+        self.assertEqual([5], sink.flushed_at)
+        self.assertEqual([[alert.dedupe_key for alert in sink.alerts]], writes)
+        self.assertEqual([], unseen)
+
+    def test_apply_watchlist_diff_updates_address_indexes(self) -> None:
+        client = FakeClient([], {})
+        with TemporaryDirectory() as tmp:
+            poller = self._build_poller(Path(tmp), client, RecordingSink())
+            poller.apply_watchlist_diff(
+                WatchlistDiff(
+                    added=[WatchAddress(chain="ethereum", address="0xNEW", label="New Exchange", category="exchanges")],
+                    removed=[WatchAddress(chain="ethereum", address="0x1111111111111111111111111111111111111111", label="Watch Whale")],
+                )
+            )
+
+        self.assertEqual(["0xNEW"], [item.address for item in poller._watchlist])
+        self.assertEqual({"0xnew"}, set(poller._address_labels))
+        self.assertEqual({"0xnew"}, set(poller._latest_timestamp_by_watch_address))
+
+    def test_apply_watchlist_diff_keeps_the_address_on_its_other_chain(self) -> None:
+        client = FakeClient([], {})
+        with TemporaryDirectory() as tmp:
+            poller = self._build_poller(Path(tmp), client, RecordingSink())
+            address = "0x1111111111111111111111111111111111111111"
+            on_base = WatchAddress(chain="base", address=address, label="Watch Whale Base")
+            poller.apply_watchlist_diff(WatchlistDiff(added=[on_base]))
+            poller.apply_watchlist_diff(
+                WatchlistDiff(removed=[WatchAddress(chain="ethereum", address=address, label="Watch Whale")])
+            )
+
+        self.assertEqual([on_base], poller._watchlist)
+        self.assertEqual({address: "base"}, poller._address_to_chain)
+        self.assertEqual(on_base, poller._address_labels[address])
+        self.assertIn(address, poller._latest_timestamp_by_watch_address)
+
 
 if __name__ == "__main__":
     unittest.main()
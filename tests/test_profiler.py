@@ -0,0 +1,35 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from pequod.profiler import CycleProfiler
+
+
+class ProfilerTests(unittest.TestCase):
+    def test_profiles_only_armed_cycles(self) -> None:
+        with TemporaryDirectory() as tmp:
+            profiler = CycleProfiler(Path(tmp) / "profiles")
+            with profiler.cycle():
+                sum(range(1000))
+            self.assertEqual([], profiler.list_profiles())
+
+            self.assertEqual(1, profiler.arm(1))
+            with profiler.cycle():
+                sum(range(1000))
+            with profiler.cycle():
+                sum(range(1000))
+
+            profiles = profiler.list_profiles()
+            self.assertEqual(1, len(profiles))
+            self.assertEqual(0, profiler.remaining)
+            self.assertIsNotNone(profiler.profile_path(profiles[0]["name"]))
+
+    def test_rejects_names_outside_profile_dir(self) -> None:
+        with TemporaryDirectory() as tmp:
+            profiler = CycleProfiler(Path(tmp))
+            self.assertIsNone(profiler.profile_path("../alerts.sqlite3"))
+            self.assertIsNone(profiler.profile_path("cycle-1-1.pstats"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from pequod.raw_store import BlobRaw, CompressedRaw, RawBlobStore, RawRetention, build_raw_retention
+from pequod.sinks import GenericWebhookSink, MultiSink, NullSink
+from pequod.types import Alert, RawTransferView, materialize_raw
+
+TX = {"hash": "0xtx", "chain": "ethereum", "asset_transfers": [{"amount": {"usd_value": 5}}]}
+
+
+def _alert(dedupe_key: str = "ethereum:0xtx:transfer:0") -> Alert:
+    return Alert(
+        dedupe_key=dedupe_key,
+        text="t",
+        usd_value=5.0,
+        tx_id="0xtx",
+        chain="ethereum",
+        tx_type="transfer",
+        timestamp=None,
+        watch_address=None,
+        from_address=None,
+        to_address=None,
+        token_symbol=None,
+        token_address=None,
+        amount=None,
+        raw=RawTransferView(TX, 0, TX["asset_transfers"][0]),
+    )
+
+
+class RawRetentionTests(unittest.TestCase):
+    def test_auto_keeps_raw_only_for_sinks_that_need_it(self) -> None:
+        with TemporaryDirectory() as tmp:
+            plain = MultiSink([NullSink()])
+            webhook = MultiSink([NullSink(), GenericWebhookSink("http://127.0.0.1:1/hook", 1)])
+            self.assertFalse(plain.requires_raw)
+            self.assertTrue(webhook.requires_raw)
+            self.assertEqual("drop", build_raw_retention("auto", plain.requires_raw, Path(tmp)).policy)
+            self.assertEqual("memory", build_raw_retention("auto", webhook.requires_raw, Path(tmp)).policy)
+        with self.assertRaises(ValueError):
+            RawRetention("sometimes")
+
+    def test_drop_and_compressed_policies(self) -> None:
+        expected = materialize_raw(_alert().raw)
+        self.assertEqual({}, dict(RawRetention("drop").apply(_alert()).raw))
+
+        compressed = RawRetention("compressed").apply(_alert()).raw
+        self.assertIsInstance(compressed, CompressedRaw)
+        self.assertEqual(expected, materialize_raw(compressed))
+        self.assertEqual("0xtx", compressed["hash"])
+
+    def test_disk_policy_stores_blobs_and_reads_lazily(self) -> None:
+        with TemporaryDirectory() as tmp:
+            store = RawBlobStore(Path(tmp), max_blobs=2)
+            retention = RawRetention("disk", store)
+            raw = retention.apply(_alert()).raw
+            self.assertIsInstance(raw, BlobRaw)
+            self.assertEqual(0, raw["asset_transfer_index"])
+
+            for index in range(4):
+                retention.apply(_alert(f"key-{index}"))
+            self.assertLessEqual(store.count, 3)
+            self.assertEqual({}, materialize_raw(BlobRaw(store, "missing")))
+
+    def test_blobs_pinned_by_pending_alerts_are_not_pruned(self) -> None:
+        with TemporaryDirectory() as tmp:
+            store = RawBlobStore(Path(tmp), max_blobs=2)
+            store.pinned = lambda: ["key-0"]
+            retention = RawRetention("disk", store)
+            for index in range(6):
+                retention.apply(_alert(f"key-{index}"))
+            pinned = store.get("key-0")
+            oldest_unpinned = store.get("key-1")
+
+        self.assertEqual(0, pinned["asset_transfer_index"])
+        self.assertIsNone(oldest_unpinned)
+
+
+if __name__ == "__main__":
+    unittest.main()
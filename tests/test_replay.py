@@ -0,0 +1,57 @@
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from pequod.replay import percentile, replay
+
+WATCH = "0x1111111111111111111111111111111111111111"
+
+
+class ReplayTests(unittest.TestCase):
+    def test_replay_reports_throughput_and_latency(self) -> None:
+        now = int(time.time())
+        payloads = [
+            [
+                {
+                    "address": WATCH,
+                    "chain": "ethereum",
+                    "items": [
+                        {
+                            "transaction_hash": f"0xtx{index}",
+                            "chain": "ethereum",
+                            "activity_type": "asset_transfer",
+                            "from_address": WATCH,
+                            "to_address": "0x2222222222222222222222222222222222222222",
+                            "token_address": "0xtoken",
+                            "amount": 1000 * (index + 1),
+                            "block_timestamp": now - 100 + index,
+                        }
+                        for index in range(5)
+                    ],
+                }
+            ]
+        ]
+        with TemporaryDirectory() as tmp:
+            report = replay(
+                payloads,
+                watchlist=[],
+                dedupe_db_path=Path(tmp) / "dedupe.sqlite3",
+                min_alert_usd=25_000.0,
+                prices_by_key={"ethereum:0xtoken": 10.0},
+            )
+
+        self.assertEqual(5, report["events"])
+        self.assertEqual(3, report["alerts"])
+        self.assertGreater(report["events_per_second"], 0)
+        self.assertGreaterEqual(report["alert_latency_p99_ms"], report["alert_latency_p50_ms"])
+        self.assertGreater(report["peak_rss_bytes"], 0)
+
+    def test_percentile_uses_nearest_rank(self) -> None:
+        self.assertEqual(0.0, percentile([], 99))
+        self.assertEqual(98.0, percentile([float(value) for value in range(100)], 99))
+        self.assertEqual(7.0, percentile([3.0, 7.0], 99))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from pequod.dedupe import DedupeStore
+from pequod.poller import WhalePoller
+from pequod.scoring import BatchScorer, magnitude_score, score_meta_from_components
+from pequod.sinks import MultiSink
+from pequod.types import NormalizedTransaction, WatchAddress
+
+WATCH = "0x1111111111111111111111111111111111111111"
+EXCHANGE = "0x3333333333333333333333333333333333333333"
+
+
+def _tx(tx_id: str, usd_value: float, to_address: str, tx_type: str = "asset_transfer", ts: int = 0) -> NormalizedTransaction:
+    return NormalizedTransaction(
+        tx_id=tx_id,
+        chain="ethereum",
+        tx_type=tx_type,
+        from_address=WATCH,
+        to_address=to_address,
+        token_address="0xtoken",
+        token_symbol="USDC",
+        amount=usd_value,
+        usd_value=usd_value,
+        timestamp=ts,
+        watch_address=WATCH,
+        raw={},
+    )
+
+
+class ScoringTests(unittest.TestCase):
+    def _build_poller(self, tmp_dir: Path) -> WhalePoller:
+        return WhalePoller(
+            client=None,  # type: ignore[arg-type]
+            watchlist=[
+                WatchAddress(chain="ethereum", address=WATCH, label="Watch Whale"),
+                WatchAddress(chain="ethereum", address=EXCHANGE, label="Binance Hot", category="exchanges"),
+            ],
+            dedupe_store=DedupeStore(tmp_dir / "dedupe.sqlite3"),
+            sink=MultiSink([]),
+            min_alert_usd=1.0,
+            max_addresses_per_request=20,
+            poll_interval_seconds=20,
+            lookback_seconds=3600,
+        )
+
+    def test_magnitude_is_capped(self) -> None:
+        self.assertEqual(45.0, magnitude_score(10**12))
+        self.assertAlmostEqual(9.0, magnitude_score(0.0))
+
+    def test_batch_scores_match_scalar_path_across_history_updates(self) -> None:
+        now = int(time.time())
+        txs = [
+            _tx("0x1", 50_000.0, "0xaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa", ts=now - 40),
+            _tx("0x2", 2_500_000.0, EXCHANGE, ts=now - 30),
+            _tx("0x3", 400_000.0, "0xaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa", tx_type="asset_bridge", ts=now - 20),
+            _tx("0x4", 60_000.0, "0xbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbbb", ts=now - 10),
+            _tx("0x5", 9_000_000.0, EXCHANGE, ts=now - 5),
+        ]
+        with TemporaryDirectory() as tmp:
+            scalar_poller = self._build_poller(Path(tmp) / "scalar")
+            batch_poller = self._build_poller(Path(tmp) / "batch")
+            scorer = BatchScorer(lambda key, ts: batch_poller._prune_score_history(key, now_ts=ts), now_ts=now)
+            scorer.load([tx.usd_value or 0.0 for tx in txs], [tx.tx_type for tx in txs])
+
+            for index, tx in enumerate(txs):
+                usd_value = float(tx.usd_value or 0.0)
+                expected = scalar_poller._score_alert(
+                    tx=tx,
+                    usd_value=usd_value,
+                    entities=scalar_poller._enrich_entities(tx),
+                    now_ts=now,
+                )
+                components = scorer.score(
+                    index,
+                    watch_key=batch_poller._watch_key_for_tx(tx),
+                    counterparty=batch_poller._counterparty_for_tx(tx),
+                    has_exchange=batch_poller._entities_have_exchange(batch_poller._enrich_entities(tx)),
+                )
+                self.assertEqual(expected, score_meta_from_components(components))
+
+                for poller in (scalar_poller, batch_poller):
+                    poller._record_alert_history(
+                        watch_key=str(expected["watch_key"]),
+                        counterparty=str(expected["counterparty"]),
+                        usd_value=usd_value,
+                        ts=tx.timestamp or now,
+                    )
+                scorer.invalidate(components.watch_key)
+
+        self.assertIn("burst_activity", expected["breakdown"])
+        self.assertIn("size_anomaly", expected["breakdown"])
+        self.assertIn("cex_interaction", expected["breakdown"])
+
+
+if __name__ == "__main__":
+    unittest.main()
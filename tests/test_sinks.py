@@ -0,0 +1,431 @@
+import json
+import threading
+import time
+import unittest
+from email.message import Message
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+from pequod.http_transport import HttpStatusError, HttpTransport, TransportError
+from pequod.metrics import Histogram, PrometheusWriter
+from pequod.outbox import DeliveryWorker, Outbox
+from pequod.ratelimit import RateLimitedError, RateLimiter
+from pequod.sinks import AlertSink, BundlingSink, DiscordSink, MultiSink, SinkDispatcher, TelegramSink, encode_alert
+from pequod.types import Alert
+
+
+class GatedSink(AlertSink):
+    def __init__(self) -> None:
+        self.gate = threading.Event()
+        self.alerts: List[str] = []
+        self.flushes = 0
+
+    def send(self, alert: Alert) -> None:
+        self.gate.wait(5)
+        self.alerts.append(alert.dedupe_key)
+
+    def flush(self) -> None:
+        self.flushes += 1
+
+
+class FastSink(GatedSink):
+    def __init__(self) -> None:
+        super().__init__()
+        self.gate.set()
+
+
+class FailingSink(AlertSink):
+    def send(self, alert: Alert) -> None:
+        raise TimeoutError("webhook timed out")
+
+
+class FlakySink(FastSink):
+    def __init__(self, failures: int) -> None:
+        super().__init__()
+        self.failures = failures
+
+    def send(self, alert: Alert) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise TransportError("connection reset")
+        super().send(alert)
+
+
+class BrokenSink(FastSink):
+    def send(self, alert: Alert) -> None:
+        if alert.dedupe_key == "key-0":
+            raise KeyError("missing template field")
+        super().send(alert)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+        self.slept: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(round(seconds, 3))
+        self.now += seconds
+
+
+def _headers(values: Dict[str, str]) -> Message:
+    message = Message()
+    for key, value in values.items():
+        message[key] = value
+    return message
+
+
+def _stub_transport(sink: Any, responses: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+    posted: List[Dict[str, Any]] = []
+    queued = list(responses or [])
+
+    def post_json(payload: Dict[str, Any]) -> Any:
+        posted.append(payload)
+        response = queued.pop(0) if queued else _headers({})
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    sink._post_json = post_json
+    return posted
+
+
+def _too_many_requests(body: Dict[str, Any]) -> HttpStatusError:
+    return HttpStatusError("https://example.test/hook", 429, _headers({}), json.dumps(body).encode("utf-8"))
+
+
+def _alert(index: int, text: Optional[str] = None) -> Alert:
+    return Alert(
+        dedupe_key=f"key-{index}",
+        text=text or f"alert {index}",
+        usd_value=50_000.0,
+        tx_id=f"0x{index}",
+        chain="ethereum",
+        tx_type="asset_transfer",
+        timestamp=1_700_000_000 + index,
+        watch_address="0xwatch",
+        from_address="0xwatch",
+        to_address="0xother",
+        token_symbol="USDC",
+        token_address="0xa0b8",
+        amount=50_000.0,
+        raw={},
+    )
+
+
+def _wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class MultiSinkDispatchTests(unittest.TestCase):
+    def test_slow_sink_does_not_hold_back_the_others(self) -> None:
+        slow, fast = GatedSink(), FastSink()
+        sink = MultiSink([slow, fast, FailingSink()], queue_size=10)
+        started = time.perf_counter()
+        for index in range(3):
+            sink.send(_alert(index))
+        sink.flush()
+        elapsed = time.perf_counter() - started
+        _wait_for(lambda: fast.flushes == 1)
+        fast_alerts = list(fast.alerts)
+        slow_before = list(slow.alerts)
+        slow.gate.set()
+        sink.close()
+        stats = sink.stats()["dispatch"]
+        writer = PrometheusWriter()
+        sink.render_prometheus(writer)
+
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(["key-0", "key-1", "key-2"], fast_alerts)
+        self.assertEqual([], slow_before)
+        self.assertEqual(["key-0", "key-1", "key-2"], slow.alerts)
+        self.assertEqual(1, slow.flushes)
+        self.assertEqual({"queue_depth": 0, "sent": 3, "failures": 0, "dropped": 0, "spilled": 0}, stats["GatedSink"])
+        self.assertEqual(3, stats["FailingSink"]["failures"])
+        self.assertEqual(3, stats["FailingSink"]["dropped"])
+        self.assertIn('pequod_sink_failures_total{sink="FailingSink"} 3', writer.render())
+        self.assertIn('pequod_sink_send_seconds_count{sink="FastSink"} 3', writer.render())
+
+    def test_drop_oldest_keeps_the_newest_alerts(self) -> None:
+        slow = GatedSink()
+        sink = MultiSink([slow], queue_size=2, overflow="drop_oldest")
+        sink.send(_alert(0))
+        _wait_for(lambda: sink.stats()["dispatch"]["GatedSink"]["queue_depth"] == 0)
+        for index in range(1, 5):
+            sink.send(_alert(index))
+        depth = sink.stats()["dispatch"]["GatedSink"]["queue_depth"]
+        slow.gate.set()
+        sink.close()
+
+        self.assertEqual(2, depth)
+        self.assertEqual(["key-0", "key-3", "key-4"], slow.alerts)
+        self.assertEqual(2, sink.stats()["dispatch"]["GatedSink"]["dropped"])
+
+    def test_spill_replays_in_order_and_survives_a_restart(self) -> None:
+        with TemporaryDirectory() as tmp:
+            spill_dir = Path(tmp)
+            slow = GatedSink()
+            sink = MultiSink([slow], queue_size=1, overflow="spill", spill_dir=spill_dir)
+            sink.send(_alert(0))
+            _wait_for(lambda: sink.stats()["dispatch"]["GatedSink"]["queue_depth"] == 0)
+            for index in range(1, 6):
+                sink.send(_alert(index))
+            depth = sink.stats()["dispatch"]["GatedSink"]["queue_depth"]
+            slow.gate.set()
+            _wait_for(lambda: len(slow.alerts) == 6)
+            sink.close()
+
+            # A sink that stopped mid-backlog leaves its spill file for the next run.
+            lines = [encode_alert(_alert(index), include_raw=False) for index in (6, 7)]
+            (spill_dir / "GatedSink.jsonl").write_text("\n".join(lines) + "\n", encoding="utf-8")
+            restarted = GatedSink()
+            restarted.gate.set()
+            resumed = MultiSink([restarted], queue_size=1, overflow="spill", spill_dir=spill_dir)
+            _wait_for(lambda: len(restarted.alerts) == 2)
+            resumed.close()
+            leftovers = list(spill_dir.iterdir())
+
+        self.assertEqual(5, depth)
+        self.assertEqual([f"key-{index}" for index in range(6)], slow.alerts)
+        self.assertEqual(4, sink.stats()["dispatch"]["GatedSink"]["spilled"])
+        self.assertEqual(["key-6", "key-7"], restarted.alerts)
+        self.assertEqual([], leftovers)
+
+    def test_queued_network_errors_are_retried_in_order(self) -> None:
+        flaky = FlakySink(failures=2)
+        with patch("pequod.sinks.SINK_RETRY_BASE_SECONDS", 0.01):
+            sink = MultiSink([flaky], queue_size=10)
+            for index in range(3):
+                sink.send(_alert(index))
+            sink.flush()
+            _wait_for(lambda: flaky.flushes == 1)
+            sink.close()
+        stats = sink.stats()["dispatch"]["FlakySink"]
+
+        self.assertEqual(["key-0", "key-1", "key-2"], flaky.alerts)
+        self.assertEqual({"sent": 3, "failures": 2, "dropped": 0}, {key: stats[key] for key in ("sent", "failures", "dropped")})
+
+    def test_unexpected_errors_surface_in_both_modes(self) -> None:
+        with self.assertRaises(KeyError):
+            MultiSink([BrokenSink()]).send(_alert(0))
+
+        broken = BrokenSink()
+        sink = MultiSink([broken], queue_size=10)
+        with self.assertLogs("pequod.sinks", level="ERROR") as logs:
+            sink.send(_alert(0))
+            sink.send(_alert(1))
+            sink.close()
+
+        self.assertEqual(["key-1"], broken.alerts)
+        self.assertIn("KeyError", "\n".join(logs.output))
+        self.assertEqual(1, sink.stats()["dispatch"]["BrokenSink"]["dropped"])
+
+    def test_flush_is_not_lost_while_spilling(self) -> None:
+        with TemporaryDirectory() as tmp:
+            slow = GatedSink()
+            sink = MultiSink([slow], queue_size=1, overflow="spill", spill_dir=Path(tmp))
+            sink.send(_alert(0))
+            _wait_for(lambda: sink.stats()["dispatch"]["GatedSink"]["queue_depth"] == 0)
+            for index in range(1, 4):
+                sink.send(_alert(index))
+            sink.flush()
+            slow.gate.set()
+            _wait_for(lambda: slow.flushes == 1)
+            sink.close()
+
+        self.assertEqual([f"key-{index}" for index in range(4)], slow.alerts)
+        self.assertEqual(1, slow.flushes)
+
+    def test_closing_spills_a_batch_the_sink_keeps_refusing(self) -> None:
+        with TemporaryDirectory() as tmp:
+            spill_dir = Path(tmp)
+            flaky = FlakySink(failures=100)
+            sink = MultiSink([flaky], queue_size=5, overflow="spill", spill_dir=spill_dir)
+            sink.send(_alert(0))
+            _wait_for(lambda: sink.stats()["dispatch"]["FlakySink"]["failures"] == 1)
+            sink.send(_alert(1))
+            sink.close()
+            parked = [json.loads(line)["dedupe_key"] for line in (spill_dir / "FlakySink.draining").read_text(encoding="utf-8").splitlines()]
+            recovered = FlakySink(failures=0)
+            restarted = MultiSink([recovered], queue_size=5, overflow="spill", spill_dir=spill_dir)
+            _wait_for(lambda: len(recovered.alerts) == 2)
+            restarted.close()
+
+        self.assertEqual(["key-0", "key-1"], parked)
+        self.assertEqual(["key-0", "key-1"], recovered.alerts)
+        self.assertEqual(0, sink.stats()["dispatch"]["FlakySink"]["dropped"])
+
+    def test_unknown_overflow_policy_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            MultiSink([FastSink()], queue_size=1, overflow="discard")
+
+
+
+class RateLimiterTests(unittest.TestCase):
+    def test_waits_for_tokens_and_learns_from_429s(self) -> None:
+        clock = FakeClock()
+        limiter = RateLimiter(60, burst=2, clock=clock, sleep=clock.sleep)
+        for _ in range(3):
+            limiter.acquire()
+        self.assertEqual([1.0], clock.slept)
+
+        limiter.penalize(retry_after=5)
+        self.assertEqual(0, limiter.available())
+        self.assertEqual(30.0, limiter.rate_per_minute)
+        limiter.acquire()
+        self.assertEqual(5.0, clock.slept[-1])
+        limiter.reward()
+        self.assertEqual(36.0, limiter.rate_per_minute)
+
+        limiter.block_for(120)
+        with self.assertRaises(RateLimitedError):
+            limiter.acquire(max_wait=30)
+
+
+class BundlingSinkTests(unittest.TestCase):
+    def _limit(self, sink: Any, rate_per_minute: float, burst: int) -> FakeClock:
+        clock = FakeClock()
+        sink._limiter = RateLimiter(rate_per_minute, burst=burst, clock=clock, sleep=clock.sleep)
+        return clock
+
+    def test_telegram_sends_singly_within_budget_and_bundles_a_backlog(self) -> None:
+        sink = TelegramSink("token", "chat", 5)
+        clock = self._limit(sink, 20, burst=3)
+        posted = _stub_transport(sink)
+
+        sink.send_many([_alert(0), _alert(1)])
+        sink.send_many([_alert(index) for index in range(2, 6)])
+        clock.now += 6
+        sink.send_many([_alert(6, "x" * 3000), _alert(7, "y" * 3000)])
+
+        self.assertEqual(["alert 0", "alert 1"], [payload["text"] for payload in posted[:2]])
+        self.assertEqual("alert 2\n\nalert 3\n\nalert 4\n\nalert 5", posted[2]["text"])
+        self.assertEqual([3000, 3000], [len(payload["text"]) for payload in posted[3:]])
+        self.assertEqual({"rate_per_minute": 20.0, "messages": 5, "bundled": 4, "rate_limited": 0}, sink.stats())
+
+    def test_discord_bundles_into_embeds_within_limits(self) -> None:
+        sink = DiscordSink("https://discord.test/hook", 5)
+        clock = self._limit(sink, 30, burst=2)
+        posted = _stub_transport(sink)
+
+        sink.send_many([_alert(index) for index in range(12)])
+        clock.now += 4
+        sink.send_many([_alert(20, "a" * 5000), _alert(21, "b" * 2000)])
+
+        self.assertEqual([10, 2], [len(payload["embeds"]) for payload in posted[:2]])
+        self.assertEqual("alert 0", posted[0]["embeds"][0]["description"])
+        self.assertEqual("10 alerts", posted[0]["content"])
+        self.assertEqual(4096, len(posted[2]["embeds"][0]["description"]))
+        self.assertEqual({"content": "b" * 2000}, posted[3])
+
+    def test_discord_raises_for_retry_after_and_rate_limit_headers(self) -> None:
+        sink = DiscordSink("https://discord.test/hook", 5)
+        clock = self._limit(sink, 600, burst=5)
+        posted = _stub_transport(
+            sink,
+            [
+                _too_many_requests({"retry_after": 2.5}),
+                _headers({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "4"}),
+            ],
+        )
+
+        with self.assertRaises(RateLimitedError) as limited:
+            sink.send(_alert(0))
+        clock.now += 2.5
+        sink.send(_alert(0))
+        with self.assertRaises(RateLimitedError) as exhausted:
+            sink.send(_alert(1))
+
+        self.assertEqual(2, len(posted))
+        self.assertEqual([], clock.slept)
+        self.assertEqual((2.5, 4.0), (limited.exception.retry_after, exhausted.exception.retry_after))
+        self.assertEqual(1, sink.stats()["rate_limited"])
+
+    def test_telegram_raises_retry_after_without_retrying_in_process(self) -> None:
+        sink = TelegramSink("token", "chat", 5)
+        clock = self._limit(sink, 20, burst=3)
+        posted = _stub_transport(sink, [_too_many_requests({"ok": False, "parameters": {"retry_after": 7}})])
+
+        with self.assertRaises(RateLimitedError) as raised:
+            sink.send(_alert(0))
+
+        self.assertEqual(7.0, raised.exception.retry_after)
+        self.assertEqual(1, len(posted))
+        self.assertEqual([], clock.slept)
+        self.assertEqual(0, sink._limiter.available())
+
+    def test_a_429_mid_batch_only_retries_the_undelivered_alerts(self) -> None:
+        sink = TelegramSink("token", "chat", 5)
+        clock = self._limit(sink, 20, burst=3)
+        posted = _stub_transport(sink, [_headers({}), _too_many_requests({"parameters": {"retry_after": 7}})])
+        with TemporaryDirectory() as tmp:
+            outbox = Outbox(Path(tmp) / "outbox.sqlite3")
+            worker = DeliveryWorker(outbox, sink, name="telegram")
+            outbox.enqueue_many([(f"key-{index}", encode_alert(_alert(index), False)) for index in range(2)], ["telegram"])
+            now = time.time()
+            first = worker.drain_once(now)
+            clock.now += 7
+            second = worker.drain_once(now + 7)
+            depth = outbox.depth()
+            outbox.close()
+
+        self.assertEqual((1, 1), (first, second))
+        self.assertEqual(["alert 0", "alert 1", "alert 1"], [payload["text"] for payload in posted])
+        self.assertEqual({}, depth)
+
+    def test_inline_dispatch_waits_out_the_limiter_instead_of_dropping(self) -> None:
+        sink = TelegramSink("token", "chat", 5)
+        clock = self._limit(sink, 20, burst=3)
+        posted = _stub_transport(sink, [_headers({}), _too_many_requests({"parameters": {"retry_after": 7}})])
+        dispatcher = SinkDispatcher(sink, "telegram", Histogram("t", "t", label_name="sink"), sleep=clock.sleep)
+        for index in range(5):
+            dispatcher.send(_alert(index))
+
+        self.assertEqual(["alert 0", "alert 1", "alert 1", "alert 2", "alert 3", "alert 4"], [payload["text"] for payload in posted])
+        self.assertEqual(7.0, clock.slept[0])
+        self.assertEqual(0, dispatcher.dropped_total)
+        self.assertEqual(5, dispatcher.sent_total)
+
+    def test_a_bundling_sink_without_its_hooks_cannot_be_built(self) -> None:
+        class Unfinished(BundlingSink):
+            def _bundle(self, alerts: List[Alert]) -> List[List[Alert]]:
+                return [alerts]
+
+        with self.assertRaises(TypeError):
+            Unfinished("https://example.test/hook", HttpTransport(), 10)
+
+    def test_dispatcher_hands_the_backlog_to_send_many(self) -> None:
+        class BatchingSink(GatedSink):
+            max_batch = 10
+
+            def __init__(self) -> None:
+                super().__init__()
+                self.batches: List[int] = []
+
+            def send_many(self, alerts: List[Alert]) -> None:
+                self.batches.append(len(alerts))
+                for alert in alerts:
+                    self.send(alert)
+
+        slow = BatchingSink()
+        sink = MultiSink([slow], queue_size=20)
+        sink.send(_alert(0))
+        _wait_for(lambda: sink.stats()["dispatch"]["BatchingSink"]["queue_depth"] == 0)
+        for index in range(1, 6):
+            sink.send(_alert(index))
+        slow.gate.set()
+        sink.close()
+
+        self.assertEqual([5], slow.batches)
+        self.assertEqual([f"key-{index}" for index in range(6)], slow.alerts)
+
+
+if __name__ == "__main__":
+    unittest.main()
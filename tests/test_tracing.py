@@ -0,0 +1,84 @@
+import json
+import threading
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from pequod.outbox import Outbox, OutboxSink
+from pequod.sinks import MultiSink, NullSink
+from pequod.tracing import NULL_SPAN, TRACER, Tracer, span
+from pequod.types import Alert
+
+
+class TracingTests(unittest.TestCase):
+    def test_disabled_tracer_returns_null_span(self) -> None:
+        tracer = Tracer()
+        self.assertIs(NULL_SPAN, tracer.span("cycle"))
+        self.assertEqual([], tracer.recent())
+
+    def test_nested_spans_link_to_parent_and_write_jsonl(self) -> None:
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / "traces.jsonl"
+            tracer = Tracer()
+            tracer.configure(enabled=True, output_path=path)
+            with tracer.span("poll.cycle"):
+                with tracer.span("fetch", addresses=2):
+                    pass
+                with self.assertRaises(ValueError):
+                    with tracer.span("sink.send"):
+                        raise ValueError("boom")
+            tracer.configure(enabled=False)
+            lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+        spans = {row["name"]: row for row in tracer.recent()}
+        root = spans["poll.cycle"]
+        self.assertIsNone(root["parent_id"])
+        self.assertEqual(root["span_id"], spans["fetch"]["parent_id"])
+        self.assertEqual(root["trace_id"], spans["sink.send"]["trace_id"])
+        self.assertEqual("ValueError", spans["sink.send"]["attrs"]["error"])
+        self.assertEqual(2, spans["fetch"]["attrs"]["addresses"])
+        self.assertEqual(3, len(lines))
+        self.assertEqual(1, len(tracer.recent(trace_id=root["trace_id"], limit=1)))
+
+    def test_worker_thread_spans_link_back_to_the_cycle(self) -> None:
+        TRACER.configure(enabled=True)
+        self.addCleanup(TRACER.configure, enabled=False)
+        alert = Alert(
+            dedupe_key="key-1",
+            text="alert",
+            usd_value=1.0,
+            tx_id="0x1",
+            chain="ethereum",
+            tx_type="asset_transfer",
+            timestamp=1_700_000_000,
+            watch_address="0xwatch",
+            from_address="0xwatch",
+            to_address="0xother",
+            token_symbol="USDC",
+            token_address=None,
+            amount=1.0,
+            raw={},
+        )
+        with TemporaryDirectory() as tmp:
+            outbox = Outbox(Path(tmp) / "outbox.sqlite3")
+            delivery = OutboxSink(outbox, [NullSink()])
+            dispatch = MultiSink([NullSink()], queue_size=4)
+            with span("poll.cycle") as cycle:
+                with span("sink") as stage:
+                    dispatch.send(alert)
+                    delivery.send(alert)
+                    delivery.flush()
+            dispatch.close()
+            worker = threading.Thread(target=delivery.drain)
+            worker.start()
+            worker.join()
+            outbox.close()
+
+        sends = [row for row in TRACER.recent(trace_id=cycle.trace_id) if row["name"] == "sink.send"]
+        self.assertEqual(2, len(sends))
+        self.assertEqual({stage.span_id}, {row["parent_id"] for row in sends})
+        self.assertNotEqual(threading.current_thread().name, sends[0]["thread"])
+
+
+if __name__ == "__main__":
+    unittest.main()
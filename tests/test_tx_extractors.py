@@ -1,6 +1,8 @@
 import unittest
 
-from pequod.tx_extractors import normalize_transactions
+from tests.synthetic import SyntheticTraffic
+from pequod.tx_extractors import MAX_PLANS_PER_RESPONSE, normalize_transactions
+from pequod.types import RawTransferView, materialize_raw
 
 
 class TxExtractorTests(unittest.TestCase):
@@ -104,6 +106,61 @@ class TxExtractorTests(unittest.TestCase):
         self.assertEqual(["0xtoken1", "0xtoken2"], [tx.token_address for tx in txs])
         self.assertEqual([0, 1], [tx.raw.get("asset_transfer_index") for tx in txs])
 
+    def test_raw_views_share_the_parent_transaction(self) -> None:
+        tx = {
+            "hash": "0xtx",
+            "type": "dex_trade",
+            "asset_transfers": [{"from_address": f"0xfrom{index}", "amount": {"usd_value": index}} for index in range(3)],
+        }
+        txs = normalize_transactions({"items": [tx]}, {})
+
+        self.assertTrue(all(isinstance(item.raw, RawTransferView) and item.raw.tx is tx for item in txs))
+        view = txs[2].raw
+        self.assertEqual("0xtx", view["hash"])
+        self.assertEqual(2, view["asset_transfer_index"])
+        self.assertIs(tx["asset_transfers"][2], view["asset_transfer"])
+        self.assertEqual(len(tx) + 2, len(view))
+        self.assertEqual({**tx, "asset_transfer_index": 2, "asset_transfer": tx["asset_transfers"][2]}, view)
+        materialized = materialize_raw(view)
+        self.assertIsInstance(materialized, dict)
+        self.assertEqual(view, materialized)
+        self.assertEqual({"a": 1}, materialize_raw({"a": 1}))
+
+    def test_compiled_plans_match_generic_extraction(self) -> None:
+        traffic = SyntheticTraffic(seed=13, wallets=120)
+        address_to_chain = {item.address.lower(): item.chain for item in traffic.watchlist}
+        payload = traffic.wallet_transactions_payload(txs_per_wallet=5, now_ts=1_770_000_000)
+        payload.append(
+            {
+                "address": "0xwatch",
+                "items": [
+                    {
+                        "hash": "  0xpadded  ",
+                        "type": "",
+                        "token": {"address": "0xnested", "usd_value": "12,500"},
+                        "from": None,
+                        "sender": "0xsender",
+                        "asset_transfers": [{"amount": {"raw_amount": "5"}, "value": "oops"}, "skip-me"],
+                    },
+                    {"id": "", "usd_value": "bad", "amount": {"amount": 1}},
+                ],
+            }
+        )
+
+        compiled = normalize_transactions(payload, address_to_chain)
+        generic = normalize_transactions(payload, address_to_chain, compiled=False)
+        self.assertEqual(generic, compiled)
+        self.assertGreater(len(compiled), 100)
+
+    def test_rows_beyond_plan_budget_use_generic_path(self) -> None:
+        items = [
+            {"hash": f"0x{index}", f"extra_{index}": 1, "usd_value": index, "from_address": "0xfrom"}
+            for index in range(MAX_PLANS_PER_RESPONSE + 4)
+        ]
+        txs = normalize_transactions({"items": items}, {})
+        self.assertEqual([float(index) for index in range(len(items))], [tx.usd_value for tx in txs])
+        self.assertEqual(normalize_transactions({"items": items}, {}, compiled=False), txs)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from pequod.types import Alert, NormalizedTransaction, WatchAddress
+
+
+def _tx(chain: str, symbol: str) -> NormalizedTransaction:
+    return NormalizedTransaction(
+        tx_id="0xtx",
+        chain=chain,
+        tx_type="".join(["asset_", "transfer"]),
+        from_address="0xfrom",
+        to_address="0xto",
+        token_address="0xtoken",
+        token_symbol=symbol,
+        amount=1.0,
+        usd_value=2.0,
+        timestamp=1,
+        watch_address="0xwatch",
+        raw={},
+    )
+
+
+class RecordTypeTests(unittest.TestCase):
+    def test_records_are_slotted(self) -> None:
+        watch = WatchAddress(chain="ethereum", address="0xwatch", label="Whale")
+        alert = Alert(
+            dedupe_key="k",
+            text="t",
+            usd_value=1.0,
+            tx_id="0xtx",
+            chain="ethereum",
+            tx_type="transfer",
+            timestamp=None,
+            watch_address=None,
+            from_address=None,
+            to_address=None,
+            token_symbol=None,
+            token_address=None,
+            amount=None,
+            raw={},
+        )
+        for record in (watch, alert, _tx("ethereum", "USDC")):
+            self.assertFalse(hasattr(record, "__dict__"))
+        with self.assertRaises(AttributeError):
+            alert.not_a_field = 1  # type: ignore[attr-defined]
+        self.assertEqual(watch, WatchAddress(chain="ethereum", address="0xwatch", label="Whale"))
+        self.assertEqual({watch}, {WatchAddress(chain="ethereum", address="0xwatch", label="Whale")})
+
+    def test_repeated_strings_are_interned(self) -> None:
+        first = _tx("".join(["ethe", "reum"]), "".join(["US", "DC"]))
+        second = _tx("".join(["ether", "eum"]), "".join(["USD", "C"]))
+        self.assertIs(first.chain, second.chain)
+        self.assertIs(first.tx_type, second.tx_type)
+        self.assertIs(first.token_symbol, second.token_symbol)
+        self.assertIsNone(_tx("ethereum", None).token_symbol)  # type: ignore[arg-type]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,11 @@
 import json
+import os
 import tempfile
 import unittest
 from pathlib import Path
 
-from pequod.watchlist import load_watchlist
+from pequod.types import WatchAddress
+from pequod.watchlist import WatchlistWatcher, diff_watchlists, load_watchlist
 
 
 class WatchlistTests(unittest.TestCase):
@@ -36,6 +38,54 @@ class WatchlistTests(unittest.TestCase):
 
         self.assertEqual(2, len(items))
 
+    def test_diff_reports_added_removed_and_relabeled(self) -> None:
+        old = [
+            WatchAddress(chain="ethereum", address="0xAbc", label="Binance"),
+            WatchAddress(chain="ethereum", address="0xdef", label="Whale X"),
+        ]
+        new = [
+            WatchAddress(chain="ethereum", address="0xabc", label="Binance Hot 1"),
+            WatchAddress(chain="solana", address="So111", label="SOL Whale"),
+        ]
+        diff = diff_watchlists(old, new)
+
+        self.assertEqual(["So111"], [item.address for item in diff.added])
+        self.assertEqual(["0xdef"], [item.address for item in diff.removed])
+        self.assertEqual(["Binance Hot 1"], [item.label for item in diff.relabeled])
+
+    def test_diff_keys_the_same_address_per_chain(self) -> None:
+        old = [
+            WatchAddress(chain="ethereum", address="0xAbc", label="Binance"),
+            WatchAddress(chain="base", address="0xabc", label="Binance"),
+        ]
+        new = [
+            WatchAddress(chain="base", address="0xabc", label="Binance Base"),
+            WatchAddress(chain="arbitrum", address="0xABC", label="Binance"),
+        ]
+        diff = diff_watchlists(old, new)
+
+        self.assertEqual([("arbitrum", "0xABC")], [(item.chain, item.address) for item in diff.added])
+        self.assertEqual([("ethereum", "0xAbc")], [(item.chain, item.address) for item in diff.removed])
+        self.assertEqual([("base", "Binance Base")], [(item.chain, item.label) for item in diff.relabeled])
+
+    def test_watcher_emits_diff_only_when_file_changes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "watchlist.json"
+            path.write_text(json.dumps({"ethereum": {"exchanges": {"binance": "0xabc"}}}), encoding="utf-8")
+            watcher = WatchlistWatcher(path, load_watchlist(path))
+            self.assertIsNone(watcher.poll())
+
+            path.write_text(
+                json.dumps({"ethereum": {"exchanges": {"binance": "0xabc", "okx": "0x123"}}}),
+                encoding="utf-8",
+            )
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            diff = watcher.poll()
+            self.assertIsNotNone(diff)
+            self.assertEqual(["0x123"], [item.address for item in diff.added] if diff else [])
+            self.assertIsNone(watcher.poll())
+
 
 if __name__ == "__main__":
     unittest.main()